@@ -10,6 +10,8 @@ from commanderbot.lib import RoleID
 
 @dataclass
 class AddRolesToTargetBase(AutomodActionBase):
+    requests = 1
+
     roles: Tuple[RoleID]
     reason: Optional[str] = None
 
@@ -10,6 +10,8 @@ from commanderbot.lib import RoleID
 
 @dataclass
 class RemoveRolesFromTargetBase(AutomodActionBase):
+    requests = 1
+
     roles: Tuple[RoleID]
 
     def get_target(self, event: AutomodEvent) -> Optional[Member]:
@@ -45,6 +45,11 @@ class AddUsersToThread(AutomodActionBase):
         except:
             event.log.exception(f"Failed to add role {role_id} to thread {thread.id}")
 
+    # @overrides AutomodActionBase
+    def get_requests(self) -> int:
+        # Roles may add any number of members, so this is only a lower bound.
+        return len(self.users) + len(self.roles)
+
     async def apply(self, event: AutomodEvent):
         if thread := event.thread:
             for user_id in self.users:
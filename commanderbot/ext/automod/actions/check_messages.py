@@ -1,7 +1,8 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Optional, Tuple, Type, TypeVar, cast
+from typing import AsyncIterable, Optional, Tuple, Type, TypeVar, cast
 
-from discord import Member, TextChannel, Thread
+from discord import Member, Message, TextChannel, Thread
 from discord.abc import Messageable
 
 from commanderbot.ext.automod.automod_action import (
@@ -14,10 +15,24 @@ from commanderbot.ext.automod.automod_condition import (
     deserialize_conditions,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent, AutomodEventBase
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.ext.automod.automod_rule_analysis import (
+    REQUEST_COST,
+    AutomodRuleAnalysis,
+)
 from commanderbot.lib import ChannelID, JsonObject, TextMessage
 
 ST = TypeVar("ST")
 
+DEFAULT_LOOKUP_LIMIT = 100
+
+# The number of messages that can be fetched per request.
+HISTORY_PAGE_SIZE = 100
+
+# The number of messages to check at once. Deletions are batched separately, so this
+# only needs to be large enough for them to land in the same batch.
+MAX_CONCURRENT_CHECKS = 10
+
 
 @dataclass
 class CheckingMessage(AutomodEventBase):
@@ -56,7 +71,9 @@ class CheckMessages(AutomodActionBase):
     actions
         The actions to apply to messages that pass the conditions.
     lookup_limit
-        The number of messages to fetch and check. Defaults to 100.
+        The number of messages to fetch and check. Defaults to 100. Recent messages
+        are read from a shared cache where possible, so that only the older remainder
+        needs to be fetched.
     channel
         The channel to perform the search in. Defaults to the channel in context.
     """
@@ -81,6 +98,25 @@ class CheckMessages(AutomodActionBase):
             lookup_limit=data.get("lookup_limit"),
         )
 
+    # @overrides AutomodActionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        limit = self.lookup_limit or DEFAULT_LOOKUP_LIMIT
+        pages = -(-limit // HISTORY_PAGE_SIZE)
+        per_message = analysis.measure(
+            [*self.conditions, *self.actions], conditional=bool(self.conditions)
+        )
+        analysis.add_cost(self.cost + pages * REQUEST_COST + limit * per_message)
+        if limit > HISTORY_PAGE_SIZE:
+            analysis.warn(
+                self,
+                f"Looks through {limit} messages, which may take {pages} requests",
+            )
+        if analysis.frequent:
+            analysis.warn(
+                self,
+                f"Looks through up to {limit} messages of history for every event",
+            )
+
     async def resolve_channel(self, event: AutomodEvent) -> Optional[Messageable]:
         if self.channel is not None:
             return event.bot.get_channel(self.channel)  # type: ignore
@@ -96,12 +132,32 @@ class CheckMessages(AutomodActionBase):
                 return
         await self.apply_message(dummy_event)
 
+    def iter_history(
+        self, event: AutomodEvent, channel: Messageable
+    ) -> AsyncIterable[Message]:
+        limit = self.lookup_limit or DEFAULT_LOOKUP_LIMIT
+        if event.services and isinstance(channel, TextChannel | Thread):
+            return event.services.history.history(channel, limit)
+        return channel.history(limit=limit)
+
     async def apply(self, event: AutomodEvent):
         if channel := await self.resolve_channel(event):
-            async for message in channel.history(limit=self.lookup_limit or 100):
+            # Check a few messages at a time, so that things like deletions can be
+            # batched together instead of waiting on one another, but without starting
+            # every check (and every request it makes) all at once.
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+
+            async def check(dummy_event: CheckingMessage):
+                async with semaphore:
+                    await self.check_message(dummy_event)
+
+            tasks = []
+            async for message in self.iter_history(event, channel):
                 message = cast(TextMessage, message)
                 dummy_event = CheckingMessage(event.bot, event.log, message)
-                await self.check_message(dummy_event)
+                dummy_event.services = event.services
+                tasks.append(create_metered_task(check(dummy_event)))
+            await asyncio.gather(*tasks)
 
 
 def create_action(data: JsonObject) -> AutomodAction:
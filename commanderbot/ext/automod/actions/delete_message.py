@@ -9,11 +9,19 @@ from commanderbot.lib import JsonObject
 class DeleteMessage(AutomodActionBase):
     """
     Delete the message in context.
+
+    Deletions are batched together with others in the same channel where possible, so
+    that they can be issued as a single bulk delete.
     """
 
+    requests = 1
+
     async def apply(self, event: AutomodEvent):
         if message := event.message:
-            await message.delete()
+            if event.services:
+                await event.services.deletions.delete(message)
+            else:
+                await message.delete()
 
 
 def create_action(data: JsonObject) -> AutomodAction:
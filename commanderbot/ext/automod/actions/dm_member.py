@@ -19,6 +19,8 @@ class DMMember(AutomodActionBase):
         The content of the message to send.
     """
 
+    requests = 2
+
     content: str
 
     async def apply(self, event: AutomodEvent):
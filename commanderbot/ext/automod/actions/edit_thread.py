@@ -30,6 +30,8 @@ class EditThread(AutomodActionBase):
         inactivity. Must be one of ``60``, ``1440``, ``4320``, or ``10080``.
     """
 
+    requests = 1
+
     name: Optional[str] = None
     archived: Optional[bool] = None
     locked: Optional[bool] = None
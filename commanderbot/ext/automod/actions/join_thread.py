@@ -15,6 +15,8 @@ class JoinThread(AutomodActionBase):
     first message may be duplicated if the bot is not listed as a member of it.
     """
 
+    requests = 1
+
     async def apply(self, event: AutomodEvent):
         if thread := event.thread:
             await thread.join()
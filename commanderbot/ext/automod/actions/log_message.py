@@ -1,13 +1,17 @@
 from dataclasses import dataclass
 from typing import Dict, Optional, Type, TypeVar
 
-from discord import Color
+from discord import Color, TextChannel, Thread
 from discord.abc import Messageable
 
 from commanderbot.ext.automod.automod_action import AutomodAction, AutomodActionBase
 from commanderbot.ext.automod.automod_event import AutomodEvent
 from commanderbot.lib import AllowedMentions, ChannelID, JsonObject, ValueFormatter
-from commanderbot.lib.utils import color_from_field_optional, message_to_file
+from commanderbot.lib.utils import (
+    color_from_field_optional,
+    message_to_file,
+    message_to_markdown,
+)
 
 ST = TypeVar("ST")
 
@@ -35,8 +39,14 @@ class LogMessage(AutomodActionBase):
     allowed_mentions
         The types of mentions allowed in the message. Unless otherwise specified, all
         mentions will be suppressed.
+    digest
+        Whether to coalesce the message with other log messages sent to the same channel
+        around the same time, instead of sending it right away. Useful for rules that
+        may fire many times in quick succession.
     """
 
+    requests = 1
+
     content: Optional[str] = None
     channel: Optional[ChannelID] = None
     emoji: Optional[str] = None
@@ -44,6 +54,7 @@ class LogMessage(AutomodActionBase):
     attach_message: Optional[bool] = None
     fields: Optional[Dict[str, str]] = None
     allowed_mentions: Optional[AllowedMentions] = None
+    digest: Optional[bool] = None
 
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
@@ -58,6 +69,7 @@ class LogMessage(AutomodActionBase):
             fields=data.get("fields"),
             attach_message=data.get("attach_message"),
             allowed_mentions=allowed_mentions,
+            digest=data.get("digest"),
         )
 
     async def resolve_channel(self, event: AutomodEvent) -> Optional[Messageable]:
@@ -87,7 +99,21 @@ class LogMessage(AutomodActionBase):
                 parts.append(fields_str)
             content = " ".join(parts)
             allowed_mentions = self.allowed_mentions or AllowedMentions.none()
-            if self.attach_message and (message := event.message):
+            if (
+                self.digest
+                and event.services
+                and isinstance(channel, TextChannel | Thread)
+            ):
+                attachment = None
+                if self.attach_message and (message := event.message):
+                    attachment = message_to_markdown(message)
+                event.services.log_digest.add(
+                    channel,
+                    content,
+                    allowed_mentions=allowed_mentions,
+                    attachment=attachment,
+                )
+            elif self.attach_message and (message := event.message):
                 message_file = message_to_file(message)
                 await channel.send(
                     content,
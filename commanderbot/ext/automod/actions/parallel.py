@@ -0,0 +1,160 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from commanderbot.ext.automod.automod_action import (
+    AutomodAction,
+    AutomodActionBase,
+    deserialize_actions,
+)
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
+from commanderbot.lib import JsonObject, ResponsiveException
+
+ST = TypeVar("ST")
+
+
+class InvalidActionGraph(ResponsiveException):
+    pass
+
+
+def sort_action_graph(dependencies: Dict[str, Tuple[str, ...]]) -> List[str]:
+    """
+    Return the names of actions in an order that respects their dependencies.
+
+    Raises if an action depends on an unknown action, or if there's a cycle.
+    """
+    for name, depends_on in dependencies.items():
+        for dependency in depends_on:
+            if dependency not in dependencies:
+                raise InvalidActionGraph(
+                    f"Action `{name}` depends on unknown action `{dependency}`"
+                )
+    remaining = {name: set(depends_on) for name, depends_on in dependencies.items()}
+    ordered: List[str] = []
+    while remaining:
+        ready = [name for name, depends_on in remaining.items() if not depends_on]
+        if not ready:
+            cycle = "`, `".join(sorted(remaining))
+            raise InvalidActionGraph(
+                f"Actions depend on each other in a cycle: `{cycle}`"
+            )
+        for name in ready:
+            ordered.append(name)
+            del remaining[name]
+        for depends_on in remaining.values():
+            depends_on.difference_update(ready)
+    return ordered
+
+
+@dataclass
+class Parallel(AutomodActionBase):
+    """
+    Apply a group of actions concurrently.
+
+    Actions are named, and may depend on other actions in the same group by name. An
+    action only starts once all of its dependencies have been applied successfully, and
+    is skipped if any of them fail. Actions without dependencies on one another run at
+    the same time. The dependency graph is validated when the action is created.
+
+    Attributes
+    ----------
+    actions
+        The actions to apply, by name. A plain list may also be given, in which case
+        the actions are named by their position and are all independent.
+    depends_on
+        The names of the actions that each action depends on, if any. In raw data this
+        is specified using a `depends_on` field on each action.
+    max_concurrency
+        The maximum number of actions to apply at once. Unlimited by default.
+    """
+
+    actions: Dict[str, AutomodAction]
+    depends_on: Dict[str, Tuple[str, ...]]
+    max_concurrency: Optional[int] = None
+
+    @classmethod
+    def from_data(cls: Type[ST], data: JsonObject) -> ST:
+        raw_actions = data["actions"]
+        if isinstance(raw_actions, list):
+            raw_actions = {str(i): raw for i, raw in enumerate(raw_actions, start=1)}
+        if not raw_actions:
+            raise InvalidActionGraph(
+                "Parallel actions must contain at least one action"
+            )
+        names: List[str] = []
+        values: List[Any] = []
+        depends_on: Dict[str, Tuple[str, ...]] = {}
+        for name, raw_action in raw_actions.items():
+            dependencies: Tuple[str, ...] = ()
+            if isinstance(raw_action, dict) and ("depends_on" in raw_action):
+                raw_action = dict(raw_action)
+                raw_dependencies = raw_action.pop("depends_on")
+                if isinstance(raw_dependencies, str):
+                    raw_dependencies = [raw_dependencies]
+                dependencies = tuple(str(d) for d in raw_dependencies)
+            names.append(str(name))
+            values.append(raw_action)
+            depends_on[str(name)] = dependencies
+        # Make sure the dependencies actually make sense up front.
+        sort_action_graph(depends_on)
+        actions = dict(zip(names, deserialize_actions(values)))
+        return cls(
+            description=data.get("description"),
+            actions=actions,
+            depends_on=depends_on,
+            max_concurrency=data.get("max_concurrency"),
+        )
+
+    # @overrides AutomodEntityBase
+    def to_json(self) -> Any:
+        # Put dependencies back onto their respective actions, as they were given.
+        data = super().to_json()
+        raw_actions = {}
+        for name, action in self.actions.items():
+            raw_action = action.to_json()
+            if dependencies := self.depends_on.get(name):
+                raw_action["depends_on"] = list(dependencies)
+            raw_actions[name] = raw_action
+        data["actions"] = raw_actions
+        del data["depends_on"]
+        return data
+
+    # @overrides AutomodActionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_cost(self.cost)
+        analysis.analyze_entities(self.actions.values())
+
+    async def apply(self, event: AutomodEvent):
+        semaphore = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def apply_action(name: str):
+            # Wait for dependencies first; if any of them failed, so does this.
+            for dependency in self.depends_on.get(name, ()):
+                await tasks[dependency]
+            action = self.actions[name]
+            if semaphore is None:
+                await action.apply(event)
+            else:
+                async with semaphore:
+                    await action.apply(event)
+
+        # Create tasks in dependency order, so that every dependency exists in time.
+        for name in sort_action_graph(self.depends_on):
+            tasks[name] = create_metered_task(apply_action(name))
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        # Report the first error that actually originated from an action, rather than
+        # from a dependency failing.
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            raise errors[0]
+
+
+def create_action(data: JsonObject) -> AutomodAction:
+    return Parallel.from_data(data)
@@ -11,6 +11,8 @@ class RemoveAllReactions(AutomodActionBase):
     Remove all reactions from the message in context.
     """
 
+    requests = 1
+
     async def apply(self, event: AutomodEvent):
         if message := event.message:
             await message.clear_reactions()
@@ -19,6 +19,10 @@ class RemoveReactions(AutomodActionBase):
 
     reactions: Tuple[str]
 
+    # @overrides AutomodActionBase
+    def get_requests(self) -> int:
+        return len(self.reactions)
+
     async def apply(self, event: AutomodEvent):
         if message := event.message:
             for reaction in self.reactions:
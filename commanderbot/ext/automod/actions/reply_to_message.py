@@ -22,6 +22,8 @@ class ReplyToMessage(AutomodActionBase):
         "everyone" mentions will be suppressed.
     """
 
+    requests = 1
+
     content: str
     allowed_mentions: Optional[AllowedMentions] = None
 
@@ -0,0 +1,147 @@
+import json
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional, Type, TypeVar
+
+from discord import Member, TextChannel, Thread
+
+from commanderbot.ext.automod.automod_action import AutomodAction, AutomodActionBase
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_join_burst_responder import JoinBurstOperation
+from commanderbot.lib import ChannelID, JsonObject, ResponsiveException, RoleID
+from commanderbot.lib.json import to_data
+from commanderbot.lib.utils import timedelta_from_field_optional
+
+ST = TypeVar("ST")
+
+
+RESPONSES = ("timeout", "kick", "ban", "add_roles")
+
+
+@dataclass
+class RespondToJoinBurst(AutomodActionBase):
+    """
+    Flag the member in context to be dealt with as part of a batched response.
+
+    Instead of acting on each member right away, members are collected for as long as
+    the rule keeps flagging them, and acted on by a small pool of workers. A single
+    summary is sent once the response wraps up, instead of one message per member.
+
+    Attributes
+    ----------
+    response
+        What to do to each member: one of `timeout`, `kick`, `ban`, or `add_roles`.
+    duration
+        How long to time members out for, if timing them out.
+    roles
+        The roles to add to members, if adding roles.
+    reason
+        The reason to give for the audit log.
+    recent
+        If specified, also flag members who joined within this long before the burst
+        was noticed, since they were likely part of it too.
+    account_age
+        If specified, only flag recent members whose accounts are younger than this.
+        Has no effect on the member in context, which the rule's conditions are for.
+    summary_channel
+        The channel to send the summary to, if any.
+    """
+
+    requests = 1
+
+    response: str
+    duration: Optional[timedelta] = None
+    roles: Optional[List[RoleID]] = None
+    reason: Optional[str] = None
+    recent: Optional[timedelta] = None
+    account_age: Optional[timedelta] = None
+    summary_channel: Optional[ChannelID] = None
+
+    @classmethod
+    def from_data(cls: Type[ST], data: JsonObject) -> ST:
+        response = data["response"]
+        if response not in RESPONSES:
+            raise ResponsiveException(
+                f"Unknown join burst response `{response}`, expected one of: "
+                + ", ".join(f"`{r}`" for r in RESPONSES)
+            )
+        duration = timedelta_from_field_optional(data, "duration")
+        if (response == "timeout") and (duration is None):
+            raise ResponsiveException("Timing members out requires a `duration`")
+        if (response == "add_roles") and not data.get("roles"):
+            raise ResponsiveException("Adding roles to members requires `roles`")
+        return cls(
+            description=data.get("description"),
+            response=response,
+            duration=duration,
+            roles=data.get("roles"),
+            reason=data.get("reason"),
+            recent=timedelta_from_field_optional(data, "recent"),
+            account_age=timedelta_from_field_optional(data, "account_age"),
+            summary_channel=data.get("summary_channel"),
+        )
+
+    def get_response_key(self) -> str:
+        # Identical responses (even across rules) are batched together.
+        if (key := self.__dict__.get("_response_key")) is None:
+            key = json.dumps(to_data(self), sort_keys=True)
+            self.__dict__["_response_key"] = key
+        return key
+
+    def get_title(self) -> str:
+        return self.description or self.response
+
+    def make_operation(self) -> JoinBurstOperation:
+        async def operation(member: Member):
+            if self.response == "timeout":
+                await member.timeout(self.duration, reason=self.reason)
+            elif self.response == "kick":
+                await member.kick(reason=self.reason)
+            elif self.response == "ban":
+                await member.ban(reason=self.reason, delete_message_days=0)
+            elif self.response == "add_roles":
+                roles = [member.guild.get_role(role_id) for role_id in self.roles or []]
+                await member.add_roles(*(r for r in roles if r), reason=self.reason)
+
+        return operation
+
+    def resolve_summary_channel(
+        self, event: AutomodEvent
+    ) -> Optional[TextChannel | Thread]:
+        if self.summary_channel is None:
+            return None
+        channel = event.bot.get_channel(self.summary_channel)
+        if isinstance(channel, TextChannel | Thread):
+            return channel
+        return None
+
+    def get_members(self, event: AutomodEvent, member: Member) -> List[Member]:
+        members = [member]
+        if (self.recent is not None) and (event.services is not None):
+            burst = event.services.joins.recent(
+                member.guild, self.recent, self.account_age
+            )
+            for join in burst.joins:
+                if recent_member := member.guild.get_member(join.member_id):
+                    members.append(recent_member)
+        return members
+
+    async def apply(self, event: AutomodEvent):
+        member = event.member
+        if (member is None) or (event.services is None):
+            return
+        key = self.get_response_key()
+        operation = self.make_operation()
+        summary_channel = self.resolve_summary_channel(event)
+        for flagged_member in self.get_members(event, member):
+            event.services.join_bursts.flag(
+                key,
+                flagged_member,
+                title=self.get_title(),
+                operation=operation,
+                summary_channel=summary_channel,
+            )
+
+
+def create_action(data: JsonObject) -> AutomodAction:
+    return RespondToJoinBurst.from_data(data)
@@ -30,6 +30,8 @@ class SendMessage(AutomodActionBase):
         The amount of time to delete the message after, if at all.
     """
 
+    requests = 1
+
     content: str
     channel: Optional[ChannelID] = None
     allowed_mentions: Optional[AllowedMentions] = None
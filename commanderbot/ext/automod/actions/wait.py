@@ -1,10 +1,11 @@
 import asyncio
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Type, TypeVar
+from typing import Optional, Type, TypeVar
 
 from commanderbot.ext.automod.automod_action import AutomodAction, AutomodActionBase
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.lib import JsonObject
 from commanderbot.lib.utils import timedelta_from_field_optional
 
@@ -16,6 +17,10 @@ class Wait(AutomodActionBase):
     """
     Wait a certain amount of time before continuing.
 
+    When used directly within a rule, the rest of the rule is deferred and resumed
+    later by the scheduler, without holding onto the event in the meantime. Otherwise
+    (e.g. when nested within another action) this simply sleeps.
+
     Attributes
     ----------
     delay
@@ -32,6 +37,13 @@ class Wait(AutomodActionBase):
             delay=delay,
         )
 
+    def get_deferral(self) -> Optional[timedelta]:
+        return self.delay
+
+    # @overrides AutomodActionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_deferral(self, self.delay)
+
     async def apply(self, event: AutomodEvent):
         await asyncio.sleep(self.delay.total_seconds())
 
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Optional, Protocol
+from datetime import timedelta
+from typing import Any, ClassVar, Iterable, List, Optional, Protocol
 
 from commanderbot.ext.automod import actions
 from commanderbot.ext.automod.automod_entity import (
@@ -8,6 +9,10 @@ from commanderbot.ext.automod.automod_entity import (
     deserialize_entities,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import (
+    REQUEST_COST,
+    AutomodRuleAnalysis,
+)
 
 
 class AutomodAction(AutomodEntity, Protocol):
@@ -16,6 +21,9 @@ class AutomodAction(AutomodEntity, Protocol):
     async def apply(self, event: AutomodEvent):
         """Apply the action."""
 
+    def get_deferral(self) -> Optional[timedelta]:
+        """Return how long to defer the rest of the rule by, if at all."""
+
 
 # @implements AutomodAction
 @dataclass
@@ -32,11 +40,33 @@ class AutomodActionBase(AutomodEntityBase):
     default_module_prefix = actions.__name__
     module_function_name = "create_action"
 
+    # The number of Discord API requests the action makes when applied.
+    requests: ClassVar[int] = 0
+
     description: Optional[str]
 
     async def apply(self, event: AutomodEvent):
         """Override this to apply the action."""
 
+    def get_deferral(self) -> Optional[timedelta]:
+        """Override this if the action does nothing but delay subsequent actions."""
+        return None
+
+    def get_requests(self) -> int:
+        """Override this if the number of requests depends on the configuration."""
+        return self.requests
+
+    # @overrides AutomodEntityBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        requests = self.get_requests()
+        analysis.add_cost(self.cost + requests * REQUEST_COST)
+        if requests and analysis.frequent and not analysis.conditional:
+            analysis.warn(
+                self,
+                f"Makes {requests} API request(s) for every event, without any"
+                + " conditions to narrow it down",
+            )
+
 
 def deserialize_actions(data: Iterable[Any]) -> List[AutomodAction]:
     return deserialize_entities(
@@ -0,0 +1,108 @@
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Tuple
+
+from discord import Asset, Member, User
+
+from commanderbot.lib import ResponsiveException
+from commanderbot.lib.utils import member_role_ids
+
+# Maps the name of each attribute that changed to its value before and after.
+AttributeChanges = Dict[str, Tuple[Any, Any]]
+
+# The attributes of members that updates are checked for changes to, and how to get them.
+MEMBER_ATTRIBUTES: Dict[str, Callable[[Member], Any]] = {
+    "nick": lambda member: member.nick,
+    "roles": member_role_ids,
+    "avatar": lambda member: member.guild_avatar,
+    "timeout": lambda member: member.timed_out_until,
+    "pending": lambda member: member.pending,
+    "premium_since": lambda member: member.premium_since,
+    # Only available from discord.py 2.2 onwards.
+    "flags": lambda member: (
+        flags.value if (flags := getattr(member, "flags", None)) is not None else None
+    ),
+}
+
+# The attributes of users that updates are checked for changes to, and how to get them.
+USER_ATTRIBUTES: Dict[str, Callable[[User], Any]] = {
+    "name": lambda user: user.name,
+    "discriminator": lambda user: user.discriminator,
+    # Only available from discord.py 2.3 onwards.
+    "global_name": lambda user: getattr(user, "global_name", None),
+    "avatar": lambda user: user.avatar,
+}
+
+
+class AttributesNotAList(ResponsiveException):
+    def __init__(self, data: Any):
+        super().__init__(f"Expected a list of attribute names, but got: `{data!r}`")
+
+
+class UnknownAttributes(ResponsiveException):
+    def __init__(self, names: Iterable[str], known: Iterable[str]):
+        super().__init__(
+            "Unknown attributes: "
+            + " ".join(f"`{name}`" for name in names)
+            + ". Expected any of: "
+            + " ".join(f"`{name}`" for name in known)
+        )
+
+
+def _diff(
+    attributes: Dict[str, Callable[[Any], Any]], before: Any, after: Any
+) -> AttributeChanges:
+    changes: AttributeChanges = {}
+    for name, get_value in attributes.items():
+        before_value = get_value(before)
+        after_value = get_value(after)
+        if before_value != after_value:
+            changes[name] = (before_value, after_value)
+    return changes
+
+
+def diff_members(before: Member, after: Member) -> AttributeChanges:
+    """Return the member attributes that changed between two versions of a member."""
+    return _diff(MEMBER_ATTRIBUTES, before, after)
+
+
+def diff_users(before: User, after: User) -> AttributeChanges:
+    """Return the user attributes that changed between two versions of a user."""
+    return _diff(USER_ATTRIBUTES, before, after)
+
+
+def parse_attributes(
+    data: Any, attributes: Dict[str, Callable[[Any], Any]]
+) -> FrozenSet[str]:
+    """Parse a list of attribute names, making sure they're all known."""
+    # Strings are iterable too, but they'd be picked apart into single characters.
+    if not isinstance(data, list):
+        raise AttributesNotAList(data)
+    names = frozenset(data)
+    if unknown := names.difference(attributes):
+        raise UnknownAttributes(sorted(unknown), attributes)
+    return names
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, Asset):
+        return value.url
+    return str(value)
+
+
+def yield_change_fields(changes: AttributeChanges) -> Iterable[Tuple[str, Any]]:
+    """
+    Turn changes into event fields.
+
+    The names of all changed attributes are given as `changed`, separated by spaces,
+    and each changed attribute is given as `<name>_before` and `<name>_after`. Roles are
+    instead given as `roles_added` and `roles_removed`, as role mentions.
+    """
+    yield "changed", " ".join(changes)
+    for name, (before, after) in changes.items():
+        if name == "roles":
+            yield "roles_added", " ".join(f"<@&{i}>" for i in after - before)
+            yield "roles_removed", " ".join(f"<@&{i}>" for i in before - after)
+        else:
+            yield f"{name}_before", _format_value(before)
+            yield f"{name}_after", _format_value(after)
@@ -1,11 +1,12 @@
 from datetime import datetime
-from typing import Optional, cast
+from typing import Literal, Optional, cast
 
 from discord import (
     Color,
     Guild,
     Member,
     Message,
+    RawBulkMessageDeleteEvent,
     RawMessageDeleteEvent,
     RawMessageUpdateEvent,
     RawReactionActionEvent,
@@ -19,16 +20,37 @@ from discord import (
 from discord.abc import GuildChannel
 from discord.ext import commands
 from discord.ext.commands import Bot, Cog, Context
-
+from discord.ext.tasks import loop
+
+from commanderbot.ext.automod.automod_action import AutomodActionBase
+from commanderbot.ext.automod.automod_changes import diff_members, diff_users
+from commanderbot.ext.automod.automod_condition import AutomodConditionBase
+from commanderbot.ext.automod.automod_content_analyzer import AutomodContentAnalyzer
+from commanderbot.ext.automod.automod_content_extractor import AutomodContentExtractor
+from commanderbot.ext.automod.automod_continuation import AutomodContinuation
 from commanderbot.ext.automod.automod_data import AutomodData
+from commanderbot.ext.automod.automod_evaluation_history import AutomodEvaluationHistory
+from commanderbot.ext.automod.automod_fair_scheduler import AutomodFairScheduler
 from commanderbot.ext.automod.automod_guild_state import AutomodGuildState
+from commanderbot.ext.automod.automod_history_cache import AutomodHistoryCache
+from commanderbot.ext.automod.automod_join_burst_responder import (
+    AutomodJoinBurstResponder,
+)
 from commanderbot.ext.automod.automod_json_store import AutomodJsonStore
+from commanderbot.ext.automod.automod_log_digest import AutomodLogDigest
+from commanderbot.ext.automod.automod_message_cache import AutomodMessageCache
+from commanderbot.ext.automod.automod_metrics import AutomodMetrics
 from commanderbot.ext.automod.automod_options import AutomodOptions
+from commanderbot.ext.automod.automod_scheduler import AutomodScheduler
+from commanderbot.ext.automod.automod_services import AutomodServices
 from commanderbot.ext.automod.automod_state import AutomodState
 from commanderbot.ext.automod.automod_store import AutomodStore
+from commanderbot.ext.automod.automod_trigger import AutomodTriggerBase
+from commanderbot.ext.automod.utils import module_function_registry
 from commanderbot.lib import (
     CogGuildStateManager,
     GuildContext,
+    GuildID,
     InMemoryDatabaseOptions,
     JsonFileDatabaseAdapter,
     JsonFileDatabaseOptions,
@@ -41,7 +63,18 @@ from commanderbot.lib import (
 from commanderbot.lib.utils import is_bot, parse_json_path, parse_json_path_op
 
 
-def make_automod_store(bot: Bot, cog: Cog, options: AutomodOptions) -> AutomodStore:
+def preload_automod_entities():
+    # Import every built-in trigger, condition, and action (and by extension, every
+    # event) up front, so that loading rules never has to stop and import anything.
+    for entity_type in (AutomodTriggerBase, AutomodConditionBase, AutomodActionBase):
+        module_function_registry.load_package(
+            entity_type.default_module_prefix, entity_type.module_function_name
+        )
+
+
+def make_automod_store(
+    bot: Bot, cog: Cog, options: AutomodOptions, metrics: AutomodMetrics
+) -> AutomodStore:
     db_options = options.database
     if isinstance(db_options, InMemoryDatabaseOptions):
         return AutomodData()
@@ -54,6 +87,7 @@ def make_automod_store(bot: Bot, cog: Cog, options: AutomodOptions) -> AutomodSt
                 serializer=lambda cache: cache.to_data(),
                 deserializer=AutomodData.from_data,
             ),
+            metrics=metrics,
         )
     raise UnsupportedDatabaseOptions(db_options)
 
@@ -84,13 +118,51 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
         Abstracts the data storage and persistence of this cog.
     state
         Encapsulates the state and logic of this cog, for each guild.
+    scheduler
+        Resumes deferred rules once they are due, across all guilds.
+    services
+        Helpers made available to rules, across all guilds.
+    fair_scheduler
+        Shares time spent evaluating rules fairly between guilds.
     """
 
     def __init__(self, bot: Bot, **options):
         self.bot: Bot = bot
         self.bot = bot
         self.options = AutomodOptions.from_dict(options)
-        self.store: AutomodStore = make_automod_store(bot, self, self.options)
+        preload_automod_entities()
+        metrics = AutomodMetrics(address=self.options.metrics_address)
+        self.store: AutomodStore = make_automod_store(bot, self, self.options, metrics)
+        self.scheduler = AutomodScheduler(resume=self._resume_continuation)
+        self.services = AutomodServices(
+            history=AutomodHistoryCache(
+                size=self.options.history_cache_size,
+                max_channels=self.options.history_cache_channels,
+            ),
+            log_digest=AutomodLogDigest(window=self.options.log_digest_window),
+            join_bursts=AutomodJoinBurstResponder(
+                workers=self.options.join_burst_workers
+            ),
+            evaluations=AutomodEvaluationHistory(
+                size=self.options.evaluation_history_size,
+                spill_path=self.options.evaluation_history_spill,
+            ),
+            analyzer=AutomodContentAnalyzer(
+                workers=self.options.analysis_workers,
+                offload_threshold=self.options.analysis_offload_threshold,
+                timeout=self.options.analysis_timeout,
+            ),
+            content=AutomodContentExtractor(
+                max_attachment_size=self.options.attachment_max_size,
+                cache_ttl=self.options.attachment_cache_ttl,
+            ),
+            metrics=metrics,
+        )
+        self.fair_scheduler = AutomodFairScheduler(
+            window=self.options.guild_time_window,
+            budget=self.options.guild_time_budget,
+            concurrency=self.options.evaluation_concurrency,
+        )
         self.state = AutomodState(
             bot=self.bot,
             cog=self,
@@ -98,12 +170,73 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
                 bot=self.bot,
                 cog=self,
                 factory=lambda guild: AutomodGuildState(
-                    bot=bot, cog=self, guild=guild, store=self.store
+                    bot=bot,
+                    cog=self,
+                    guild=guild,
+                    store=self.store,
+                    scheduler=self.scheduler,
+                    services=self.services,
+                    fair_scheduler=self.fair_scheduler,
+                    message_cache=AutomodMessageCache(
+                        budget=self.options.message_cache_budget
+                    ),
+                    rule_cost_budget=self.options.rule_cost_budget,
                 ),
             ),
             store=self.store,
+            fair_scheduler=self.fair_scheduler,
+        )
+        self._add_metrics_gauges()
+        self.scheduler.start()
+        self.restore_continuations.start()
+
+    async def cog_load(self):
+        await self.services.metrics.start()
+
+    async def cog_unload(self):
+        self.restore_continuations.cancel()
+        self.scheduler.stop()
+        self.services.stop()
+        await self.store.flush()
+        await self.services.metrics.stop()
+
+    def _add_metrics_gauges(self):
+        metrics = self.services.metrics
+        metrics.add_gauge(
+            "automod_evaluation_steps_running",
+            "Evaluation steps currently holding a turn, across all guilds.",
+            lambda: [((), self.fair_scheduler.running)],
+        )
+        metrics.add_gauge(
+            "automod_evaluation_steps_waiting",
+            "Evaluation steps currently waiting for a turn, across all guilds.",
+            lambda: [((), self.fair_scheduler.waiting)],
+        )
+        metrics.add_gauge(
+            "automod_pending_deletions",
+            "Messages waiting to be deleted in batches.",
+            lambda: [((), self.services.deletions.pending)],
+        )
+        metrics.add_gauge(
+            "automod_pending_log_messages",
+            "Log messages waiting to be sent in digests.",
+            lambda: [((), self.services.log_digest.pending)],
         )
 
+    @loop(count=1)
+    async def restore_continuations(self):
+        for guild in self.bot.guilds:
+            await self.state[guild].restore_continuations()
+
+    @restore_continuations.before_loop
+    async def before_restore_continuations(self):
+        await self.bot.wait_until_ready()
+
+    async def _resume_continuation(
+        self, guild_id: GuildID, continuation: AutomodContinuation
+    ):
+        await self.state[guild_id].resume_continuation(continuation)
+
     def _guild_state_for_message(self, message: Message) -> Optional[AutomodGuildState]:
         if isinstance(message.channel, TextChannel | Thread) and (
             not is_bot(self.bot, message.author)
@@ -151,6 +284,17 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
 
     # @@ EVENT LISTENERS
 
+    @Cog.listener()
+    async def on_ready(self):
+        # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_ready
+        # Events may have been missed while disconnected, so history can't be trusted.
+        self.services.history.clear()
+
+    @Cog.listener()
+    async def on_resumed(self):
+        # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_resumed
+        self.services.history.clear()
+
     @Cog.listener()
     async def on_typing(self, channel: MessageableChannel, user: User, when: datetime):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_typing
@@ -164,6 +308,8 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     @Cog.listener()
     async def on_message(self, message: Message):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_message
+        # Keep channel history up-to-date regardless of who the message is from.
+        self.services.history.on_message(message)
         if guild_state := self._guild_state_for_message(message):
             await guild_state.on_message(
                 message=cast(TextMessage, message),
@@ -180,6 +326,7 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     @Cog.listener()
     async def on_message_edit(self, before: Message, after: Message):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_message_edit
+        self.services.history.on_message_edit(after)
         if guild_state := self._guild_state_for_message(after):
             await guild_state.on_message_edit(
                 before=cast(TextMessage, before),
@@ -279,6 +426,8 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     async def on_member_join(self, member: Member):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_member_join
         if guild_state := self._guild_state_for_member(member):
+            # Remember the join before any rules look for bursts of them.
+            self.services.joins.on_member_join(member)
             await guild_state.on_member_join(member)
 
     @Cog.listener()
@@ -291,18 +440,20 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     async def on_member_update(self, before: Member, after: Member):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_member_update
         if guild_state := self._guild_state_for_member(after):
-            await guild_state.on_member_update(before, after)
+            changes = diff_members(before, after)
+            await guild_state.on_member_update(before, after, changes)
 
     @Cog.listener()
     async def on_user_update(self, before: User, after: User):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_user_update
         # Go through every guild we can see, and check if the user is a member there.
         # For every guild the user is a member of, run the event handler.
+        changes = diff_users(before, after)
         for guild in self.bot.guilds:
             guild: Guild
             if member := guild.get_member(after.id):
                 if guild_state := self._guild_state_for_member(member):
-                    await guild_state.on_user_update(before, after, member)
+                    await guild_state.on_user_update(before, after, member, changes)
 
     @Cog.listener()
     async def on_member_ban(self, guild: Guild, user: User):
@@ -321,15 +472,32 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     @Cog.listener()
     async def on_raw_message_edit(self, payload: RawMessageUpdateEvent):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_raw_message_edit
+        self.services.history.on_raw_message_edit(
+            channel_id=payload.channel_id,
+            message_id=payload.message_id,
+            is_cached=payload.cached_message is not None,
+        )
         if (guild_id := payload.guild_id) is not None:
             await self.state[guild_id].on_raw_message_edit(payload)
 
     @Cog.listener()
     async def on_raw_message_delete(self, payload: RawMessageDeleteEvent):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_raw_message_delete
+        self.services.history.on_raw_message_delete(
+            channel_id=payload.channel_id,
+            message_id=payload.message_id,
+        )
         if (guild_id := payload.guild_id) is not None:
             await self.state[guild_id].on_raw_message_delete(payload)
 
+    @Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: RawBulkMessageDeleteEvent):
+        # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_raw_bulk_message_delete
+        self.services.history.on_raw_bulk_message_delete(
+            channel_id=payload.channel_id,
+            message_ids=payload.message_ids,
+        )
+
     @Cog.listener()
     async def on_raw_reaction_add(self, payload: RawReactionActionEvent):
         # https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_raw_reaction_add
@@ -361,6 +529,50 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
         if not ctx.invoked_subcommand:
             await ctx.send_help(self.cmd_automod)
 
+    # @@ automod usage
+
+    # NOTE Usage spans all guilds, so only bot owners get to see it.
+
+    @cmd_automod.command(
+        name="usage",
+        brief="Show how much time each guild spends evaluating rules.",
+    )
+    @checks.is_owner()
+    async def cmd_automod_usage(self, ctx: GuildContext):
+        await self.state.show_usage(ctx)
+
+    # @@ automod history
+
+    @cmd_automod.command(
+        name="history",
+        brief="Show recent rule evaluations.",
+        usage="[rule] [limit]",
+    )
+    async def cmd_automod_history(
+        self,
+        ctx: GuildContext,
+        rule: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        await self.state[ctx.guild].show_history(ctx, rule, limit)
+
+    # @@ automod shadow
+
+    @cmd_automod.group(
+        name="shadow",
+        brief="See how shadow rules would have done.",
+    )
+    async def cmd_automod_shadow(self, ctx: GuildContext):
+        if not ctx.invoked_subcommand:
+            await ctx.send_help(self.cmd_automod_shadow)
+
+    @cmd_automod_shadow.command(
+        name="report",
+        brief="Show how often shadow rules would have fired, and what they cost.",
+    )
+    async def cmd_automod_shadow_report(self, ctx: GuildContext):
+        await self.state[ctx.guild].show_shadow_report(ctx)
+
     # @@ automod options
 
     @cmd_automod.group(
@@ -492,8 +704,37 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
         name="add",
         brief="Add a new automod rule.",
     )
-    async def cmd_automod_rules_add(self, ctx: GuildContext, *, body: str):
-        await self.state[ctx.guild].add_rule(ctx, body)
+    async def cmd_automod_rules_add(
+        self,
+        ctx: GuildContext,
+        force: Optional[Literal["--force"]],
+        *,
+        body: str,
+    ):
+        await self.state[ctx.guild].add_rule(ctx, body, force=bool(force))
+
+    @cmd_automod_rules.command(
+        name="import",
+        brief="Import automod rules from an attached file.",
+    )
+    async def cmd_automod_rules_import(
+        self,
+        ctx: GuildContext,
+        force: Optional[Literal["--force"]],
+        replace: Optional[Literal["--replace"]],
+        *,
+        body: Optional[str] = None,
+    ):
+        await self.state[ctx.guild].import_rules(
+            ctx, body, force=bool(force), replace=bool(replace)
+        )
+
+    @cmd_automod_rules.command(
+        name="export",
+        brief="Export all automod rules as a file.",
+    )
+    async def cmd_automod_rules_export(self, ctx: GuildContext):
+        await self.state[ctx.guild].export_rules(ctx)
 
     @cmd_automod_rules.command(
         name="remove",
@@ -509,6 +750,7 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     async def cmd_automod_rules_modify(
         self,
         ctx: GuildContext,
+        force: Optional[Literal["--force"]],
         name: str,
         path: str,
         op: str,
@@ -517,7 +759,9 @@ class AutomodCog(Cog, name="commanderbot.ext.automod"):
     ):
         parsed_path = parse_json_path(path)
         parsed_op = parse_json_path_op(op)
-        await self.state[ctx.guild].modify_rule(ctx, name, parsed_path, parsed_op, body)
+        await self.state[ctx.guild].modify_rule(
+            ctx, name, parsed_path, parsed_op, body, force=bool(force)
+        )
 
     @cmd_automod_rules.command(
         name="enable",
@@ -1,5 +1,8 @@
+import asyncio
+import json
 from dataclasses import dataclass
-from typing import Any, Iterable, List, Optional, Protocol
+from datetime import timedelta
+from typing import Any, ClassVar, Iterable, List, Optional, Protocol
 
 from commanderbot.ext.automod import conditions
 from commanderbot.ext.automod.automod_entity import (
@@ -8,6 +11,8 @@ from commanderbot.ext.automod.automod_entity import (
     deserialize_entities,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.lib.json import to_data
 
 
 class AutomodCondition(AutomodEntity, Protocol):
@@ -16,6 +21,15 @@ class AutomodCondition(AutomodEntity, Protocol):
     async def check(self, event: AutomodEvent) -> bool:
         """Check whether the condition passes."""
 
+    def get_deferral(self) -> Optional[timedelta]:
+        """Return how long to defer the rest of the rule by, if at all."""
+
+    def is_pure(self) -> bool:
+        """Return whether the result depends on nothing but the event itself."""
+
+    def get_structural_key(self) -> str:
+        """Return a key that is identical for identically-configured conditions."""
+
 
 # @implements AutomodCondition
 @dataclass
@@ -32,12 +46,51 @@ class AutomodConditionBase(AutomodEntityBase):
     default_module_prefix = conditions.__name__
     module_function_name = "create_condition"
 
+    # Set this on conditions whose result depends on nothing but the event, and which
+    # have no side-effects other than attaching metadata to the event. The results of
+    # pure conditions are shared between identical conditions checking the same event.
+    pure: ClassVar[bool] = False
+
     description: Optional[str]
 
     async def check(self, event: AutomodEvent) -> bool:
         """Override this to check whether the condition passes."""
         return False
 
+    def get_deferral(self) -> Optional[timedelta]:
+        """Override this if the condition does nothing but delay subsequent logic."""
+        return None
+
+    def is_pure(self) -> bool:
+        return self.pure
+
+    def get_structural_key(self) -> str:
+        # Conditions are treated as immutable once created, so compute this only once.
+        if (key := self.__dict__.get("_structural_key")) is None:
+            data = to_data(self)
+            data.pop("description", None)
+            key = json.dumps(data, sort_keys=True)
+            self.__dict__["_structural_key"] = key
+        return key
+
+
+async def check_condition(condition: AutomodCondition, event: AutomodEvent) -> bool:
+    """
+    Check whether the condition passes for the event.
+
+    The results of pure conditions are cached on the event, so that identical conditions
+    (across any number of rules) are only checked once for the same event.
+    """
+    if not condition.is_pure():
+        return await condition.check(event)
+    key = condition.get_structural_key()
+    task = event.condition_cache.get(key)
+    if task is None:
+        task = create_metered_task(condition.check(event))
+        event.condition_cache[key] = task
+    # Don't let one rule being cancelled cancel the check for everyone else.
+    return await asyncio.shield(task)
+
 
 def deserialize_conditions(data: Iterable[Any]) -> List[AutomodCondition]:
     return deserialize_entities(
@@ -0,0 +1,213 @@
+import asyncio
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import lru_cache
+from logging import Logger, getLogger
+from typing import Iterable, Optional, Sequence, Tuple
+
+from commanderbot.lib import ResponsiveException, SafePattern
+
+# The number of worker processes to analyze content in. Zero disables offloading, in
+# which case all content is analyzed inline on the event loop.
+DEFAULT_ANALYSIS_WORKERS = 0
+
+# The amount of work (roughly: characters of content times number of patterns) below
+# which content is analyzed inline, because handing it to a worker would cost more.
+DEFAULT_ANALYSIS_OFFLOAD_THRESHOLD = 50_000
+
+# How long to wait for a worker process to analyze a payload, in seconds. Patterns are
+# budgeted individually, so this only comes into play if something is badly wrong.
+DEFAULT_ANALYSIS_TIMEOUT = 10.0
+
+# The number of compiled patterns each worker process holds on to.
+WORKER_PATTERN_CACHE_SIZE = 1024
+
+# The source of a pattern, as shipped to worker processes: pattern, flags, and budget.
+PatternSource = Tuple[str, int, float]
+
+
+class ContentAnalysisFailed(ResponsiveException):
+    pass
+
+
+def count_pattern_matches(
+    content: str,
+    patterns: Iterable[SafePattern],
+    search: bool,
+    normalization_form: Optional[str],
+    count: int,
+) -> bool:
+    """
+    Check whether at least `count` of the patterns match the content, inline.
+
+    If a normalization form is given, the content is normalized first.
+    """
+    if normalization_form:
+        content = unicodedata.normalize(normalization_form, content)
+    remainder = count
+    for pattern in patterns:
+        match = pattern.search(content) if search else pattern.match(content)
+        if match:
+            remainder -= 1
+            if remainder <= 0:
+                return True
+    return False
+
+
+@lru_cache(maxsize=WORKER_PATTERN_CACHE_SIZE)
+def _compile_in_worker(source: PatternSource) -> SafePattern:
+    # Each worker compiles a given pattern once, and then keeps it for as long as the
+    # rules using it stay the same (give or take the size of the cache).
+    return SafePattern(*source)
+
+
+def _count_matches_in_worker(
+    content: str,
+    sources: Tuple[PatternSource, ...],
+    search: bool,
+    normalization_form: Optional[str],
+    count: int,
+) -> bool:
+    patterns = (_compile_in_worker(source) for source in sources)
+    return count_pattern_matches(content, patterns, search, normalization_form, count)
+
+
+@dataclass
+class AutomodContentAnalyzer:
+    """
+    Runs CPU-heavy content analysis, offloading large payloads to worker processes.
+
+    Small payloads are always analyzed inline, since sending them to a worker (and
+    getting the result back) costs more than the analysis itself. Larger payloads are
+    sent to a process pool, if enabled, so that they don't hold up the event loop.
+
+    Patterns are sent to workers by source rather than compiled, and each worker
+    compiles a given pattern only once.
+
+    Payloads that were offloaded are never analyzed inline instead, since they're the
+    ones that would hold up the event loop. If the pool breaks (for example, because a
+    worker was killed for using too much memory) the payload is retried once on a fresh
+    pool. If that doesn't work either, or a worker takes too long, the analysis fails.
+
+    Attributes
+    ----------
+    workers
+        The number of worker processes to use. Zero disables offloading.
+    offload_threshold
+        The amount of work (characters of content times number of patterns) from which
+        payloads are offloaded.
+    timeout
+        The number of seconds to wait for a worker to analyze a payload. If a worker
+        takes longer, the pool is started over.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    workers: int = DEFAULT_ANALYSIS_WORKERS
+    offload_threshold: int = DEFAULT_ANALYSIS_OFFLOAD_THRESHOLD
+    timeout: float = DEFAULT_ANALYSIS_TIMEOUT
+
+    log: Logger = field(init=False)
+
+    _pool: Optional[ProcessPoolExecutor] = field(init=False, default=None)
+    _pool_broken: bool = field(init=False, default=False)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    def _should_offload(self, work: int) -> bool:
+        return (self.workers > 0) and (work >= self.offload_threshold)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool_broken:
+            self._retire_pool()
+        # Don't spin up any processes until there's something for them to do.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def count_matches(
+        self,
+        content: str,
+        patterns: Sequence[SafePattern],
+        *,
+        search: bool = False,
+        normalization_form: Optional[str] = None,
+        count: Optional[int] = None,
+    ) -> bool:
+        """
+        Check whether at least `count` of the patterns match the content.
+
+        If `count` is not given, all of the patterns must match. If a normalization
+        form is given, the content is normalized first (as part of the analysis).
+        """
+        needed = count or len(patterns)
+        if not self._should_offload(len(content) * len(patterns)):
+            return count_pattern_matches(
+                content, patterns, search, normalization_form, needed
+            )
+        sources = tuple((p.pattern, p.flags, p.budget) for p in patterns)
+        args = (content, sources, search, normalization_form, needed)
+        try:
+            return await self._count_matches_in_pool(*args)
+        except BrokenProcessPool:
+            # A worker died (for example, it was killed for using too much memory).
+            # Give the payload one more chance on a fresh pool, but no more than that,
+            # in case it's the payload itself that's killing workers.
+            self.log.exception("Content analysis pool broke, retrying on a fresh pool")
+            self._pool_broken = True
+        try:
+            return await self._count_matches_in_pool(*args)
+        except BrokenProcessPool as ex:
+            self._pool_broken = True
+            raise ContentAnalysisFailed(
+                "Content analysis failed because its worker process died"
+            ) from ex
+
+    async def _count_matches_in_pool(
+        self,
+        content: str,
+        sources: Tuple[PatternSource, ...],
+        search: bool,
+        normalization_form: Optional[str],
+        count: int,
+    ) -> bool:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_pool(),
+            _count_matches_in_worker,
+            content,
+            sources,
+            search,
+            normalization_form,
+            count,
+        )
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError as ex:
+            # The worker is stuck, so don't let it hold up anything else.
+            self._pool_broken = True
+            raise ContentAnalysisFailed(
+                f"Content analysis took longer than {self.timeout:g} seconds"
+            ) from ex
+
+    def _retire_pool(self):
+        pool, self._pool = self._pool, None
+        self._pool_broken = False
+        if pool is None:
+            return
+        # Stuck workers can be stopped outright from Python 3.14 onwards. Before that,
+        # they're left to finish on their own, which they will once their patterns run
+        # out of budget; either way, new payloads go to a fresh pool in the meantime.
+        if sys.version_info >= (3, 14):
+            pool.terminate_workers()  # type: ignore
+        else:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
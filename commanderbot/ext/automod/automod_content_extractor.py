@@ -0,0 +1,235 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import Iterable, List, Optional, Tuple
+
+import aiohttp
+from discord import Attachment, Embed
+
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.lib import TextMessage
+
+# The largest attachment to read the text of, in bytes. Anything larger is skipped
+# without being downloaded at all.
+DEFAULT_ATTACHMENT_MAX_SIZE = 64_000
+
+# How long to remember the text of an attachment for, in seconds.
+DEFAULT_ATTACHMENT_CACHE_TTL = 600.0
+
+# The maximum number of attachments to remember the text of.
+ATTACHMENT_CACHE_SIZE = 1000
+
+# The maximum number of attachments to read per message.
+MAX_ATTACHMENTS_PER_MESSAGE = 5
+
+# How long to wait for an attachment to download, in seconds.
+ATTACHMENT_FETCH_TIMEOUT = 10.0
+
+# Attachments are considered text if they either say so or look like it.
+TEXT_ATTACHMENT_EXTENSIONS = (
+    ".txt",
+    ".md",
+    ".log",
+    ".csv",
+    ".json",
+    ".yaml",
+    ".yml",
+)
+
+# Extracted content is remembered on the event under this prefix, so that every rule
+# looking at the same event shares it.
+CONTENT_CACHE_PREFIX = "content:"
+
+
+def is_text_attachment(attachment: Attachment) -> bool:
+    content_type = attachment.content_type or ""
+    if content_type.startswith("text/"):
+        return True
+    return attachment.filename.lower().endswith(TEXT_ATTACHMENT_EXTENSIONS)
+
+
+def yield_embed_text(embed: Embed) -> Iterable[str]:
+    if embed.author and embed.author.name:
+        yield embed.author.name
+    if embed.title:
+        yield embed.title
+    if embed.description:
+        yield embed.description
+    for embed_field in embed.fields:
+        if embed_field.name:
+            yield embed_field.name
+        if embed_field.value:
+            yield embed_field.value
+    if embed.footer and embed.footer.text:
+        yield embed.footer.text
+
+
+@dataclass
+class AutomodContentExtractor:
+    """
+    Extracts the text of messages, including their embeds and small text attachments.
+
+    Extracted content is remembered on the event, so that any number of rules can look
+    at the same event for the cost of a single extraction. The text of attachments is
+    also remembered across events, by attachment ID, so that the same attachment is
+    only ever downloaded once while it's remembered.
+
+    Attachments are only downloaded if they look like text and aren't larger than the
+    maximum size. They are streamed, and cut off at the maximum size regardless of what
+    size they claim to be.
+
+    Attributes
+    ----------
+    max_attachment_size
+        The largest attachment to read the text of, in bytes.
+    cache_ttl
+        How long to remember the text of an attachment for, in seconds.
+    cache_size
+        The maximum number of attachments to remember the text of.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    max_attachment_size: int = DEFAULT_ATTACHMENT_MAX_SIZE
+    cache_ttl: float = DEFAULT_ATTACHMENT_CACHE_TTL
+    cache_size: int = ATTACHMENT_CACHE_SIZE
+
+    log: Logger = field(init=False)
+
+    # Maps attachment IDs to when they expire, and their (eventual) text.
+    _attachments: "OrderedDict[int, Tuple[float, asyncio.Future[Optional[str]]]]" = (
+        field(init=False, default_factory=OrderedDict)
+    )
+    _session: Optional[aiohttp.ClientSession] = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if (self._session is None) or self._session.closed:
+            timeout = aiohttp.ClientTimeout(total=ATTACHMENT_FETCH_TIMEOUT)
+            self._session = aiohttp.ClientSession(timeout=timeout)
+        return self._session
+
+    async def _fetch(self, attachment: Attachment) -> Optional[str]:
+        chunks: List[bytes] = []
+        remaining = self.max_attachment_size
+        try:
+            async with self._get_session().get(attachment.url) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(8192):
+                    chunks.append(chunk[:remaining])
+                    remaining -= len(chunk)
+                    if remaining <= 0:
+                        break
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.log.exception(f"Failed to fetch attachment: {attachment.id}")
+            return None
+        return b"".join(chunks).decode("utf-8", errors="replace")
+
+    def _forget_failure(
+        self, attachment_id: int, entry: Tuple[float, asyncio.Future[Optional[str]]]
+    ):
+        # Don't remember failures, so that the next read gets to try again. Only forget
+        # this particular entry though, in case it has already been replaced.
+        task = entry[1]
+        if (
+            task.cancelled()
+            or (task.exception() is not None)
+            or (task.result() is None)
+        ):
+            if self._attachments.get(attachment_id) is entry:
+                del self._attachments[attachment_id]
+
+    def _expire(self, now: float):
+        while self._attachments:
+            attachment_id, (expires_at, _) = next(iter(self._attachments.items()))
+            if (expires_at > now) and (len(self._attachments) <= self.cache_size):
+                break
+            del self._attachments[attachment_id]
+
+    async def read_attachment(self, attachment: Attachment) -> Optional[str]:
+        """
+        Return the text of the attachment, if it's a small enough text attachment.
+
+        Concurrent reads of the same attachment share a single download.
+        """
+        if not is_text_attachment(attachment):
+            return None
+        if attachment.size > self.max_attachment_size:
+            return None
+        now = asyncio.get_running_loop().time()
+        self._expire(now)
+        if cached := self._attachments.get(attachment.id):
+            return await asyncio.shield(cached[1])
+        task = create_metered_task(self._fetch(attachment))
+        entry = (now + self.cache_ttl, task)
+        self._attachments[attachment.id] = entry
+        task.add_done_callback(lambda _: self._forget_failure(attachment.id, entry))
+        return await asyncio.shield(task)
+
+    async def _extract(
+        self, message: TextMessage, embeds: bool, attachments: bool
+    ) -> str:
+        parts: List[str] = []
+        if message.content:
+            parts.append(message.content)
+        if embeds:
+            for embed in message.embeds:
+                parts.extend(yield_embed_text(embed))
+        if attachments:
+            texts = await asyncio.gather(
+                *(
+                    self.read_attachment(attachment)
+                    for attachment in message.attachments[:MAX_ATTACHMENTS_PER_MESSAGE]
+                )
+            )
+            parts.extend(text for text in texts if text)
+        return "\n".join(parts)
+
+    async def extract(
+        self,
+        event: AutomodEvent,
+        message: TextMessage,
+        *,
+        embeds: bool = False,
+        attachments: bool = False,
+    ) -> str:
+        """Return the text of the message, including its embeds or attachments."""
+        key = f"{CONTENT_CACHE_PREFIX}{int(embeds)}{int(attachments)}"
+        task = event.condition_cache.get(key)
+        if task is None:
+            task = create_metered_task(self._extract(message, embeds, attachments))
+            event.condition_cache[key] = task
+        # Don't let one rule being cancelled cancel the extraction for everyone else.
+        return await asyncio.shield(task)
+
+    def stop(self):
+        if (self._session is not None) and not self._session.closed:
+            try:
+                asyncio.get_running_loop().create_task(self._session.close())
+            except RuntimeError:
+                pass
+        self._session = None
+        self._attachments.clear()
+
+
+async def extract_message_content(
+    event: AutomodEvent, embeds: bool = False, attachments: bool = False
+) -> str:
+    """
+    Return the text of the event's message, if any.
+
+    The text of embeds and attachments is only included if asked for, and if the event
+    has access to a content extractor.
+    """
+    message = event.message
+    if message is None:
+        return ""
+    if not (embeds or attachments) or (event.services is None):
+        return str(message.content or "")
+    return await event.services.content.extract(
+        event, message, embeds=embeds, attachments=attachments
+    )
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from logging import Logger
+from typing import Any, Dict, List, Optional, cast
+
+from discord import Guild, HTTPException, Member, TextChannel, Thread, User
+from discord.ext.commands import Bot
+
+from commanderbot.ext.automod.automod_event import AutomodEvent, AutomodEventBase
+from commanderbot.lib import (
+    FromDataMixin,
+    JsonObject,
+    JsonSerializable,
+    TextMessage,
+    ValueFormatter,
+)
+from commanderbot.lib.utils import datetime_from_field
+
+# The stages of a rule that may be deferred and later resumed.
+CONDITIONS = "conditions"
+ACTIONS = "actions"
+
+
+def snapshot_event(event: AutomodEvent) -> JsonObject:
+    """
+    Capture just enough of an event to be able to resume it later.
+
+    Library objects are reduced to their IDs and re-resolved upon resuming, and the
+    safe fields are kept as-is so that they can still be used for formatting even if
+    the underlying objects no longer exist.
+    """
+    fields: Dict[str, Any] = {}
+    formatted_fields: List[str] = []
+    for key, value in event.get_fields().items():
+        if isinstance(value, ValueFormatter):
+            value = str(value)
+            formatted_fields.append(key)
+        fields[key] = value
+    return dict(
+        channel_id=event.channel.id if event.channel else None,
+        message_id=event.message.id if event.message else None,
+        author_id=event.author.id if event.author else None,
+        actor_id=event.actor.id if event.actor else None,
+        member_id=event.member.id if event.member else None,
+        user_id=event.user.id if event.user else None,
+        fields=fields,
+        formatted_fields=formatted_fields,
+    )
+
+
+# @implements AutomodEvent
+@dataclass
+class ResumedEvent(AutomodEventBase):
+    """An event that was restored from a snapshot, after being deferred."""
+
+    _channel: Optional[TextChannel | Thread]
+    _message: Optional[TextMessage]
+    _author: Optional[Member]
+    _actor: Optional[Member]
+    _member: Optional[Member]
+    _user: Optional[User]
+    _fields: JsonObject
+
+    @property
+    def channel(self) -> Optional[TextChannel | Thread]:
+        return self._channel
+
+    @property
+    def message(self) -> Optional[TextMessage]:
+        return self._message
+
+    @property
+    def author(self) -> Optional[Member]:
+        return self._author
+
+    @property
+    def actor(self) -> Optional[Member]:
+        return self._actor
+
+    @property
+    def member(self) -> Optional[Member]:
+        return self._member
+
+    @property
+    def user(self) -> Optional[User]:
+        return self._user or cast(User, self._member)
+
+    def _get_fields_safe(self) -> Dict[str, Any]:
+        # Fall back to the original fields for anything that no longer resolves.
+        fields = dict(self._fields)
+        fields.update(super()._get_fields_safe())
+        return fields
+
+
+async def restore_event(
+    bot: Bot, log: Logger, guild: Guild, snapshot: JsonObject
+) -> ResumedEvent:
+    """Re-resolve the objects referred to by an event snapshot."""
+    channel = None
+    if (channel_id := snapshot.get("channel_id")) is not None:
+        channel = guild.get_channel_or_thread(channel_id)
+        if not isinstance(channel, TextChannel | Thread):
+            channel = None
+
+    message = None
+    if channel and ((message_id := snapshot.get("message_id")) is not None):
+        try:
+            message = cast(TextMessage, await channel.fetch_message(message_id))
+        except HTTPException:
+            # The message may have been deleted in the meantime.
+            log.debug(f"Unable to fetch message for resumed event: {message_id}")
+
+    def get_member(key: str) -> Optional[Member]:
+        if (member_id := snapshot.get(key)) is not None:
+            return guild.get_member(member_id)
+
+    fields: Dict[str, Any] = dict(snapshot.get("fields", {}))
+    for key in snapshot.get("formatted_fields", []):
+        if key in fields:
+            fields[key] = ValueFormatter(fields[key])
+
+    user = None
+    if (user_id := snapshot.get("user_id")) is not None:
+        user = bot.get_user(user_id)
+
+    return ResumedEvent(
+        bot,
+        log,
+        channel,
+        message,
+        get_member("author_id"),
+        get_member("actor_id"),
+        get_member("member_id"),
+        user,
+        fields,
+    )
+
+
+@dataclass
+class AutomodContinuation(JsonSerializable, FromDataMixin):
+    """
+    The remainder of a rule that has been deferred until a later time.
+
+    Attributes
+    ----------
+    id
+        A unique identifier for the continuation.
+    rule_name
+        The name of the rule to resume.
+    rule_modified_on
+        When the rule was last modified, as of deferring it. If the rule has since been
+        modified, the continuation is discarded instead of being resumed.
+    stage
+        The stage of the rule to resume from; either `conditions` or `actions`.
+    index
+        The index of the condition or action to resume from.
+    due
+        When the rule should be resumed.
+    event
+        A snapshot of the event that the rule was running for.
+    """
+
+    id: str
+    rule_name: str
+    rule_modified_on: datetime
+    stage: str
+    index: int
+    due: datetime
+    event: JsonObject
+
+    @staticmethod
+    def create(
+        rule_name: str,
+        rule_modified_on: datetime,
+        stage: str,
+        index: int,
+        delay: timedelta,
+        event: AutomodEvent,
+    ) -> AutomodContinuation:
+        return AutomodContinuation(
+            id=uuid.uuid4().hex,
+            rule_name=rule_name,
+            rule_modified_on=rule_modified_on,
+            stage=stage,
+            index=index,
+            due=datetime.utcnow() + delay,
+            event=snapshot_event(event),
+        )
+
+    @classmethod
+    def try_from_data(cls, data):
+        if isinstance(data, dict):
+            return cls(
+                id=data["id"],
+                rule_name=data["rule_name"],
+                rule_modified_on=datetime_from_field(data, "rule_modified_on"),
+                stage=data["stage"],
+                index=data["index"],
+                due=datetime_from_field(data, "due"),
+                event=data.get("event", {}),
+            )
+
+    # @implements JsonSerializable
+    def to_json(self) -> Any:
+        return dict(
+            id=self.id,
+            rule_name=self.rule_name,
+            rule_modified_on=self.rule_modified_on.isoformat(),
+            stage=self.stage,
+            index=self.index,
+            due=self.due.isoformat(),
+            event=self.event,
+        )
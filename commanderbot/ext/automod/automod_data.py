@@ -1,14 +1,28 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from datetime import datetime
-from typing import Any, AsyncIterable, DefaultDict, Dict, Iterable, Optional, Set, Type
+from typing import (
+    Any,
+    AsyncIterable,
+    DefaultDict,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
 
 from discord import Guild
 
+from commanderbot.ext.automod.automod_continuation import AutomodContinuation
 from commanderbot.ext.automod.automod_event import AutomodEvent
-from commanderbot.ext.automod.automod_rule import AutomodRule
+from commanderbot.ext.automod.automod_rule import AutomodRule, RuleCheck
+from commanderbot.ext.automod.automod_rule_set import AutomodRuleSet
 from commanderbot.lib import (
     GuildID,
     JsonObject,
@@ -24,8 +38,6 @@ from commanderbot.lib.utils import (
     update_json_with_path,
 )
 
-RulesByEventType = DefaultDict[Type[AutomodEvent], Set[AutomodRule]]
-
 
 class AutomodRuleWithNameAlreadyExists(ResponsiveException):
     def __init__(self, name: str):
@@ -45,6 +57,22 @@ class AutomodRuleNotRegistered(ResponsiveException):
         super().__init__(f"Rule `{rule.name}` is not registered")
 
 
+class AutomodImportFailed(ResponsiveException):
+    # Only list so many errors, so that the response still fits into a message.
+    MAX_LISTED_ERRORS = 20
+
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors: List[Tuple[str, str]] = errors
+        lines = [
+            f"Did not import any rules, because `{len(errors)}` of them had errors:"
+        ]
+        for label, error in errors[: self.MAX_LISTED_ERRORS]:
+            lines.append(f"- `{label}`: {error}")
+        if len(errors) > self.MAX_LISTED_ERRORS:
+            lines.append(f"- ... and `{len(errors) - self.MAX_LISTED_ERRORS}` more")
+        super().__init__("\n".join(lines))
+
+
 class AutomodInvalidFields(ResponsiveException):
     def __init__(self, names: Set[str]):
         self.names: Set[str] = names
@@ -67,12 +95,14 @@ class AutomodGuildData:
     # Roles that are permitted to manage the extension within this guild.
     permitted_roles: Optional[RoleSet] = None
 
-    # Index rules by name for faster look-up in commands.
-    rules: Dict[str, AutomodRule] = field(init=False, default_factory=dict)
+    # An immutable snapshot of all rules, indexed by name and by event type. This is
+    # replaced as a whole whenever rules change, and never modified in-place, so that
+    # events already being dispatched keep a consistent view of the rules.
+    rule_set: AutomodRuleSet = field(init=False, default_factory=AutomodRuleSet.empty)
 
-    # Group rules by event type for faster look-up during event dispatch.
-    rules_by_event_type: RulesByEventType = field(
-        init=False, default_factory=lambda: defaultdict(lambda: set())
+    # Deferred rules waiting to be resumed, indexed by their unique ID.
+    continuations: Dict[str, AutomodContinuation] = field(
+        init=False, default_factory=dict
     )
 
     @staticmethod
@@ -83,16 +113,24 @@ class AutomodGuildData:
             default_log_options=default_log_options,
             permitted_roles=permitted_roles,
         )
+        rules: Dict[str, AutomodRule] = {}
         for rule_data in data.get("rules", []):
             rule = AutomodRule.from_data(rule_data)
-            guild_data.add_rule(rule)
+            if rule.name in rules:
+                raise AutomodRuleWithNameAlreadyExists(rule.name)
+            rules[rule.name] = rule
+        guild_data.rule_set = AutomodRuleSet.build(rules.values())
+        for continuation_data in data.get("continuations", []):
+            continuation = AutomodContinuation.from_data(continuation_data)
+            guild_data.add_continuation(continuation)
         return guild_data
 
     def to_data(self) -> JsonObject:
         return dict_without_ellipsis(
             log=self.default_log_options or ...,
             permitted_roles=self.permitted_roles or ...,
-            rules=list(self.rules.values()) or ...,
+            rules=list(self.rule_set.rules.values()) or ...,
+            continuations=list(self.continuations.values()) or ...,
         )
 
     def set_default_log_options(
@@ -110,77 +148,129 @@ class AutomodGuildData:
         return old_value
 
     def all_rules(self) -> Iterable[AutomodRule]:
-        yield from self.rules.values()
+        yield from self.rule_set.rules.values()
 
     def rules_for_event(self, event: AutomodEvent) -> Iterable[AutomodRule]:
-        event_type = type(event)
+        # Hold onto the current snapshot, in case it's swapped out while iterating.
+        rule_set = self.rule_set
         # Start with the initial set of possible rules, based on the event type.
-        for rule in self.rules_by_event_type[event_type]:
+        for rule in rule_set.rules_for_event_type(type(event)):
             # Yield the rule if the event activates any of its triggers.
             if rule.poll_triggers(event):
                 yield rule
 
+    def has_rules_for_event_type(self, event_type: Type[AutomodEvent]) -> bool:
+        return bool(self.rule_set.rules_for_event_type(event_type))
+
+    def watched_attributes_for_event_type(
+        self, event_type: Type[AutomodEvent]
+    ) -> Optional[FrozenSet[str]]:
+        return self.rule_set.watched_attributes(event_type)
+
     def query_rules(self, query: str) -> Iterable[AutomodRule]:
+        rules = self.rule_set.rules
         # If there's an exact match, yield just that.
-        if rule := self.rules.get(query):
+        if rule := rules.get(query):
             yield rule
         else:
             # Otherwise, yield any rules that match the query.
             query_lower = query.lower()
-            for rule_name, rule in self.rules.items():
+            for rule_name, rule in rules.items():
                 if query_lower in rule_name.lower():
                     yield rule
 
     def get_rule(self, name: str) -> Optional[AutomodRule]:
-        return self.rules.get(name)
+        return self.rule_set.get(name)
 
     def require_rule(self, name: str) -> AutomodRule:
         if rule := self.get_rule(name):
             return rule
         raise AutomodNoRuleWithName(name)
 
-    def _add_rule_to_cache(self, rule: AutomodRule):
-        for trigger in rule.triggers:
-            for event_type in trigger.event_types:
-                self.rules_by_event_type[event_type].add(rule)
-
     def add_rule(self, rule: AutomodRule):
-        if rule.name in self.rules:
+        if rule.name in self.rule_set.rules:
             raise AutomodRuleWithNameAlreadyExists(rule.name)
-        self.rules[rule.name] = rule
-        self._add_rule_to_cache(rule)
+        self.rule_set = self.rule_set.adding(rule)
 
-    def add_rule_from_data(self, data: JsonObject) -> AutomodRule:
+    def add_rule_from_data(
+        self, data: JsonObject, check: Optional[RuleCheck] = None
+    ) -> AutomodRule:
         rule = AutomodRule.from_data(data)
+        if check:
+            check(rule)
         self.add_rule(rule)
         return rule
 
-    def _remove_rule_from_cache(self, rule: AutomodRule):
-        for rules in self.rules_by_event_type.values():
-            if rule in rules:
-                rules.remove(rule)
+    def import_rules_from_data(
+        self,
+        data: Iterable[Any],
+        replace: bool = False,
+        check: Optional[RuleCheck] = None,
+    ) -> List[AutomodRule]:
+        # Validate every rule up front, so that either all of them are imported or none.
+        rules: List[AutomodRule] = []
+        errors: List[Tuple[str, str]] = []
+        names: Set[str] = set()
+        for i, rule_data in enumerate(data):
+            label = f"#{i + 1}"
+            if not isinstance(rule_data, dict):
+                errors.append((label, "Expected a rule, but got something else"))
+                continue
+            label = str(rule_data.get("name", label))
+            try:
+                rule = AutomodRule.from_data(rule_data)
+                if check:
+                    check(rule)
+            except Exception as ex:
+                errors.append((label, str(ex) or type(ex).__name__))
+                continue
+            if rule.name in names:
+                errors.append((label, "The same rule name is used more than once"))
+            elif (not replace) and (rule.name in self.rule_set.rules):
+                errors.append((label, str(AutomodRuleWithNameAlreadyExists(rule.name))))
+            names.add(rule.name)
+            rules.append(rule)
+        if errors:
+            raise AutomodImportFailed(errors)
+
+        # Swap in a whole new rule set at once, instead of one rule at a time.
+        kept_rules = [
+            rule for name, rule in self.rule_set.rules.items() if name not in names
+        ]
+        self.rule_set = AutomodRuleSet.build([*kept_rules, *rules])
+        return rules
 
     def remove_rule(self, rule: AutomodRule):
-        existing_rule = self.rules.get(rule.name)
+        existing_rule = self.rule_set.get(rule.name)
         if not (existing_rule and (existing_rule is rule)):
             raise AutomodRuleNotRegistered(rule)
-        self._remove_rule_from_cache(rule)
-        del self.rules[rule.name]
+        self.rule_set = self.rule_set.removing(rule)
 
     def remove_rule_by_name(self, name: str) -> AutomodRule:
         rule = self.require_rule(name)
         self.remove_rule(rule)
         return rule
 
+    def replace_rule(self, old_rule: AutomodRule, new_rule: AutomodRule):
+        existing_rule = self.rule_set.get(old_rule.name)
+        if not (existing_rule and (existing_rule is old_rule)):
+            raise AutomodRuleNotRegistered(old_rule)
+        # Make sure a rename isn't going to clobber another rule.
+        if (new_rule.name != old_rule.name) and (new_rule.name in self.rule_set.rules):
+            raise AutomodRuleWithNameAlreadyExists(new_rule.name)
+        self.rule_set = self.rule_set.replacing(old_rule, new_rule)
+
     def modify_rule_raw(
         self,
         name: str,
         path: JsonPath,
         op: JsonPathOp,
         data: Any,
+        check: Optional[RuleCheck] = None,
     ) -> AutomodRule:
-        # Start with the serialized form of the original rule.
+        # Start with the serialized form of the original rule, and a copy to modify.
         old_rule = self.require_rule(name)
+        old_data = to_data(old_rule)
         new_data = to_data(old_rule)
 
         # Update the modification timestamp. Note that it may still be overidden.
@@ -189,31 +279,47 @@ class AutomodGuildData:
         # Update the new rule data using the given changes.
         update_json_with_path(new_data, path, op, data)
 
-        # Create a new rule out of the modified data.
-        new_rule = AutomodRule.from_data(new_data)
+        # Create a new rule out of the modified data, rebuilding only what changed.
+        new_rule = old_rule.rebuild_from_data(new_data, old_data)
+
+        # Give the caller a chance to reject the new rule, before it's swapped in.
+        if check:
+            check(new_rule)
 
-        # Remove the old rule, and then add the new one.
-        self.remove_rule(old_rule)
-        self.add_rule(new_rule)
+        # Swap the old rule out for the new one.
+        self.replace_rule(old_rule, new_rule)
 
         # Return the new rule.
         return new_rule
 
     def enable_rule_by_name(self, name: str) -> AutomodRule:
-        rule = self.require_rule(name)
-        rule.disabled = False
-        return rule
+        old_rule = self.require_rule(name)
+        new_rule = replace(old_rule, disabled=False)
+        self.replace_rule(old_rule, new_rule)
+        return new_rule
 
     def disable_rule_by_name(self, name: str) -> AutomodRule:
-        rule = self.require_rule(name)
-        rule.disabled = True
-        return rule
+        old_rule = self.require_rule(name)
+        new_rule = replace(old_rule, disabled=True)
+        self.replace_rule(old_rule, new_rule)
+        return new_rule
 
     def increment_rule_hits_by_name(self, name: str) -> AutomodRule:
+        # Hits are a running statistic rather than part of the rule's configuration,
+        # so they're counted on the current rule in-place.
         rule = self.require_rule(name)
         rule.hits += 1
         return rule
 
+    def all_continuations(self) -> Iterable[AutomodContinuation]:
+        yield from self.continuations.values()
+
+    def add_continuation(self, continuation: AutomodContinuation):
+        self.continuations[continuation.id] = continuation
+
+    def remove_continuation(self, id: str) -> Optional[AutomodContinuation]:
+        return self.continuations.pop(id, None)
+
 
 def _guilds_defaultdict_factory() -> DefaultDict[GuildID, AutomodGuildData]:
     return defaultdict(lambda: AutomodGuildData())
@@ -285,6 +391,18 @@ class AutomodData:
         for rule in self.guilds[guild.id].rules_for_event(event):
             yield rule
 
+    # @implements AutomodStore
+    async def has_rules_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> bool:
+        return self.guilds[guild.id].has_rules_for_event_type(event_type)
+
+    # @implements AutomodStore
+    async def watched_attributes_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> Optional[FrozenSet[str]]:
+        return self.guilds[guild.id].watched_attributes_for_event_type(event_type)
+
     # @implements AutomodStore
     async def query_rules(self, guild: Guild, query: str) -> AsyncIterable[AutomodRule]:
         for rule in self.guilds[guild.id].query_rules(query):
@@ -299,8 +417,20 @@ class AutomodData:
         return self.guilds[guild.id].require_rule(name)
 
     # @implements AutomodStore
-    async def add_rule(self, guild: Guild, data: JsonObject) -> AutomodRule:
-        return self.guilds[guild.id].add_rule_from_data(data)
+    async def add_rule(
+        self, guild: Guild, data: JsonObject, check: Optional[RuleCheck] = None
+    ) -> AutomodRule:
+        return self.guilds[guild.id].add_rule_from_data(data, check)
+
+    # @implements AutomodStore
+    async def import_rules(
+        self,
+        guild: Guild,
+        data: Iterable[Any],
+        replace: bool = False,
+        check: Optional[RuleCheck] = None,
+    ) -> List[AutomodRule]:
+        return self.guilds[guild.id].import_rules_from_data(data, replace, check)
 
     # @implements AutomodStore
     async def remove_rule(self, guild: Guild, name: str) -> AutomodRule:
@@ -314,8 +444,9 @@ class AutomodData:
         path: JsonPath,
         op: JsonPathOp,
         data: Any,
+        check: Optional[RuleCheck] = None,
     ) -> AutomodRule:
-        return self.guilds[guild.id].modify_rule_raw(name, path, op, data)
+        return self.guilds[guild.id].modify_rule_raw(name, path, op, data, check)
 
     # @implements AutomodStore
     async def enable_rule(self, guild: Guild, name: str) -> AutomodRule:
@@ -328,3 +459,24 @@ class AutomodData:
     # @implements AutomodStore
     async def increment_rule_hits(self, guild: Guild, name: str) -> AutomodRule:
         return self.guilds[guild.id].increment_rule_hits_by_name(name)
+
+    # @implements AutomodStore
+    async def all_continuations(
+        self, guild: Guild
+    ) -> AsyncIterable[AutomodContinuation]:
+        for continuation in self.guilds[guild.id].all_continuations():
+            yield continuation
+
+    # @implements AutomodStore
+    async def add_continuation(self, guild: Guild, continuation: AutomodContinuation):
+        self.guilds[guild.id].add_continuation(continuation)
+
+    # @implements AutomodStore
+    async def remove_continuation(
+        self, guild: Guild, id: str
+    ) -> Optional[AutomodContinuation]:
+        return self.guilds[guild.id].remove_continuation(id)
+
+    # @implements AutomodStore
+    async def flush(self):
+        pass
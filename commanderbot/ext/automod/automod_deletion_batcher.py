@@ -0,0 +1,161 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+from logging import Logger, getLogger
+from typing import Dict, List, cast
+
+from discord import Forbidden, HTTPException, TextChannel, Thread
+from discord.utils import utcnow
+
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.lib import ChannelID, TextMessage
+
+# The maximum number of messages that can be deleted with a single bulk delete.
+BULK_DELETE_LIMIT = 100
+
+# Messages older than this can't be bulk deleted. Leave a little leeway so that we don't
+# race against the cutoff while the batch is waiting to be flushed.
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+
+DEFAULT_DELETION_BATCH_WINDOW = 0.5
+
+
+@dataclass
+class PendingDeletion:
+    message: TextMessage
+    future: asyncio.Future
+
+
+@dataclass
+class AutomodDeletionBatcher:
+    """
+    Collects message deletions per channel, so that they can be deleted in bulk.
+
+    Deletions requested within a short window of each other are grouped together and
+    issued as bulk deletes, falling back to deleting messages one-by-one where bulk
+    deletion isn't possible. Whoever requested a deletion is given the outcome for their
+    message specifically.
+
+    Attributes
+    ----------
+    window
+        The number of seconds to wait for more deletions before flushing a channel.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    window: float = DEFAULT_DELETION_BATCH_WINDOW
+
+    log: Logger = field(init=False)
+
+    _pending: Dict[ChannelID, Dict[int, PendingDeletion]] = field(
+        init=False, default_factory=dict
+    )
+    _flushers: Dict[ChannelID, asyncio.Task] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    async def delete(self, message: TextMessage):
+        """
+        Delete the message as part of the next batch for its channel.
+
+        Raises whatever error deleting this particular message resulted in, if any.
+        """
+        channel_id = message.channel.id
+        pending = self._pending.setdefault(channel_id, {})
+
+        # If the message is already waiting to be deleted, share the outcome.
+        if deletion := pending.get(message.id):
+            await asyncio.shield(deletion.future)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        pending[message.id] = PendingDeletion(message=message, future=future)
+
+        if channel_id not in self._flushers:
+            task = create_metered_task(self._flush_later(channel_id))
+            self._flushers[channel_id] = task
+
+        await asyncio.shield(future)
+
+    @property
+    def pending(self) -> int:
+        """The number of messages waiting to be deleted, across all channels."""
+        return sum(len(pending) for pending in self._pending.values())
+
+    def stop(self):
+        for task in self._flushers.values():
+            task.cancel()
+        for pending in self._pending.values():
+            for deletion in pending.values():
+                deletion.future.cancel()
+        self._flushers.clear()
+        self._pending.clear()
+
+    async def _flush_later(self, channel_id: ChannelID):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._flushers.pop(channel_id, None)
+        # Anything requested from here on out goes into the next batch.
+        pending = self._pending.pop(channel_id, {})
+        if pending:
+            await self._flush(list(pending.values()))
+
+    async def _flush(self, deletions: List[PendingDeletion]):
+        cutoff = utcnow() - BULK_DELETE_MAX_AGE
+        recent = [d for d in deletions if d.message.created_at > cutoff]
+        old = [d for d in deletions if d.message.created_at <= cutoff]
+
+        for i in range(0, len(recent), BULK_DELETE_LIMIT):
+            await self._delete_bulk(recent[i : i + BULK_DELETE_LIMIT])
+
+        for deletion in old:
+            await self._delete_single(deletion)
+
+    async def _delete_bulk(self, deletions: List[PendingDeletion]):
+        # Bulk deletes require at least two messages.
+        if len(deletions) < 2:
+            for deletion in deletions:
+                await self._delete_single(deletion)
+            return
+
+        channel = cast(TextChannel | Thread, deletions[0].message.channel)
+        try:
+            await channel.delete_messages([d.message for d in deletions])
+        except Forbidden as error:
+            # Deleting them one-by-one isn't going to help.
+            for deletion in deletions:
+                self._set_exception(deletion, error)
+        except HTTPException:
+            # Something about the batch was rejected, so find out which message(s) it
+            # was by deleting them individually instead.
+            self.log.debug(
+                f"Bulk delete of {len(deletions)} messages failed in channel"
+                + f" {channel.id}; falling back to single deletes"
+            )
+            for deletion in deletions:
+                await self._delete_single(deletion)
+        except Exception as error:
+            for deletion in deletions:
+                self._set_exception(deletion, error)
+        else:
+            for deletion in deletions:
+                self._set_result(deletion)
+
+    async def _delete_single(self, deletion: PendingDeletion):
+        try:
+            await deletion.message.delete()
+        except Exception as error:
+            self._set_exception(deletion, error)
+        else:
+            self._set_result(deletion)
+
+    def _set_result(self, deletion: PendingDeletion):
+        if not deletion.future.done():
+            deletion.future.set_result(None)
+
+    def _set_exception(self, deletion: PendingDeletion, error: Exception):
+        if not deletion.future.done():
+            deletion.future.set_exception(error)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import (
+    TYPE_CHECKING,
     Any,
     ClassVar,
     Dict,
@@ -14,6 +15,9 @@ from typing import (
 from commanderbot.ext.automod.utils import deserialize_module_object
 from commanderbot.lib import JsonObject, JsonSerializable
 
+if TYPE_CHECKING:
+    from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
+
 SelfType = TypeVar("SelfType")
 
 
@@ -24,6 +28,13 @@ class AutomodEntity(Protocol):
     def from_data(cls: Type[SelfType], data: JsonObject) -> SelfType:
         """Create an entity from data."""
 
+    @classmethod
+    def get_type_string(cls) -> str:
+        """Return the type of the entity, as it appears in data."""
+
+    def analyze(self, analysis: "AutomodRuleAnalysis"):
+        """Report how expensive the entity is to run, and anything worth warning about."""
+
 
 # @implements AutomodEntity
 @dataclass
@@ -38,6 +49,10 @@ class AutomodEntityBase(JsonSerializable):
     default_module_prefix: ClassVar[str] = ""
     module_function_name: ClassVar[str] = ""
 
+    # A rough estimate of how expensive the entity is to run once, relative to a cheap
+    # in-memory check. See `AutomodRuleAnalysis` for how this is used.
+    cost: ClassVar[float] = 1.0
+
     ST = TypeVar("ST", bound="AutomodEntityBase")
 
     @classmethod
@@ -60,12 +75,17 @@ class AutomodEntityBase(JsonSerializable):
             return short_type
         return full_type
 
+    def analyze(self, analysis: "AutomodRuleAnalysis"):
+        """Override this if the entity's cost isn't fixed, or it can be misused."""
+        analysis.add_cost(self.cost)
+
     # @implements JsonSerializable
     def to_json(self) -> Any:
         # We use a custom implementation to include `type` at serialization-time only.
         type_str = self.get_type_string()
         data = dict(type=type_str)
-        data.update(self.__dict__)
+        # Skip private attributes, which may be used to cache things at runtime.
+        data.update((k, v) for k, v in self.__dict__.items() if not k.startswith("_"))
         return data
 
 
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging import Logger, getLogger, makeLogRecord
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from discord.utils import utcnow
+
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.lib import ChannelID, GuildID, UserID
+from commanderbot.lib.utils import datetime_to_str
+
+# The number of recent evaluations to remember per guild.
+DEFAULT_EVALUATION_HISTORY_SIZE = 500
+
+# How large the spill file may grow before being rotated, and how many rotated files
+# to keep around, when spilling is enabled.
+DEFAULT_EVALUATION_HISTORY_SPILL_BYTES = 5_000_000
+DEFAULT_EVALUATION_HISTORY_SPILL_BACKUPS = 3
+
+OUTCOME_PASSED = "passed"
+OUTCOME_FAILED = "failed"
+OUTCOME_DEFERRED = "deferred"
+OUTCOME_DISABLED = "disabled"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_ERROR = "error"
+
+ConditionOutcome = Tuple[str, bool]
+ActionOutcome = Tuple[str, Optional[str]]
+
+
+class EvaluationTrace:
+    """
+    Collects what happened while a rule was being run, as it happens.
+
+    Attributes
+    ----------
+    conditions
+        The type of each condition that was checked, and whether it passed.
+    actions
+        The type of each action that was applied, and the error it raised (if any).
+    deferred
+        Whether the rest of the rule was deferred to later.
+    shadow
+        Whether the actions were only recorded, and not actually applied.
+    """
+
+    __slots__ = ("conditions", "actions", "deferred", "shadow")
+
+    def __init__(self):
+        self.conditions: List[ConditionOutcome] = []
+        self.actions: List[ActionOutcome] = []
+        self.deferred: bool = False
+        self.shadow: bool = False
+
+    def condition(self, name: str, passed: bool):
+        self.conditions.append((name, passed))
+
+    def action(self, name: str, error: Optional[Exception] = None):
+        self.actions.append((name, None if error is None else repr(error)))
+
+
+class EvaluationRecord:
+    """
+    A compact record of a rule being evaluated against an event.
+
+    Attributes
+    ----------
+    at
+        When the evaluation finished.
+    event_type
+        The name of the type of event.
+    rule
+        The name of the rule.
+    outcome
+        How the evaluation turned out: one of `passed`, `failed`, `deferred`,
+        `disabled`, `skipped`, or `error`.
+    channel_id
+        The ID of the event's channel, if any.
+    message_id
+        The ID of the event's message, if any.
+    user_id
+        The ID of the event's user, if any.
+    conditions
+        The type of each condition that was checked, and whether it passed.
+    actions
+        The type of each action that was applied, and the error it raised (if any).
+    error
+        The error the rule raised, if any.
+    shadow
+        Whether the actions were only recorded, and not actually applied.
+    """
+
+    __slots__ = (
+        "at",
+        "event_type",
+        "rule",
+        "outcome",
+        "channel_id",
+        "message_id",
+        "user_id",
+        "conditions",
+        "actions",
+        "error",
+        "shadow",
+    )
+
+    def __init__(
+        self,
+        at: datetime,
+        event_type: str,
+        rule: str,
+        outcome: str,
+        channel_id: Optional[ChannelID],
+        message_id: Optional[int],
+        user_id: Optional[UserID],
+        conditions: Tuple[ConditionOutcome, ...],
+        actions: Tuple[ActionOutcome, ...],
+        error: Optional[str],
+        shadow: bool = False,
+    ):
+        self.at: datetime = at
+        self.event_type: str = event_type
+        self.rule: str = rule
+        self.outcome: str = outcome
+        self.channel_id: Optional[ChannelID] = channel_id
+        self.message_id: Optional[int] = message_id
+        self.user_id: Optional[UserID] = user_id
+        self.conditions: Tuple[ConditionOutcome, ...] = conditions
+        self.actions: Tuple[ActionOutcome, ...] = actions
+        self.error: Optional[str] = error
+        self.shadow: bool = shadow
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} rule={self.rule!r}"
+            + f" event_type={self.event_type} outcome={self.outcome}>"
+        )
+
+    @staticmethod
+    def from_event(
+        event: AutomodEvent,
+        rule: str,
+        outcome: str,
+        trace: Optional[EvaluationTrace] = None,
+        error: Optional[Exception] = None,
+    ) -> EvaluationRecord:
+        channel = event.channel
+        message = event.message
+        user = event.user
+        return EvaluationRecord(
+            at=utcnow(),
+            event_type=type(event).__name__,
+            rule=rule,
+            outcome=outcome,
+            channel_id=channel.id if channel else None,
+            message_id=message.id if message else None,
+            user_id=user.id if user else None,
+            conditions=tuple(trace.conditions) if trace else (),
+            actions=tuple(trace.actions) if trace else (),
+            error=None if error is None else repr(error),
+            shadow=trace.shadow if trace else False,
+        )
+
+    def to_json(self) -> Any:
+        return {
+            "at": datetime_to_str(self.at),
+            "event_type": self.event_type,
+            "rule": self.rule,
+            "outcome": self.outcome,
+            "channel_id": self.channel_id,
+            "message_id": self.message_id,
+            "user_id": self.user_id,
+            "conditions": [list(outcome) for outcome in self.conditions],
+            "actions": [list(outcome) for outcome in self.actions],
+            "error": self.error,
+            "shadow": self.shadow,
+        }
+
+    def format(self) -> str:
+        parts = [
+            self.at.strftime("%Y-%m-%d %H:%M:%S"),
+            self.rule,
+            self.event_type,
+            self.outcome.upper(),
+        ]
+        if self.shadow:
+            parts.append("(shadow)")
+        if self.channel_id:
+            parts.append(f"channel={self.channel_id}")
+        if self.message_id:
+            parts.append(f"message={self.message_id}")
+        if self.user_id:
+            parts.append(f"user={self.user_id}")
+        lines = [" ".join(parts)]
+        if self.conditions:
+            lines.append(
+                "  conditions: "
+                + ", ".join(
+                    f"{name}={'pass' if passed else 'fail'}"
+                    for name, passed in self.conditions
+                )
+            )
+        if self.actions:
+            lines.append(
+                ("  would apply: " if self.shadow else "  actions: ")
+                + ", ".join(
+                    name if error is None else f"{name}={error}"
+                    for name, error in self.actions
+                )
+            )
+        if self.error:
+            lines.append(f"  error: {self.error}")
+        return "\n".join(lines)
+
+
+@dataclass
+class AutomodEvaluationHistory:
+    """
+    Remembers the most recent rule evaluations in each guild, for auditing.
+
+    Each guild keeps a ring buffer of records, so memory use is bounded no matter how
+    busy the guild is. If a spill path is given, records that fall out of a buffer are
+    appended to a rotating JSON Lines file instead of being forgotten. Writing to the
+    file happens on a background thread, so that it never holds up the event loop.
+
+    Attributes
+    ----------
+    size
+        The number of recent evaluations to remember per guild.
+    spill_path
+        The path of the file to spill old records to, if any.
+    spill_max_bytes
+        How large the spill file may grow before being rotated.
+    spill_backups
+        The number of rotated spill files to keep.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    size: int = DEFAULT_EVALUATION_HISTORY_SIZE
+    spill_path: Optional[str] = None
+    spill_max_bytes: int = DEFAULT_EVALUATION_HISTORY_SPILL_BYTES
+    spill_backups: int = DEFAULT_EVALUATION_HISTORY_SPILL_BACKUPS
+
+    log: Logger = field(init=False)
+
+    _records: Dict[GuildID, Deque[EvaluationRecord]] = field(
+        init=False, default_factory=dict
+    )
+    _spill: Optional[QueueHandler] = field(init=False, default=None)
+    _spill_listener: Optional[QueueListener] = field(init=False, default=None)
+    _spill_file: Optional[RotatingFileHandler] = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+        if self.spill_path:
+            # Go through handlers directly (rather than a logger), so that rotation is
+            # taken care of without anything else picking up the records.
+            self._spill_file = RotatingFileHandler(
+                self.spill_path,
+                maxBytes=self.spill_max_bytes,
+                backupCount=self.spill_backups,
+                encoding="utf-8",
+                delay=True,
+            )
+            queue: SimpleQueue = SimpleQueue()
+            self._spill = QueueHandler(queue)
+            self._spill_listener = QueueListener(queue, self._spill_file)
+            self._spill_listener.start()
+
+    def _spill_record(self, guild_id: GuildID, record: EvaluationRecord):
+        assert self._spill is not None
+        data = {"guild_id": guild_id, **record.to_json()}
+        try:
+            self._spill.emit(makeLogRecord({"msg": json.dumps(data)}))
+        except:
+            self.log.exception("Failed to spill evaluation record")
+
+    def add(self, guild_id: GuildID, record: EvaluationRecord):
+        records = self._records.get(guild_id)
+        if records is None:
+            records = deque(maxlen=self.size)
+            self._records[guild_id] = records
+        if (self._spill is not None) and (len(records) == records.maxlen):
+            self._spill_record(guild_id, records[0])
+        records.append(record)
+
+    def query(
+        self, guild_id: GuildID, rule: Optional[str] = None, limit: int = 10
+    ) -> List[EvaluationRecord]:
+        """Return the guild's most recent evaluations, newest first."""
+        found: List[EvaluationRecord] = []
+        for record in reversed(self._records.get(guild_id, ())):
+            if len(found) >= limit:
+                break
+            if (rule is None) or (record.rule == rule):
+                found.append(record)
+        return found
+
+    def stop(self):
+        # Hang on to what's left in memory, so that nothing is lost on shutdown.
+        if self._spill is None:
+            return
+        for guild_id, records in self._records.items():
+            for record in records:
+                self._spill_record(guild_id, record)
+        self._records.clear()
+        # Wait for everything to be written before letting go of the file.
+        if self._spill_listener is not None:
+            self._spill_listener.stop()
+        if self._spill_file is not None:
+            self._spill_file.close()
+        self._spill.close()
+        self._spill = None
@@ -1,17 +1,35 @@
+import asyncio
 from dataclasses import dataclass, field
 from logging import Logger, getLogger
-from typing import Any, ClassVar, Dict, Iterable, Optional, Protocol, Tuple, Type, cast
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ClassVar,
+    Dict,
+    Iterable,
+    Optional,
+    Protocol,
+    Tuple,
+    Type,
+    cast,
+)
 
 from discord import Member, TextChannel, Thread, User
 from discord.ext.commands import Bot
 
+from commanderbot.ext.automod.automod_changes import AttributeChanges
 from commanderbot.lib import ShallowFormatter, TextMessage, TextReaction, ValueFormatter
 from commanderbot.lib.utils import yield_member_date_fields
 
+if TYPE_CHECKING:
+    from commanderbot.ext.automod.automod_services import AutomodServices
+
 
 class AutomodEvent(Protocol):
     bot: Bot
     log: Logger
+    services: Optional["AutomodServices"]
+    condition_cache: Dict[str, asyncio.Future]
 
     @property
     def channel(self) -> Optional[TextChannel | Thread]:
@@ -45,6 +63,10 @@ class AutomodEvent(Protocol):
     def user(self) -> Optional[User]:
         """Return the user-in-question, if any."""
 
+    @property
+    def changes(self) -> AttributeChanges:
+        """Return the attributes that changed, if any."""
+
     def set_metadata(self, key: str, value: Any):
         """Attach metadata to the event."""
 
@@ -64,6 +86,12 @@ class AutomodEventBase:
     bot: Bot
     log: Logger
 
+    # Attached by the guild state before any rules are run.
+    services: Optional["AutomodServices"] = field(init=False, default=None)
+
+    # Results of pure conditions checked against the event, by structural key.
+    condition_cache: Dict[str, asyncio.Future] = field(init=False, default_factory=dict)
+
     _metadata: Dict[str, Any] = field(init=False, default_factory=dict)
 
     SAFE_TYPES: ClassVar[Tuple[Type, ...]] = (bool, int, float, str)
@@ -76,6 +104,8 @@ class AutomodEventBase:
     ) -> None:
         self.bot = bot
         self.log = log
+        self.services = None
+        self.condition_cache = {}
         self._metadata = {}
 
     @property
@@ -111,6 +141,10 @@ class AutomodEventBase:
     def user(self) -> Optional[User]:
         return cast(User, self.member)
 
+    @property
+    def changes(self) -> AttributeChanges:
+        return {}
+
     def set_metadata(self, key: str, value: Any):
         self._metadata[key] = value
 
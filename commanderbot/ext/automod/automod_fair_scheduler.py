@@ -0,0 +1,441 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Set,
+)
+
+from commanderbot.lib import GuildID
+
+DEFAULT_GUILD_TIME_WINDOW = 60.0
+DEFAULT_GUILD_TIME_BUDGET = 5.0
+DEFAULT_EVALUATION_CONCURRENCY = 64
+
+# The share of time each guild is given per round, before it has to wait its turn.
+DEFAULT_QUANTUM = 0.005
+
+# Guilds over budget get this fraction of the share that other guilds do.
+THROTTLED_WEIGHT = 0.5
+
+# The granularity of the sliding window used to account for time spent.
+USAGE_BUCKET_SECONDS = 1.0
+
+# How quickly the estimated time per evaluation adapts to new measurements.
+ESTIMATE_SMOOTHING = 0.2
+
+
+def _steps(awaitable: Awaitable) -> Generator[Any, Any, Any]:
+    # Coroutines and other awaitables can all be stepped through the same way.
+    return awaitable.__await__()
+
+
+class MeteredCoroutine:
+    """
+    Awaits a coroutine while measuring the time it spends running on the event loop.
+
+    Only the time spent inside the coroutine's own steps is counted, not the time it
+    spends suspended waiting on something else (such as a request to Discord). This is
+    what matters for fairness, since that's the time no other guild gets to run.
+    """
+
+    def __init__(self, coro: Awaitable, account: Callable[[float], None]):
+        self._coro: Awaitable = coro
+        self._account: Callable[[float], None] = account
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        steps = _steps(self._coro)
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = steps.send(value)
+                else:
+                    yielded = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._account(time.perf_counter() - started)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as ex:
+                value, error = None, ex
+
+
+class ScheduledCoroutine:
+    """
+    Awaits a coroutine one step at a time, waiting for the guild's turn before each.
+
+    A turn is only held for as long as a step runs on the event loop, and is given back
+    as soon as the coroutine suspends. Awaiting something else (such as a request to
+    Discord, or a timer) therefore never keeps other guilds from running.
+    """
+
+    def __init__(self, coro: Awaitable, meter: "GuildMeter"):
+        self._coro: Awaitable = coro
+        self._meter: GuildMeter = meter
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        scheduler = self._meter.scheduler
+        lane = self._meter.lane
+        steps = _steps(self._coro)
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            charged: float | None = None
+            try:
+                charged = yield from scheduler._wait_for_turn(lane).__await__()
+            except asyncio.CancelledError as ex:
+                # Let the coroutine clean up after itself, even without a turn.
+                value, error = None, ex
+            started = time.perf_counter()
+            try:
+                if error is None:
+                    yielded = steps.send(value)
+                else:
+                    yielded = steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                elapsed = time.perf_counter() - started
+                self._meter.add(elapsed)
+                scheduler._settle(lane, charged, elapsed)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as ex:
+                value, error = None, ex
+
+
+@dataclass
+class EvaluationMeter:
+    """Accumulates the time spent on a single evaluation."""
+
+    elapsed: float = 0.0
+
+    def add(self, seconds: float):
+        self.elapsed += seconds
+
+    def wrap(self, coro: Awaitable) -> Awaitable:
+        return MeteredCoroutine(coro, self.add)
+
+
+@dataclass
+class GuildMeter(EvaluationMeter):
+    """
+    Accumulates the time spent on a single evaluation, charging it to the guild.
+
+    Attributes
+    ----------
+    scheduler
+        The scheduler handing out turns.
+    lane
+        The guild's lane in the scheduler.
+    """
+
+    scheduler: "AutomodFairScheduler" = field(kw_only=True)
+    lane: "GuildLane" = field(kw_only=True)
+
+    # @overrides EvaluationMeter
+    def wrap(self, coro: Awaitable) -> Awaitable:
+        return ScheduledCoroutine(coro, self)
+
+
+# The meter of the evaluation currently underway, if any. Tasks inherit this from the
+# task that created them, which is how work spawned by rules is charged to the guild.
+_current_meter: ContextVar[Optional[GuildMeter]] = ContextVar(
+    "automod_current_meter", default=None
+)
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+def create_metered_task(coro: Coroutine) -> asyncio.Task:
+    """
+    Create a task whose time is charged to the guild that is currently evaluating.
+
+    Outside of an evaluation, this is the same as creating a task normally.
+    """
+    meter = _current_meter.get()
+    if meter is None:
+        return asyncio.create_task(coro)
+    return asyncio.create_task(_await(meter.wrap(coro)))
+
+
+def create_unmetered_task(coro: Coroutine) -> asyncio.Task:
+    """
+    Create a task that isn't charged to any guild, even from within an evaluation.
+
+    This is for long-lived tasks that merely happen to be started by an evaluation, and
+    which would otherwise be charged to it for as long as they live.
+    """
+    context = copy_context()
+    context.run(_current_meter.set, None)
+    return context.run(asyncio.create_task, coro)
+
+
+@dataclass
+class UsageBucket:
+    start: float
+    seconds: float = 0.0
+    evaluations: int = 0
+
+
+@dataclass
+class GuildUsage:
+    """
+    The time spent evaluating a guild's rules over a sliding window.
+
+    Attributes
+    ----------
+    window
+        The number of seconds to account for.
+    """
+
+    window: float
+
+    _buckets: Deque[UsageBucket] = field(init=False, default_factory=deque)
+    _seconds: float = field(init=False, default=0.0)
+    _evaluations: int = field(init=False, default=0)
+
+    def _expire(self, now: float):
+        cutoff = now - self.window
+        while self._buckets and (self._buckets[0].start <= cutoff):
+            bucket = self._buckets.popleft()
+            self._seconds -= bucket.seconds
+            self._evaluations -= bucket.evaluations
+
+    def add(self, seconds: float, evaluations: int = 0, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        bucket_start = now - (now % USAGE_BUCKET_SECONDS)
+        if self._buckets and (self._buckets[-1].start == bucket_start):
+            bucket = self._buckets[-1]
+        else:
+            bucket = UsageBucket(start=bucket_start)
+            self._buckets.append(bucket)
+        bucket.seconds += seconds
+        bucket.evaluations += evaluations
+        self._seconds += seconds
+        self._evaluations += evaluations
+
+    def seconds(self, now: float | None = None) -> float:
+        self._expire(time.monotonic() if now is None else now)
+        # Avoid drifting below zero due to floating-point error.
+        return max(self._seconds, 0.0)
+
+    def evaluations(self, now: float | None = None) -> int:
+        self._expire(time.monotonic() if now is None else now)
+        return self._evaluations
+
+
+@dataclass
+class GuildLane:
+    guild_id: GuildID
+    usage: GuildUsage
+    waiting: Deque[asyncio.Future] = field(default_factory=deque)
+    deficit: float = 0.0
+    estimate: float = DEFAULT_QUANTUM
+    running: int = 0
+    degraded: bool = False
+
+
+@dataclass
+class GuildUsageSnapshot:
+    guild_id: GuildID
+    seconds: float
+    evaluations: int
+    running: int
+    waiting: int
+    degraded: bool
+
+
+@dataclass
+class AutomodFairScheduler:
+    """
+    Shares time spent evaluating rules fairly between guilds.
+
+    Evaluations are run one step at a time, and each step has to wait for its turn.
+    Turns are handed out to guilds using deficit round-robin: each round, a guild is
+    given a quantum of time to spend, and may run steps for as long as it has time left
+    over. The time a step actually spent running on the event loop is charged as soon
+    as it's done, so guilds with expensive rules end up waiting longer between turns.
+
+    A turn is only held while a step runs. Evaluations that are suspended, waiting on
+    Discord or on a timer, don't hold on to a turn and don't keep anyone else waiting.
+    Tasks created with `create_metered_task()` during an evaluation are run and charged
+    the same way, on behalf of the same guild.
+
+    Time spent is also accounted for over a sliding window. Guilds that go over their
+    budget are considered degraded: they get a smaller share of time, and may choose to
+    skip low-priority rules until they're back under budget.
+
+    Attributes
+    ----------
+    window
+        The number of seconds to account for time spent over.
+    budget
+        The number of seconds each guild may spend per window before being degraded.
+    concurrency
+        The maximum number of steps to hand out turns to at once, across all guilds.
+    quantum
+        The number of seconds each guild is given per round.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    window: float = DEFAULT_GUILD_TIME_WINDOW
+    budget: float = DEFAULT_GUILD_TIME_BUDGET
+    concurrency: int = DEFAULT_EVALUATION_CONCURRENCY
+    quantum: float = DEFAULT_QUANTUM
+
+    log: Logger = field(init=False)
+
+    _lanes: Dict[GuildID, GuildLane] = field(init=False, default_factory=dict)
+    _ring: Deque[GuildLane] = field(init=False, default_factory=deque)
+    _active: Set[GuildID] = field(init=False, default_factory=set)
+    _running: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    @property
+    def running(self) -> int:
+        """The number of steps currently holding a turn, across all guilds."""
+        return self._running
+
+    @property
+    def waiting(self) -> int:
+        """The number of steps currently waiting for a turn, across all guilds."""
+        return sum(len(lane.waiting) for lane in self._lanes.values())
+
+    def _get_lane(self, guild_id: GuildID) -> GuildLane:
+        lane = self._lanes.get(guild_id)
+        if lane is None:
+            lane = GuildLane(guild_id=guild_id, usage=GuildUsage(window=self.window))
+            self._lanes[guild_id] = lane
+        return lane
+
+    def is_degraded(self, guild_id: GuildID) -> bool:
+        """Check whether the guild has gone over its budget recently."""
+        if lane := self._lanes.get(guild_id):
+            self._update_degraded(lane)
+            return lane.degraded
+        return False
+
+    def _update_degraded(self, lane: GuildLane):
+        degraded = lane.usage.seconds() > self.budget
+        if degraded != lane.degraded:
+            lane.degraded = degraded
+            if degraded:
+                self.log.warning(
+                    f"Guild {lane.guild_id} went over its budget of {self.budget:g}s"
+                    + f" per {self.window:g}s, and will be throttled"
+                )
+            else:
+                self.log.info(f"Guild {lane.guild_id} is back under budget")
+
+    def _pump(self):
+        # Hand out turns for as long as there are free slots and guilds waiting.
+        while (self._running < self.concurrency) and self._ring:
+            lane = self._ring[0]
+            # Forget about turns whose steps were cancelled while waiting.
+            while lane.waiting and lane.waiting[0].done():
+                lane.waiting.popleft()
+            if not lane.waiting:
+                self._ring.popleft()
+                self._active.discard(lane.guild_id)
+                # Don't let idle guilds bank time, but do let debts carry over.
+                lane.deficit = min(lane.deficit, 0.0)
+                continue
+            if lane.deficit <= 0.0:
+                weight = THROTTLED_WEIGHT if lane.degraded else 1.0
+                lane.deficit += self.quantum * weight
+                self._ring.rotate(-1)
+                continue
+            # The actual cost isn't known until later, so charge an estimate for now.
+            turn = lane.waiting.popleft()
+            lane.deficit -= lane.estimate
+            lane.running += 1
+            self._running += 1
+            turn.set_result(lane.estimate)
+
+    def _settle(self, lane: GuildLane, charged: float | None, elapsed: float):
+        # A step that was cancelled while waiting for its turn never held one.
+        if charged is not None:
+            lane.running -= 1
+            self._running -= 1
+            lane.estimate += ESTIMATE_SMOOTHING * (elapsed - lane.estimate)
+        # Settle up the difference between what was estimated and what was spent.
+        lane.deficit += (charged or 0.0) - elapsed
+        lane.usage.add(elapsed)
+        self._update_degraded(lane)
+        self._pump()
+
+    async def _wait_for_turn(self, lane: GuildLane) -> float:
+        turn = asyncio.get_running_loop().create_future()
+        lane.waiting.append(turn)
+        if lane.guild_id not in self._active:
+            self._active.add(lane.guild_id)
+            self._ring.append(lane)
+        self._pump()
+        try:
+            return await turn
+        except asyncio.CancelledError:
+            # The turn may have been handed out just before we were cancelled.
+            if turn.done() and not turn.cancelled():
+                self._settle(lane, turn.result(), 0.0)
+            else:
+                turn.cancel()
+            raise
+
+    @asynccontextmanager
+    async def turn(self, guild_id: GuildID) -> AsyncIterator[GuildMeter]:
+        """
+        Account for an evaluation done on behalf of the guild.
+
+        Only coroutines wrapped using the yielded meter (and tasks they create using
+        `create_metered_task()`) wait for turns and are accounted for.
+        """
+        lane = self._get_lane(guild_id)
+        meter = GuildMeter(scheduler=self, lane=lane)
+        token = _current_meter.set(meter)
+        try:
+            yield meter
+        finally:
+            _current_meter.reset(token)
+            lane.usage.add(0.0, evaluations=1)
+
+    def snapshot(self) -> List[GuildUsageSnapshot]:
+        """Return the current usage of each guild, most expensive first."""
+        snapshots = []
+        for lane in self._lanes.values():
+            self._update_degraded(lane)
+            snapshots.append(
+                GuildUsageSnapshot(
+                    guild_id=lane.guild_id,
+                    seconds=lane.usage.seconds(),
+                    evaluations=lane.usage.evaluations(),
+                    running=lane.running,
+                    waiting=len(lane.waiting),
+                    degraded=lane.degraded,
+                )
+            )
+        snapshots.sort(key=lambda snapshot: snapshot.seconds, reverse=True)
+        return snapshots
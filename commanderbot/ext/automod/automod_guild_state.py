@@ -1,9 +1,9 @@
 import asyncio
 import json
-from dataclasses import dataclass
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 from json import JSONDecodeError
-from typing import Any, Optional, cast
+from typing import Any, Optional, Type, cast
 
 import yaml
 from discord import (
@@ -22,13 +22,47 @@ from discord import (
 from yaml import YAMLError
 
 from commanderbot.ext.automod import events
-from commanderbot.ext.automod.automod_event import AutomodEventBase
+from commanderbot.ext.automod.automod_changes import AttributeChanges
+from commanderbot.ext.automod.automod_continuation import (
+    CONDITIONS,
+    AutomodContinuation,
+    restore_event,
+)
+from commanderbot.ext.automod.automod_evaluation_history import (
+    OUTCOME_DEFERRED,
+    OUTCOME_DISABLED,
+    OUTCOME_ERROR,
+    OUTCOME_FAILED,
+    OUTCOME_PASSED,
+    OUTCOME_SKIPPED,
+    EvaluationRecord,
+    EvaluationTrace,
+)
+from commanderbot.ext.automod.automod_event import AutomodEvent, AutomodEventBase
+from commanderbot.ext.automod.automod_fair_scheduler import (
+    AutomodFairScheduler,
+    EvaluationMeter,
+)
+from commanderbot.ext.automod.automod_message_cache import AutomodMessageCache
 from commanderbot.ext.automod.automod_rule import AutomodRule
+from commanderbot.ext.automod.automod_rule_analysis import (
+    DEFAULT_RULE_COST_BUDGET,
+    AutomodRuleOverBudget,
+    analyze_rule,
+)
+from commanderbot.ext.automod.automod_scheduler import AutomodScheduler
+from commanderbot.ext.automod.automod_services import AutomodServices
+from commanderbot.ext.automod.automod_shadow_stats import (
+    SHADOW_STATS_BUCKET_SECONDS,
+    SHADOW_STATS_BUCKETS,
+    AutomodShadowStats,
+)
 from commanderbot.ext.automod.automod_store import AutomodStore
 from commanderbot.lib import (
     CogGuildState,
     GuildContext,
     LogOptions,
+    PatternBudgetExceeded,
     ResponsiveException,
     RoleSet,
     TextMessage,
@@ -42,8 +76,18 @@ from commanderbot.lib.utils import (
     async_expand,
     query_json_path,
     send_message_or_file,
+    str_to_file,
 )
 
+RAW_MESSAGE_EVENT_TYPES = (events.RawMessageDeleted, events.RawMessageEdited)
+
+# The largest file of rules that may be imported at once, in bytes.
+MAX_IMPORT_SIZE = 1_000_000
+
+# The number of recent evaluations to show at once, by default and at most.
+DEFAULT_HISTORY_LIMIT = 10
+MAX_HISTORY_LIMIT = 100
+
 
 @dataclass
 class AutomodGuildState(CogGuildState):
@@ -54,9 +98,28 @@ class AutomodGuildState(CogGuildState):
     -----------
     store
         The store used to interface with persistent data in a database-agnostic way.
+    scheduler
+        The scheduler used to resume deferred rules, shared between guilds.
+    services
+        Helpers made available to rules via their events, shared between guilds.
+    fair_scheduler
+        Shares time spent evaluating rules fairly between guilds.
+    message_cache
+        A compact cache of recent messages, for rules that listen for raw events.
+    shadow_stats
+        How often shadow rules would have fired, and what they cost.
+    rule_cost_budget
+        The estimated cost per event that new or modified rules may not exceed, unless
+        forced.
     """
 
     store: AutomodStore
+    scheduler: AutomodScheduler
+    services: AutomodServices = field(default_factory=AutomodServices)
+    fair_scheduler: AutomodFairScheduler = field(default_factory=AutomodFairScheduler)
+    message_cache: AutomodMessageCache = field(default_factory=AutomodMessageCache)
+    shadow_stats: AutomodShadowStats = field(default_factory=AutomodShadowStats)
+    rule_cost_budget: float = DEFAULT_RULE_COST_BUDGET
 
     async def _get_log_options_for_rule(
         self, rule: AutomodRule
@@ -71,6 +134,16 @@ class AutomodGuildState(CogGuildState):
     async def _handle_rule_error(self, rule: AutomodRule, error: Exception):
         error_message = f"Rule `{rule.name}` caused an error:"
 
+        # A pattern that ran over budget will likely do so again, so stop using it.
+        if isinstance(error, PatternBudgetExceeded) and not rule.disabled:
+            try:
+                await self.store.disable_rule(self.guild, rule.name)
+                error_message = (
+                    f"Rule `{rule.name}` has been disabled because it caused an error:"
+                )
+            except:
+                self.log.exception(f"Failed to disable rule: {rule.name}")
+
         # Re-raise the error so that it can be printed to the console.
         try:
             raise error
@@ -81,6 +154,17 @@ class AutomodGuildState(CogGuildState):
         if log_options := await self._get_log_options_for_rule(rule):
             try:
                 error_codeblock = log_options.formate_error_codeblock(error)
+                # Errors tend to come in waves, so coalesce them if asked to.
+                if log_options.digest:
+                    log_channel = await log_options.require_channel(self.bot)
+                    self.services.log_digest.add(
+                        log_channel,
+                        log_options.format_content(
+                            f"{error_message}\n{error_codeblock}"
+                        ),
+                        allowed_mentions=log_options.allowed_mentions,
+                    )
+                    return
                 await log_options.send(
                     self.bot,
                     f"{error_message}\n{error_codeblock}",
@@ -90,19 +174,205 @@ class AutomodGuildState(CogGuildState):
                 # If something went wrong here, print another exception to the console.
                 self.log.exception("Failed to log message to error channel")
 
+    async def _defer_rule(
+        self,
+        rule: AutomodRule,
+        event: AutomodEvent,
+        stage: str,
+        index: int,
+        delay: timedelta,
+    ):
+        continuation = AutomodContinuation.create(
+            rule_name=rule.name,
+            rule_modified_on=rule.modified_on,
+            stage=stage,
+            index=index,
+            delay=delay,
+            event=event,
+        )
+        # Persist the continuation first, so that it survives a restart.
+        await self.store.add_continuation(self.guild, continuation)
+        self.scheduler.schedule(self.guild.id, continuation)
+
+    def _record_evaluation(
+        self,
+        event: AutomodEvent,
+        rule: AutomodRule,
+        outcome: str,
+        trace: Optional[EvaluationTrace] = None,
+        error: Optional[Exception] = None,
+    ):
+        try:
+            record = EvaluationRecord.from_event(
+                event, rule.name, outcome, trace, error
+            )
+            self.services.evaluations.add(self.guild.id, record)
+        except:
+            self.log.exception(f"Failed to record evaluation of rule: {rule.name}")
+
+    def _outcome_of(
+        self, rule: AutomodRule, passed: bool, trace: EvaluationTrace
+    ) -> str:
+        if trace.deferred:
+            return OUTCOME_DEFERRED
+        if passed:
+            return OUTCOME_PASSED
+        if rule.disabled:
+            return OUTCOME_DISABLED
+        return OUTCOME_FAILED
+
+    def _record_shadow(
+        self, rule: AutomodRule, passed: bool, trace: EvaluationTrace, seconds: float
+    ):
+        # Deferred evaluations are counted once they're resumed, instead.
+        if rule.disabled or trace.deferred:
+            return
+        self.shadow_stats.add(rule.name, passed, seconds)
+
+    def _count_evaluation(self, passed: bool, trace: EvaluationTrace):
+        metrics = self.services.metrics
+        guild_id = (str(self.guild.id),)
+        metrics.rules_polled.inc(guild_id)
+        # Conditions passed even if one of the actions then failed.
+        if passed or trace.actions:
+            metrics.rules_passed.inc(guild_id)
+        # An action that failed is always the last one to have been applied.
+        if trace.actions and ((last_action := trace.actions[-1])[1] is not None):
+            metrics.action_failures.inc((last_action[0],))
+
     async def _do_event_for_rule(self, event: AutomodEventBase, rule: AutomodRule):
+        trace = EvaluationTrace()
+        rule_meter = EvaluationMeter()
+        passed = False
         try:
-            if await rule.run(event):
+            passed = await rule_meter.wrap(
+                rule.run(event, defer=self._defer_rule, trace=trace)
+            )
+            self._record_evaluation(
+                event, rule, self._outcome_of(rule, passed, trace), trace
+            )
+            # Shadow rules would have hit, but didn't actually do anything.
+            if rule.shadow:
+                self._record_shadow(rule, passed, trace, rule_meter.elapsed)
+            elif passed:
                 await self.store.increment_rule_hits(self.guild, rule.name)
         except Exception as error:
+            self._record_evaluation(event, rule, OUTCOME_ERROR, trace, error)
             await self._handle_rule_error(rule, error)
+        finally:
+            self._count_evaluation(passed, trace)
+
+    async def restore_continuations(self):
+        """Schedule any continuations that were persisted before a restart."""
+        async for continuation in self.store.all_continuations(self.guild):
+            self.scheduler.schedule(self.guild.id, continuation)
+
+    async def resume_continuation(self, continuation: AutomodContinuation):
+        """Resume a deferred rule, now that it's due."""
+        # If it was already removed, then it has already been resumed.
+        if not await self.store.remove_continuation(self.guild, continuation.id):
+            return
+
+        # Don't resume rules that have since been removed, disabled, or modified.
+        rule = await self.store.get_rule(self.guild, continuation.rule_name)
+        if (rule is None) or rule.disabled:
+            self.log.info(
+                f"Discarding continuation for unavailable rule: {continuation.rule_name}"
+            )
+            return
+        if rule.modified_on != continuation.rule_modified_on:
+            self.log.info(
+                f"Discarding continuation for modified rule: {continuation.rule_name}"
+            )
+            return
+
+        event: Optional[AutomodEvent] = None
+        trace = EvaluationTrace()
+        rule_meter = EvaluationMeter()
+        try:
+            event = await restore_event(
+                self.bot, self.log, self.guild, continuation.event
+            )
+            event.services = self.services
+            async with self.fair_scheduler.turn(self.guild.id) as meter:
+                passed = await meter.wrap(
+                    rule_meter.wrap(
+                        rule.resume(
+                            event,
+                            continuation.stage,
+                            continuation.index,
+                            defer=self._defer_rule,
+                            trace=trace,
+                        )
+                    )
+                )
+            # Resuming from the actions stage never counts as passing, but it did.
+            outcome = self._outcome_of(
+                rule, passed or (continuation.stage != CONDITIONS), trace
+            )
+            self._record_evaluation(event, rule, outcome, trace)
+            # Hits are only counted once the conditions have passed in their entirety.
+            if continuation.stage == CONDITIONS:
+                if rule.shadow:
+                    self._record_shadow(rule, passed, trace, rule_meter.elapsed)
+                elif passed:
+                    await self.store.increment_rule_hits(self.guild, rule.name)
+        except Exception as error:
+            if event is not None:
+                self._record_evaluation(event, rule, OUTCOME_ERROR, trace, error)
+            await self._handle_rule_error(rule, error)
+
+    async def _has_raw_message_rules(self) -> bool:
+        for event_type in RAW_MESSAGE_EVENT_TYPES:
+            if await self.store.has_rules_for_event_type(self.guild, event_type):
+                return True
+        return False
+
+    async def _cache_message(self, message: TextMessage):
+        # Only spend memory on messages if there are rules that could make use of them.
+        if await self._has_raw_message_rules():
+            self.message_cache.put(message)
+        elif self.message_cache:
+            self.message_cache.clear()
 
     async def _do_event(self, event: AutomodEventBase):
         # Run rules in parallel so that they don't need to wait for one another. They
         # run separately so that when a rule fails it doesn't stop the others.
-        rules = await async_expand(self.store.rules_for_event(self.guild, event))
-        tasks = [self._do_event_for_rule(event, rule) for rule in rules]
-        await asyncio.gather(*tasks)
+        event.services = self.services
+        metrics = self.services.metrics
+        event_type = (type(event).__name__,)
+        metrics.events_received.inc(event_type)
+        # Don't bother waiting for a turn if there's nothing to do with it.
+        if not await self.store.has_rules_for_event_type(self.guild, type(event)):
+            return
+        metrics.events_dispatched.inc(event_type)
+        async with self.fair_scheduler.turn(self.guild.id) as meter:
+            rules = await meter.wrap(
+                async_expand(self.store.rules_for_event(self.guild, event))
+            )
+            # While over budget, only spend time on rules that are important enough.
+            # Shadow rules never are, since they don't actually do anything.
+            if self.fair_scheduler.is_degraded(self.guild.id):
+                for rule in rules:
+                    if rule.shadow or (rule.priority < 0):
+                        self._record_evaluation(event, rule, OUTCOME_SKIPPED)
+                rules = [
+                    rule for rule in rules if (not rule.shadow) and (rule.priority >= 0)
+                ]
+            tasks = [
+                meter.wrap(self._do_event_for_rule(event, rule))
+                for rule in rules
+                if not rule.shadow
+            ]
+            await asyncio.gather(*tasks)
+            # Shadow rules only get to run once all of the other rules are done.
+            shadow_tasks = [
+                meter.wrap(self._do_event_for_rule(event, rule))
+                for rule in rules
+                if rule.shadow
+            ]
+            await asyncio.gather(*shadow_tasks)
+        metrics.evaluation_seconds.observe(meter.elapsed, event_type)
 
     def _parse_body(self, body: str) -> Any:
         content = body.strip("\n").strip("`")
@@ -119,6 +389,31 @@ class AutomodGuildState(CogGuildState):
                 raise ResponsiveException(str(ex)) from ex
         raise ResponsiveException("Missing code block declared as `json` or `yaml`")
 
+    async def _parse_import(self, ctx: GuildContext, body: Optional[str]) -> Any:
+        # Prefer an attached file, since a whole rule set rarely fits into a message.
+        if attachments := ctx.message.attachments:
+            attachment = attachments[0]
+            if attachment.size > MAX_IMPORT_SIZE:
+                raise ResponsiveException(
+                    f"Attachment is too large to import (over {MAX_IMPORT_SIZE} bytes)"
+                )
+            try:
+                content = (await attachment.read()).decode("utf-8")
+            except UnicodeDecodeError as ex:
+                raise ResponsiveException(f"Attachment is not valid text: {ex}") from ex
+            # YAML is (for our purposes) a superset of JSON, so it can parse either.
+            try:
+                if attachment.filename.endswith(".json"):
+                    return json.loads(content)
+                return yaml.safe_load(content)
+            except (JSONDecodeError, YAMLError) as ex:
+                raise ResponsiveException(str(ex)) from ex
+        if body:
+            return self._parse_body(body)
+        raise ResponsiveException(
+            "Attach a `json` or `yaml` file of rules, or include them in a code block"
+        )
+
     async def reply(self, ctx: GuildContext, content: str):
         """Wraps `Context.reply()` with some extension-default boilerplate."""
         await ctx.message.reply(
@@ -299,10 +594,129 @@ class AutomodGuildState(CogGuildState):
         else:
             await self.reply(ctx, f"No rule found matching `{query}`")
 
-    async def add_rule(self, ctx: GuildContext, body: str):
+    def _check_rule_cost(self, rule: AutomodRule):
+        analysis = analyze_rule(rule)
+        if analysis.cost > self.rule_cost_budget:
+            raise AutomodRuleOverBudget(rule, analysis, self.rule_cost_budget)
+
+    async def _reply_with_analysis(
+        self, ctx: GuildContext, content: str, rule: AutomodRule
+    ):
+        # Let the author know about anything that looks expensive, even if allowed.
+        analysis = analyze_rule(rule)
+        if analysis.findings or (analysis.cost > self.rule_cost_budget):
+            content = "\n".join([content, *analysis.format_lines()])
+        await self.reply(ctx, content)
+
+    async def add_rule(self, ctx: GuildContext, body: str, force: bool = False):
         data = self._parse_body(body)
-        rule = await self.store.add_rule(self.guild, data)
-        await self.reply(ctx, f"Added automod rule `{rule.name}`")
+        check = None if force else self._check_rule_cost
+        rule = await self.store.add_rule(self.guild, data, check)
+        await self._reply_with_analysis(ctx, f"Added automod rule `{rule.name}`", rule)
+
+    async def import_rules(
+        self,
+        ctx: GuildContext,
+        body: Optional[str] = None,
+        force: bool = False,
+        replace: bool = False,
+    ):
+        data = await self._parse_import(ctx, body)
+        # Accept either a list of rules, or the same format as `export_rules`.
+        if isinstance(data, dict) and ("rules" in data):
+            data = data["rules"]
+        if not isinstance(data, list):
+            raise ResponsiveException("Expected a list of rules to import")
+        check = None if force else self._check_rule_cost
+        rules = await self.store.import_rules(self.guild, data, replace, check)
+        await self.reply(ctx, f"Imported `{len(rules)}` automod rules")
+
+    async def export_rules(self, ctx: GuildContext):
+        rules = await async_expand(self.store.all_rules(self.guild))
+        if not rules:
+            await self.reply(ctx, "No rules available")
+            return
+        sorted_rules = sorted(rules, key=lambda rule: rule.name)
+        output_data = {"rules": [to_data(rule) for rule in sorted_rules]}
+        output_yaml = yaml.safe_dump(output_data, sort_keys=False)
+        await ctx.message.reply(
+            f"Exported `{len(rules)}` automod rules",
+            file=str_to_file(output_yaml, f"automod-rules-{self.guild.id}.yaml"),
+            allowed_mentions=AllowedMentions.none(),
+        )
+
+    async def show_history(
+        self,
+        ctx: GuildContext,
+        rule: Optional[str] = None,
+        limit: Optional[int] = None,
+    ):
+        # A lone number is a limit, unless there happens to be a rule by that name.
+        if (limit is None) and rule and rule.isdigit():
+            if not await self.store.get_rule(self.guild, rule):
+                rule, limit = None, int(rule)
+        limit = max(1, min(limit or DEFAULT_HISTORY_LIMIT, MAX_HISTORY_LIMIT))
+        records = self.services.evaluations.query(self.guild.id, rule, limit)
+        if not records:
+            if rule:
+                await self.reply(ctx, f"No recent evaluations of rule `{rule}`")
+            else:
+                await self.reply(ctx, "No recent evaluations")
+            return
+        header = f"Showing the last `{len(records)}` evaluations"
+        if rule:
+            header += f" of rule `{rule}`"
+        # Show them oldest first, so that they read in order.
+        lines = [record.format() for record in reversed(records)]
+        content = "\n".join([header, "```", *lines, "```"])
+        await send_message_or_file(
+            ctx,
+            content,
+            file_callback=lambda: (header, "\n".join(lines), "history.txt"),
+            allowed_mentions=AllowedMentions.none(),
+        )
+
+    async def show_shadow_report(self, ctx: GuildContext):
+        rules = [
+            rule
+            for rule in await async_expand(self.store.all_rules(self.guild))
+            if rule.shadow
+        ]
+        if not rules:
+            await self.reply(ctx, "No shadow rules available")
+            return
+        day = SHADOW_STATS_BUCKET_SECONDS * SHADOW_STATS_BUCKETS
+        lines = [f"Showing `{len(rules)}` shadow rules", "```"]
+        for rule in sorted(rules, key=lambda rule: rule.name):
+            stats = self.shadow_stats.get(rule.name)
+            if stats is None:
+                lines.append(f"{rule.name}: not evaluated yet")
+                continue
+            total = stats.total
+            percent = 100 * total.fired / (total.evaluations or 1)
+            average = 1000 * total.seconds / (total.evaluations or 1)
+            hour = stats.recent(SHADOW_STATS_BUCKET_SECONDS)
+            recent = stats.recent(day)
+            lines.append(
+                f"{rule.name}: would have fired {total.fired} of {total.evaluations}"
+                + f" times ({percent:.1f}%) since {stats.since:%Y-%m-%d %H:%M:%S}"
+            )
+            lines.append(
+                f"  last hour: {hour.fired} of {hour.evaluations},"
+                + f" last day: {recent.fired} of {recent.evaluations}"
+            )
+            lines.append(
+                f"  cost: {average:.3f}ms per evaluation,"
+                + f" {total.seconds:.3f}s in total"
+            )
+        lines.append("```")
+        content = "\n".join(lines)
+        await send_message_or_file(
+            ctx,
+            content,
+            file_callback=lambda: ("", content.strip("`"), "shadow_report.txt"),
+            allowed_mentions=AllowedMentions.none(),
+        )
 
     async def remove_rule(self, ctx: GuildContext, name: str):
         # Get the corresponding rule.
@@ -328,10 +742,14 @@ class AutomodGuildState(CogGuildState):
         path: JsonPath,
         op: JsonPathOp,
         body: str,
+        force: bool = False,
     ):
         data = self._parse_body(body)
-        rule = await self.store.modify_rule(self.guild, name, path, op, data)
-        await self.reply(ctx, f"Modified automod rule `{rule.name}`")
+        check = None if force else self._check_rule_cost
+        rule = await self.store.modify_rule(self.guild, name, path, op, data, check)
+        await self._reply_with_analysis(
+            ctx, f"Modified automod rule `{rule.name}`", rule
+        )
 
     async def enable_rule(self, ctx: GuildContext, name: str):
         rule = await self.store.enable_rule(self.guild, name)
@@ -358,6 +776,7 @@ class AutomodGuildState(CogGuildState):
         )
 
     async def on_message(self, message: TextMessage):
+        await self._cache_message(message)
         await self._do_event(events.MessageSent(self.bot, self.log, message))
 
     async def on_message_delete(self, message: TextMessage):
@@ -418,12 +837,33 @@ class AutomodGuildState(CogGuildState):
     async def on_member_remove(self, member: Member):
         await self._do_event(events.MemberLeft(self.bot, self.log, member))
 
-    async def on_member_update(self, before: Member, after: Member):
-        await self._do_event(events.MemberUpdated(self.bot, self.log, before, after))
+    async def _watches_any(
+        self, event_type: Type[AutomodEvent], changes: AttributeChanges
+    ) -> bool:
+        # Updates are frequent, so skip building events that no rule would care about.
+        if not await self.store.has_rules_for_event_type(self.guild, event_type):
+            return False
+        watched = await self.store.watched_attributes_for_event_type(
+            self.guild, event_type
+        )
+        return (watched is None) or not watched.isdisjoint(changes)
+
+    async def on_member_update(
+        self, before: Member, after: Member, changes: AttributeChanges
+    ):
+        if not await self._watches_any(events.MemberUpdated, changes):
+            return
+        await self._do_event(
+            events.MemberUpdated(self.bot, self.log, before, after, changes)
+        )
 
-    async def on_user_update(self, before: User, after: User, member: Member):
+    async def on_user_update(
+        self, before: User, after: User, member: Member, changes: AttributeChanges
+    ):
+        if not await self._watches_any(events.UserUpdated, changes):
+            return
         await self._do_event(
-            events.UserUpdated(self.bot, self.log, before, after, member)
+            events.UserUpdated(self.bot, self.log, before, after, member, changes)
         )
 
     async def on_user_ban(self, user: User):
@@ -435,10 +875,19 @@ class AutomodGuildState(CogGuildState):
     # @@ RAW EVENT HANDLERS
 
     async def on_raw_message_delete(self, payload: RawMessageDeleteEvent):
-        await self._do_event(events.RawMessageDeleted(self.bot, self.log, payload))
+        cached = self.message_cache.discard(payload.message_id)
+        await self._do_event(
+            events.RawMessageDeleted(self.bot, self.log, payload, cached)
+        )
 
     async def on_raw_message_edit(self, payload: RawMessageUpdateEvent):
-        await self._do_event(events.RawMessageEdited(self.bot, self.log, payload))
+        cached = self.message_cache.get(payload.message_id)
+        await self._do_event(
+            events.RawMessageEdited(self.bot, self.log, payload, cached)
+        )
+        # Keep the record up-to-date with the latest content, if it was provided.
+        if (content := payload.data.get("content")) is not None:
+            self.message_cache.update_content(payload.message_id, content)
 
     async def on_raw_reaction_add(self, payload: RawReactionActionEvent):
         await self._do_event(events.RawReactionAdded(self.bot, self.log, payload))
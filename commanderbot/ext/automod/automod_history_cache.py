@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Tuple
+
+from discord import Attachment, Embed, Message, Object, Role, TextChannel, Thread, User
+
+from commanderbot.ext.automod.automod_message_cache import (
+    CachedMessage,
+    CachedMessageView,
+)
+from commanderbot.lib import ChannelID, RoleID, UserID
+
+DEFAULT_HISTORY_CACHE_SIZE = 100
+DEFAULT_HISTORY_CACHE_CHANNELS = 100
+
+
+class HistoryRecord(CachedMessage):
+    """
+    A compact record of a message in a history window.
+
+    On top of what a cached message keeps, this also keeps what rules look at when
+    checking past messages: role mentions, attachments, and embeds.
+
+    Attributes
+    ----------
+    role_mention_ids
+        The IDs of roles mentioned by the message.
+    attachments
+        The attachments of the message.
+    embeds
+        The embeds of the message.
+    """
+
+    __slots__ = ("role_mention_ids", "attachments", "embeds")
+
+    def __init__(
+        self,
+        id: int,
+        channel_id: ChannelID,
+        author_id: UserID,
+        content: str,
+        mention_ids: Tuple[UserID, ...],
+        role_mention_ids: Tuple[RoleID, ...],
+        attachments: Tuple[Attachment, ...],
+        embeds: Tuple[Embed, ...],
+    ):
+        super().__init__(id, channel_id, author_id, content, mention_ids)
+        self.role_mention_ids: Tuple[RoleID, ...] = role_mention_ids
+        self.attachments: Tuple[Attachment, ...] = attachments
+        self.embeds: Tuple[Embed, ...] = embeds
+
+    @staticmethod
+    def from_message(message: Message) -> HistoryRecord:
+        return HistoryRecord(
+            id=message.id,
+            channel_id=message.channel.id,
+            author_id=message.author.id,
+            content=message.content,
+            mention_ids=tuple(user.id for user in message.mentions),
+            role_mention_ids=tuple(role.id for role in message.role_mentions),
+            attachments=tuple(message.attachments),
+            embeds=tuple(message.embeds),
+        )
+
+    def to_message(self, channel: TextChannel | Thread) -> HistoryMessageView:
+        return HistoryMessageView(self, channel)
+
+
+class HistoryMessageView(CachedMessageView):
+    """
+    A message-like view of a history record, for checking past messages.
+
+    Authors who have since left the guild are resolved to users, like they would be
+    for a message fetched from the API.
+    """
+
+    __slots__ = ()
+
+    record: HistoryRecord
+    author: Optional[User]  # type: ignore
+
+    def __init__(self, record: HistoryRecord, channel: TextChannel | Thread):
+        super().__init__(record, channel)
+        if self.author is None:
+            self.author = self._state.get_user(record.author_id)
+
+    @property
+    def role_mentions(self) -> List[Role]:
+        guild = self.channel.guild
+        roles = (guild.get_role(role_id) for role_id in self.record.role_mention_ids)
+        return [role for role in roles if role is not None]
+
+    @property
+    def embeds(self) -> List[Embed]:
+        return list(self.record.embeds)
+
+    @property
+    def attachments(self) -> List[Attachment]:
+        return list(self.record.attachments)
+
+
+@dataclass
+class ChannelHistoryWindow:
+    """
+    A contiguous window of the most recent messages in a channel.
+
+    The window is contiguous in the sense that, once backfilled, it contains every
+    message from the oldest one it holds up until the present, as long as it continues
+    to be fed live events. Only compact records are kept, not the messages themselves.
+    """
+
+    size: int
+
+    # Message IDs in ascending (chronological) order, alongside the records.
+    _ids: List[int] = field(init=False, default_factory=list)
+    _records: Dict[int, HistoryRecord] = field(init=False, default_factory=dict)
+
+    # Set once the initial backfill has completed.
+    ready: asyncio.Event = field(init=False, default_factory=asyncio.Event)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def oldest_id(self) -> Optional[int]:
+        if self._ids:
+            return self._ids[0]
+
+    def put(self, message: Message):
+        if message.id not in self._records:
+            bisect.insort(self._ids, message.id)
+        self._records[message.id] = HistoryRecord.from_message(message)
+        # Drop the oldest messages once we exceed the size of the window.
+        while len(self._ids) > self.size:
+            oldest_id = self._ids.pop(0)
+            del self._records[oldest_id]
+
+    def replace(self, message: Message):
+        if message.id in self._records:
+            self._records[message.id] = HistoryRecord.from_message(message)
+
+    def discard(self, message_id: int):
+        if self._records.pop(message_id, None) is not None:
+            self._ids.remove(message_id)
+
+    def contains(self, message_id: int) -> bool:
+        return message_id in self._records
+
+    def newest_first(self, limit: int) -> List[HistoryRecord]:
+        ids = self._ids[-limit:] if limit > 0 else []
+        return [self._records[message_id] for message_id in reversed(ids)]
+
+
+@dataclass
+class AutomodHistoryCache:
+    """
+    Keeps a rolling window of recent messages for channels that ask for history.
+
+    Windows are created (and backfilled from the API, once) the first time history is
+    requested for a channel, and are kept up-to-date by live message events from then
+    on. Requests for more messages than the window holds only hit the API for the older
+    remainder.
+
+    Windows are dropped whenever the gateway connection is (re-)established, since any
+    events missed in the meantime would otherwise leave them silently out of date.
+
+    Attributes
+    ----------
+    size
+        The maximum number of messages to keep for each channel.
+    max_channels
+        The maximum number of channels to keep windows for, least-recently-used first.
+    """
+
+    size: int = DEFAULT_HISTORY_CACHE_SIZE
+    max_channels: int = DEFAULT_HISTORY_CACHE_CHANNELS
+
+    _windows: OrderedDict[ChannelID, ChannelHistoryWindow] = field(
+        init=False, default_factory=OrderedDict
+    )
+
+    def _get_window(self, channel_id: ChannelID) -> Optional[ChannelHistoryWindow]:
+        return self._windows.get(channel_id)
+
+    async def _backfill(
+        self, channel: TextChannel | Thread, window: ChannelHistoryWindow
+    ):
+        try:
+            async for message in channel.history(limit=self.size):
+                # Anything that arrived live in the meantime is at least as fresh.
+                if not window.contains(message.id):
+                    window.put(message)
+        except:
+            # Don't leave a half-filled window lying around to be trusted later.
+            self.invalidate(channel.id)
+            raise
+        finally:
+            window.ready.set()
+
+    async def _require_window(
+        self, channel: TextChannel | Thread
+    ) -> Optional[ChannelHistoryWindow]:
+        window = self._windows.get(channel.id)
+        if window is None:
+            window = ChannelHistoryWindow(size=self.size)
+            self._windows[channel.id] = window
+            while len(self._windows) > self.max_channels:
+                self._windows.popitem(last=False)
+            await self._backfill(channel, window)
+        else:
+            self._windows.move_to_end(channel.id)
+            # Someone else may be backfilling the window already, so wait for them.
+            await window.ready.wait()
+        # The window may have been invalidated while we were waiting.
+        if self._windows.get(channel.id) is window:
+            return window
+
+    async def history(
+        self, channel: TextChannel | Thread, limit: int
+    ) -> AsyncIterable[Message]:
+        """
+        Iterate over recent messages in the channel, newest first.
+
+        Messages from the cached window are message-like views of their records.
+        """
+        window = await self._require_window(channel)
+        if window is None:
+            async for message in channel.history(limit=limit):
+                yield message
+            return
+
+        cached_records = window.newest_first(limit)
+        oldest_id = window.oldest_id
+        for record in cached_records:
+            yield record.to_message(channel)
+
+        # Only go to the API for whatever is older than the cached window.
+        remainder = limit - len(cached_records)
+        if (remainder > 0) and (oldest_id is not None):
+            before = Object(id=oldest_id)
+            async for message in channel.history(limit=remainder, before=before):
+                yield message
+
+    def invalidate(self, channel_id: ChannelID):
+        """Forget everything about the channel, forcing a backfill next time."""
+        self._windows.pop(channel_id, None)
+
+    def clear(self):
+        """Forget everything, forcing a backfill for every channel next time."""
+        self._windows.clear()
+
+    # @@ LIVE EVENTS
+
+    def on_message(self, message: Message):
+        if window := self._get_window(message.channel.id):
+            window.put(message)
+
+    def on_message_edit(self, message: Message):
+        if window := self._get_window(message.channel.id):
+            window.replace(message)
+
+    def on_raw_message_edit(
+        self, channel_id: ChannelID, message_id: int, is_cached: bool
+    ):
+        # Edits to messages that aren't in the client's own cache don't come with an
+        # updated message object, so the window can no longer be trusted.
+        if (not is_cached) and (window := self._get_window(channel_id)):
+            if window.contains(message_id):
+                self.invalidate(channel_id)
+
+    def on_raw_message_delete(self, channel_id: ChannelID, message_id: int):
+        if window := self._get_window(channel_id):
+            window.discard(message_id)
+
+    def on_raw_bulk_message_delete(
+        self, channel_id: ChannelID, message_ids: Iterable[int]
+    ):
+        if window := self._get_window(channel_id):
+            for message_id in message_ids:
+                window.discard(message_id)
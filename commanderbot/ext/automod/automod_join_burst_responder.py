@@ -0,0 +1,195 @@
+import asyncio
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from discord import AllowedMentions, Member, TextChannel, Thread
+
+from commanderbot.ext.automod.automod_fair_scheduler import create_unmetered_task
+from commanderbot.lib import GuildID, UserID
+from commanderbot.lib.utils import CHARACTER_CAP, str_to_file
+
+# The number of members to act on at once, per response. Discord's rate limits are
+# still respected by discord.py, so this is mostly about not flooding its queues.
+DEFAULT_JOIN_BURST_WORKERS = 4
+
+# How long a response waits for more members to be flagged before wrapping up.
+DEFAULT_JOIN_BURST_QUIET_PERIOD = 10.0
+
+JoinBurstOperation = Callable[[Member], Awaitable[None]]
+
+
+@dataclass
+class JoinBurstResponse:
+    """
+    An ongoing response to a join burst, collecting members to act on.
+
+    Attributes
+    ----------
+    title
+        What the response does, used to summarize it.
+    operation
+        What to do to each member.
+    summary_channel
+        Where to post the summary once the response has wrapped up, if anywhere.
+    """
+
+    title: str
+    operation: JoinBurstOperation
+    summary_channel: Optional[TextChannel | Thread]
+
+    queue: "asyncio.Queue[Member]" = field(init=False, default_factory=asyncio.Queue)
+    flagged: Set[UserID] = field(init=False, default_factory=set)
+    succeeded: List[Member] = field(init=False, default_factory=list)
+    failed: List[Tuple[Member, Exception]] = field(init=False, default_factory=list)
+    last_flagged: float = field(init=False, default=0.0)
+
+
+@dataclass
+class AutomodJoinBurstResponder:
+    """
+    Acts on members flagged during a join burst in batches, instead of one at a time.
+
+    Members flagged by the same rule are collected into a single response, and acted on
+    by a small pool of workers as they come in. Once no more members have been flagged
+    for a while (and all of them have been dealt with) the response wraps up, posting a
+    single summary instead of one log message per member.
+
+    Attributes
+    ----------
+    workers
+        The number of members to act on at once, per response.
+    quiet_period
+        The number of seconds without new members before a response wraps up.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    workers: int = DEFAULT_JOIN_BURST_WORKERS
+    quiet_period: float = DEFAULT_JOIN_BURST_QUIET_PERIOD
+
+    log: Logger = field(init=False)
+
+    _responses: Dict[Tuple[GuildID, str], JoinBurstResponse] = field(
+        init=False, default_factory=dict
+    )
+    _tasks: Dict[Tuple[GuildID, str], List[asyncio.Task]] = field(
+        init=False, default_factory=dict
+    )
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    def flag(
+        self,
+        key: str,
+        member: Member,
+        *,
+        title: str,
+        operation: JoinBurstOperation,
+        summary_channel: Optional[TextChannel | Thread] = None,
+    ):
+        """
+        Flag the member to be acted on as part of the ongoing response under `key`.
+
+        A new response is started if there isn't one ongoing already. Members that have
+        already been flagged as part of the same response are ignored.
+        """
+        response_key = (member.guild.id, key)
+        response = self._responses.get(response_key)
+        if response is None:
+            response = JoinBurstResponse(
+                title=title,
+                operation=operation,
+                summary_channel=summary_channel,
+            )
+            self._responses[response_key] = response
+            self._start(response_key, response)
+        response.last_flagged = asyncio.get_running_loop().time()
+        if member.id not in response.flagged:
+            response.flagged.add(member.id)
+            response.queue.put_nowait(member)
+
+    def stop(self):
+        for tasks in self._tasks.values():
+            for task in tasks:
+                task.cancel()
+        self._tasks.clear()
+        self._responses.clear()
+
+    def _start(self, key: Tuple[GuildID, str], response: JoinBurstResponse):
+        # These outlive the evaluation that started them, so don't charge it for them.
+        tasks = [
+            create_unmetered_task(self._work(response)) for _ in range(self.workers)
+        ]
+        tasks.append(create_unmetered_task(self._supervise(key, response, tasks[:])))
+        self._tasks[key] = tasks
+
+    async def _work(self, response: JoinBurstResponse):
+        while True:
+            member = await response.queue.get()
+            try:
+                await response.operation(member)
+            except Exception as error:
+                response.failed.append((member, error))
+            else:
+                response.succeeded.append(member)
+            finally:
+                response.queue.task_done()
+
+    async def _supervise(
+        self,
+        key: Tuple[GuildID, str],
+        response: JoinBurstResponse,
+        workers: List[asyncio.Task],
+    ):
+        loop = asyncio.get_running_loop()
+        try:
+            # Wrap up once nothing new has been flagged for a while, and all of the
+            # members that were flagged have been dealt with.
+            while True:
+                quiet_until = response.last_flagged + self.quiet_period
+                if (delay := quiet_until - loop.time()) > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                await response.queue.join()
+                if loop.time() >= response.last_flagged + self.quiet_period:
+                    break
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._tasks.pop(key, None)
+            self._responses.pop(key, None)
+        try:
+            await self._summarize(response)
+        except:
+            self.log.exception(f"Failed to summarize join burst response: {key}")
+
+    async def _summarize(self, response: JoinBurstResponse):
+        summary = (
+            f"Join burst response `{response.title}` finished:"
+            + f" `{len(response.succeeded)}` succeeded,"
+            + f" `{len(response.failed)}` failed."
+        )
+        self.log.info(summary)
+        if response.summary_channel is None:
+            return
+        allowed_mentions = AllowedMentions.none()
+        # The common case: every member was dealt with, and the list of them fits.
+        mentions = [f"- {member.mention}" for member in response.succeeded]
+        content = "\n".join([summary, *mentions])
+        if (len(content) < CHARACTER_CAP) and (not response.failed):
+            await response.summary_channel.send(
+                content, allowed_mentions=allowed_mentions
+            )
+            return
+        # Otherwise, list everyone in a file instead.
+        details = [f"{member} ({member.id})" for member in response.succeeded]
+        details.extend(
+            f"{member} ({member.id}): failed with {error}"
+            for member, error in response.failed
+        )
+        file = str_to_file("\n".join(details), "join_burst.txt")
+        await response.summary_channel.send(
+            summary, file=file, allowed_mentions=allowed_mentions
+        )
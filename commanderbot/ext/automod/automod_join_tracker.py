@@ -0,0 +1,155 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
+
+from discord import Guild, Member
+from discord.utils import utcnow
+
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.lib import GuildID, UserID
+
+# How long to remember joins for. Bursts can't be looked for over longer than this.
+DEFAULT_JOIN_TRACKER_RETENTION = timedelta(hours=1)
+
+# The maximum number of joins to remember per guild, so that a large enough raid can't
+# use up an unbounded amount of memory.
+DEFAULT_JOIN_TRACKER_SIZE = 5000
+
+# The upper bounds of each account age bucket, from youngest to oldest.
+ACCOUNT_AGE_BUCKETS: Tuple[Tuple[str, timedelta], ...] = (
+    ("1 hour", timedelta(hours=1)),
+    ("1 day", timedelta(days=1)),
+    ("1 week", timedelta(weeks=1)),
+    ("30 days", timedelta(days=30)),
+)
+
+
+@dataclass
+class JoinRecord:
+    member_id: UserID
+    joined_at: datetime
+    account_age: timedelta
+
+
+@dataclass
+class JoinBurst:
+    """
+    The joins to a guild within a window of time.
+
+    Attributes
+    ----------
+    joins
+        The joins within the window, from oldest to newest.
+    within
+        The length of the window.
+    """
+
+    joins: List[JoinRecord]
+    within: timedelta
+
+    def __len__(self) -> int:
+        return len(self.joins)
+
+    def histogram(self) -> List[Tuple[str, int]]:
+        """Count the joins by the age of the account that joined."""
+        counts = [0] * (len(ACCOUNT_AGE_BUCKETS) + 1)
+        for join in self.joins:
+            for i, (_, upper) in enumerate(ACCOUNT_AGE_BUCKETS):
+                if join.account_age < upper:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        labels = [f"< {label}" for label, _ in ACCOUNT_AGE_BUCKETS]
+        labels.append(f">= {ACCOUNT_AGE_BUCKETS[-1][0]}")
+        return list(zip(labels, counts))
+
+    def format_histogram(self) -> str:
+        return ", ".join(f"{label}: {count}" for label, count in self.histogram())
+
+    def attach_to(self, event: AutomodEvent):
+        event.set_metadata("join_burst_joins", len(self.joins))
+        event.set_metadata("join_burst_account_ages", self.format_histogram())
+
+
+@dataclass
+class AutomodJoinTracker:
+    """
+    Remembers recent joins to each guild, to be able to tell when a raid is happening.
+
+    Attributes
+    ----------
+    retention
+        How long to remember joins for.
+    size
+        The maximum number of joins to remember per guild.
+    """
+
+    retention: timedelta = DEFAULT_JOIN_TRACKER_RETENTION
+    size: int = DEFAULT_JOIN_TRACKER_SIZE
+
+    _joins: Dict[GuildID, Deque[JoinRecord]] = field(init=False, default_factory=dict)
+
+    def _expire(self, joins: Deque[JoinRecord], now: datetime):
+        cutoff = now - self.retention
+        while joins and (joins[0].joined_at <= cutoff):
+            joins.popleft()
+
+    def account_age(self, member: Member, now: Optional[datetime] = None) -> timedelta:
+        return (now or utcnow()) - member.created_at
+
+    def on_member_join(self, member: Member, now: Optional[datetime] = None):
+        now = now or utcnow()
+        joins = self._joins.get(member.guild.id)
+        if joins is None:
+            joins = deque(maxlen=self.size)
+            self._joins[member.guild.id] = joins
+        self._expire(joins, now)
+        record = JoinRecord(
+            member_id=member.id,
+            joined_at=now,
+            account_age=self.account_age(member, now),
+        )
+        joins.append(record)
+
+    def recent(
+        self,
+        guild: Guild,
+        within: timedelta,
+        account_age: Optional[timedelta] = None,
+        now: Optional[datetime] = None,
+    ) -> JoinBurst:
+        """
+        Return the guild's joins within the window, newest last.
+
+        If `account_age` is given, only joins of accounts younger than that are counted.
+        """
+        now = now or utcnow()
+        cutoff = now - within
+        recent: List[JoinRecord] = []
+        if joins := self._joins.get(guild.id):
+            self._expire(joins, now)
+            # Joins are in order, so stop as soon as one is outside of the window.
+            for join in reversed(joins):
+                if join.joined_at <= cutoff:
+                    break
+                if (account_age is None) or (join.account_age < account_age):
+                    recent.append(join)
+            recent.reverse()
+        if not joins and (guild.id in self._joins):
+            del self._joins[guild.id]
+        return JoinBurst(joins=recent, within=within)
+
+    def find_burst(
+        self,
+        guild: Guild,
+        joins: int,
+        within: timedelta,
+        account_age: Optional[timedelta] = None,
+    ) -> Optional[JoinBurst]:
+        """Return the guild's recent joins, if there are at least `joins` of them."""
+        burst = self.recent(guild, within, account_age)
+        if len(burst) >= joins:
+            return burst
+        return None
@@ -1,11 +1,15 @@
-from dataclasses import dataclass
-from typing import Any, AsyncIterable, Optional
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, FrozenSet, Iterable, List, Optional, Type
 
 from discord import Guild
 
+from commanderbot.ext.automod.automod_continuation import AutomodContinuation
 from commanderbot.ext.automod.automod_data import AutomodData
 from commanderbot.ext.automod.automod_event import AutomodEvent
-from commanderbot.ext.automod.automod_store import AutomodRule
+from commanderbot.ext.automod.automod_metrics import AutomodMetrics
+from commanderbot.ext.automod.automod_rule import AutomodRule, RuleCheck
 from commanderbot.lib import (
     CogStore,
     JsonFileDatabaseAdapter,
@@ -15,6 +19,10 @@ from commanderbot.lib import (
 )
 from commanderbot.lib.utils import JsonPath, JsonPathOp
 
+# How long continuation changes may wait before being written out. Deferring rules can
+# happen on every event, so a burst of them should cost one write instead of one each.
+CONTINUATION_FLUSH_DELAY = 1.0
+
 
 # @implements AutomodStore
 @dataclass
@@ -24,6 +32,36 @@ class AutomodJsonStore(CogStore):
     """
 
     db: JsonFileDatabaseAdapter[AutomodData]
+    metrics: Optional[AutomodMetrics] = None
+
+    _pending_flush: Optional[asyncio.Task] = field(init=False, default=None)
+
+    async def _dirty(self):
+        # Whatever was waiting to be written goes out with this write.
+        if self._pending_flush is not None:
+            self._pending_flush.cancel()
+            self._pending_flush = None
+        started = time.perf_counter()
+        await self.db.dirty()
+        if self.metrics is not None:
+            self.metrics.store_flush_seconds.observe(time.perf_counter() - started)
+
+    def _dirty_soon(self):
+        if self._pending_flush is None:
+            self._pending_flush = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(CONTINUATION_FLUSH_DELAY)
+        self._pending_flush = None
+        try:
+            await self._dirty()
+        except:
+            self.log.exception("Failed to write continuations")
+
+    # @implements AutomodStore
+    async def flush(self):
+        if self._pending_flush is not None:
+            await self._dirty()
 
     # @implements AutomodStore
     async def get_default_log_options(self, guild: Guild) -> Optional[LogOptions]:
@@ -36,7 +74,7 @@ class AutomodJsonStore(CogStore):
     ) -> Optional[LogOptions]:
         cache = await self.db.get_cache()
         old_value = await cache.set_default_log_options(guild, log_options)
-        await self.db.dirty()
+        await self._dirty()
         return old_value
 
     # @implements AutomodStore
@@ -50,7 +88,7 @@ class AutomodJsonStore(CogStore):
     ) -> Optional[RoleSet]:
         cache = await self.db.get_cache()
         old_value = await cache.set_permitted_roles(guild, permitted_roles)
-        await self.db.dirty()
+        await self._dirty()
         return old_value
 
     # @implements AutomodStore
@@ -67,6 +105,20 @@ class AutomodJsonStore(CogStore):
         async for rule in cache.rules_for_event(guild, event):
             yield rule
 
+    # @implements AutomodStore
+    async def has_rules_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> bool:
+        cache = await self.db.get_cache()
+        return await cache.has_rules_for_event_type(guild, event_type)
+
+    # @implements AutomodStore
+    async def watched_attributes_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> Optional[FrozenSet[str]]:
+        cache = await self.db.get_cache()
+        return await cache.watched_attributes_for_event_type(guild, event_type)
+
     # @implements AutomodStore
     async def query_rules(self, guild: Guild, query: str) -> AsyncIterable[AutomodRule]:
         cache = await self.db.get_cache()
@@ -84,17 +136,33 @@ class AutomodJsonStore(CogStore):
         return await cache.require_rule(guild, name)
 
     # @implements AutomodStore
-    async def add_rule(self, guild: Guild, data: JsonObject) -> AutomodRule:
+    async def add_rule(
+        self, guild: Guild, data: JsonObject, check: Optional[RuleCheck] = None
+    ) -> AutomodRule:
         cache = await self.db.get_cache()
-        added_rule = await cache.add_rule(guild, data)
-        await self.db.dirty()
+        added_rule = await cache.add_rule(guild, data, check)
+        await self._dirty()
         return added_rule
 
+    # @implements AutomodStore
+    async def import_rules(
+        self,
+        guild: Guild,
+        data: Iterable[Any],
+        replace: bool = False,
+        check: Optional[RuleCheck] = None,
+    ) -> List[AutomodRule]:
+        cache = await self.db.get_cache()
+        imported_rules = await cache.import_rules(guild, data, replace, check)
+        # Persist all of the imported rules with a single write.
+        await self._dirty()
+        return imported_rules
+
     # @implements AutomodStore
     async def remove_rule(self, guild: Guild, name: str) -> AutomodRule:
         cache = await self.db.get_cache()
         removed_rule = await cache.remove_rule(guild, name)
-        await self.db.dirty()
+        await self._dirty()
         return removed_rule
 
     # @implements AutomodStore
@@ -105,29 +173,54 @@ class AutomodJsonStore(CogStore):
         path: JsonPath,
         op: JsonPathOp,
         data: Any,
+        check: Optional[RuleCheck] = None,
     ) -> AutomodRule:
         cache = await self.db.get_cache()
-        modified_rule = await cache.modify_rule(guild, name, path, op, data)
-        await self.db.dirty()
+        modified_rule = await cache.modify_rule(guild, name, path, op, data, check)
+        await self._dirty()
         return modified_rule
 
     # @implements AutomodStore
     async def enable_rule(self, guild: Guild, name: str) -> AutomodRule:
         cache = await self.db.get_cache()
         modified_rule = await cache.enable_rule(guild, name)
-        await self.db.dirty()
+        await self._dirty()
         return modified_rule
 
     # @implements AutomodStore
     async def disable_rule(self, guild: Guild, name: str) -> AutomodRule:
         cache = await self.db.get_cache()
         modified_rule = await cache.disable_rule(guild, name)
-        await self.db.dirty()
+        await self._dirty()
         return modified_rule
 
     # @implements AutomodStore
     async def increment_rule_hits(self, guild: Guild, name: str) -> AutomodRule:
         cache = await self.db.get_cache()
         modified_rule = await cache.increment_rule_hits(guild, name)
-        await self.db.dirty()
+        await self._dirty()
         return modified_rule
+
+    # @implements AutomodStore
+    async def all_continuations(
+        self, guild: Guild
+    ) -> AsyncIterable[AutomodContinuation]:
+        cache = await self.db.get_cache()
+        async for continuation in cache.all_continuations(guild):
+            yield continuation
+
+    # @implements AutomodStore
+    async def add_continuation(self, guild: Guild, continuation: AutomodContinuation):
+        cache = await self.db.get_cache()
+        await cache.add_continuation(guild, continuation)
+        self._dirty_soon()
+
+    # @implements AutomodStore
+    async def remove_continuation(
+        self, guild: Guild, id: str
+    ) -> Optional[AutomodContinuation]:
+        cache = await self.db.get_cache()
+        removed_continuation = await cache.remove_continuation(guild, id)
+        if removed_continuation is not None:
+            self._dirty_soon()
+        return removed_continuation
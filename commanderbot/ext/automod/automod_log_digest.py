@@ -0,0 +1,163 @@
+import asyncio
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import Dict, List, Optional, Set
+
+from discord import TextChannel, Thread
+
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.lib import AllowedMentions, ChannelID
+from commanderbot.lib.utils import CHARACTER_CAP, str_to_file
+
+DEFAULT_LOG_DIGEST_WINDOW = 5.0
+
+
+@dataclass
+class LogDigestEntry:
+    content: str
+    allowed_mentions: AllowedMentions
+    attachment: Optional[str] = None
+
+
+@dataclass
+class AutomodLogDigest:
+    """
+    Coalesces log messages per channel, so that they can be sent together.
+
+    Entries added within a window of each other are flushed together, packed into as few
+    messages as they fit into. Entries with an attached message, or that are too long to
+    fit into a message by themselves, are sent on their own with a file attachment.
+
+    Attributes
+    ----------
+    window
+        The number of seconds to collect entries for before flushing a channel.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    window: float = DEFAULT_LOG_DIGEST_WINDOW
+
+    log: Logger = field(init=False)
+
+    _pending: Dict[ChannelID, List[LogDigestEntry]] = field(
+        init=False, default_factory=dict
+    )
+    _channels: Dict[ChannelID, TextChannel | Thread] = field(
+        init=False, default_factory=dict
+    )
+    _flushers: Dict[ChannelID, asyncio.Task] = field(init=False, default_factory=dict)
+    _final_flushes: Set[asyncio.Task] = field(init=False, default_factory=set)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+
+    def add(
+        self,
+        channel: TextChannel | Thread,
+        content: str,
+        *,
+        allowed_mentions: Optional[AllowedMentions] = None,
+        attachment: Optional[str] = None,
+    ):
+        """Add an entry to the next digest for the channel."""
+        entry = LogDigestEntry(
+            content=content,
+            allowed_mentions=allowed_mentions or AllowedMentions.none(),
+            attachment=attachment,
+        )
+        self._pending.setdefault(channel.id, []).append(entry)
+        self._channels[channel.id] = channel
+        if channel.id not in self._flushers:
+            task = create_metered_task(self._flush_later(channel))
+            self._flushers[channel.id] = task
+
+    @property
+    def pending(self) -> int:
+        """The number of log messages waiting to be sent, across all channels."""
+        return sum(len(entries) for entries in self._pending.values())
+
+    def stop(self):
+        # Don't wait out the window, but don't drop what's already been logged either.
+        for task in self._flushers.values():
+            task.cancel()
+        self._flushers.clear()
+        for channel_id in list(self._pending):
+            channel = self._channels[channel_id]
+            task = asyncio.create_task(self._flush_pending(channel))
+            self._final_flushes.add(task)
+            task.add_done_callback(self._final_flushes.discard)
+
+    async def _flush_later(self, channel: TextChannel | Thread):
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._flushers.pop(channel.id, None)
+        await self._flush_pending(channel)
+
+    async def _flush_pending(self, channel: TextChannel | Thread):
+        # Anything added from here on out goes into the next digest.
+        self._channels.pop(channel.id, None)
+        if entries := self._pending.pop(channel.id, None):
+            try:
+                await self._flush(channel, entries)
+            except:
+                self.log.exception(
+                    f"Failed to flush {len(entries)} log entries to channel {channel.id}"
+                )
+
+    def _resolve_allowed_mentions(
+        self, entries: List[LogDigestEntry]
+    ) -> AllowedMentions:
+        # Only allow mentions if every entry agrees on which ones to allow.
+        first = entries[0].allowed_mentions
+        if all(
+            entry.allowed_mentions.to_dict() == first.to_dict() for entry in entries
+        ):
+            return first
+        return AllowedMentions.none()
+
+    async def _flush(
+        self, channel: TextChannel | Thread, entries: List[LogDigestEntry]
+    ):
+        # Pack as many entries into each message as will fit, in order. Entries that
+        # have to be sent as a file are sent by themselves.
+        batch: List[LogDigestEntry] = []
+        batch_length = 0
+        for entry in entries:
+            if entry.attachment or (len(entry.content) >= CHARACTER_CAP):
+                await self._send_batch(channel, batch)
+                batch, batch_length = [], 0
+                await self._send_file(channel, entry)
+                continue
+            # Account for the newline joining this entry to the previous one.
+            entry_length = len(entry.content) + (1 if batch else 0)
+            if batch_length + entry_length >= CHARACTER_CAP:
+                await self._send_batch(channel, batch)
+                batch, batch_length = [], 0
+                entry_length = len(entry.content)
+            batch.append(entry)
+            batch_length += entry_length
+        await self._send_batch(channel, batch)
+
+    async def _send_batch(
+        self, channel: TextChannel | Thread, batch: List[LogDigestEntry]
+    ):
+        if batch:
+            content = "\n".join(entry.content for entry in batch)
+            allowed_mentions = self._resolve_allowed_mentions(batch)
+            await channel.send(content, allowed_mentions=allowed_mentions)
+
+    async def _send_file(self, channel: TextChannel | Thread, entry: LogDigestEntry):
+        # The entry is sent as-is if it fits, with the attached message (if any) as a
+        # file. Otherwise the entry itself goes into the file, too.
+        if len(entry.content) < CHARACTER_CAP:
+            content = entry.content
+            file = str_to_file(entry.attachment or "", "message.md")
+        else:
+            content = "Log entry too long to send as a message, attached."
+            file_parts = [entry.content]
+            if entry.attachment:
+                file_parts.append(f"---\n\n### Attached message\n\n{entry.attachment}")
+            file = str_to_file("\n\n".join(file_parts), "log.md")
+        await channel.send(content, file=file, allowed_mentions=entry.allowed_mentions)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from discord import Member, Message, PartialMessage, TextChannel, Thread
+from discord.utils import escape_mentions
+
+from commanderbot.lib import ChannelID, UserID
+
+# A rough estimate of the fixed cost of a single record, including its slots and its
+# entry in the cache's ordered dict. Content and mentions are measured separately.
+RECORD_OVERHEAD = 200
+
+DEFAULT_MESSAGE_CACHE_BUDGET = 1_000_000
+
+
+class CachedMessage:
+    """
+    A compact record of a message, detached from any library objects.
+
+    Attributes
+    ----------
+    id
+        The ID of the message.
+    channel_id
+        The ID of the channel the message was sent in.
+    author_id
+        The ID of the message author.
+    content
+        The content of the message, as of the last time it was seen.
+    mention_ids
+        The IDs of users mentioned by the message.
+    size
+        The estimated memory footprint of the record, in bytes.
+    """
+
+    __slots__ = ("id", "channel_id", "author_id", "content", "mention_ids", "size")
+
+    def __init__(
+        self,
+        id: int,
+        channel_id: ChannelID,
+        author_id: UserID,
+        content: str,
+        mention_ids: Tuple[UserID, ...],
+    ):
+        self.id: int = id
+        self.channel_id: ChannelID = channel_id
+        self.author_id: UserID = author_id
+        self.content: str = content
+        self.mention_ids: Tuple[UserID, ...] = mention_ids
+        self.size: int = self._measure()
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} id={self.id} channel_id={self.channel_id}"
+            + f" author_id={self.author_id} size={self.size}>"
+        )
+
+    @staticmethod
+    def from_message(message: Message) -> CachedMessage:
+        return CachedMessage(
+            id=message.id,
+            channel_id=message.channel.id,
+            author_id=message.author.id,
+            content=message.content,
+            mention_ids=tuple(user.id for user in message.mentions),
+        )
+
+    def _measure(self) -> int:
+        return (
+            RECORD_OVERHEAD
+            + sys.getsizeof(self.content)
+            + sys.getsizeof(self.mention_ids)
+        )
+
+    def set_content(self, content: str):
+        self.content = content
+        self.size = self._measure()
+
+    def to_message(self, channel: TextChannel | Thread) -> CachedMessageView:
+        return CachedMessageView(self, channel)
+
+
+class CachedMessageView(PartialMessage):
+    """
+    A message-like view of a cached record, for when the message itself is gone.
+
+    This is a partial message, so actions can still act on the message by ID (where it
+    still exists). On top of that, it has the cached content and author for conditions
+    to read. Anything that wasn't cached, such as embeds and attachments, is empty.
+    """
+
+    __slots__ = ("record", "author")
+
+    def __init__(self, record: CachedMessage, channel: TextChannel | Thread):
+        super().__init__(channel=channel, id=record.id)
+        self.record: CachedMessage = record
+        self.author: Optional[Member] = channel.guild.get_member(record.author_id)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} record={self.record!r}>"
+
+    @property
+    def content(self) -> str:
+        return self.record.content
+
+    @property
+    def clean_content(self) -> str:
+        return escape_mentions(self.record.content)
+
+    @property
+    def mentions(self) -> List[Member]:
+        guild = self.channel.guild
+        members = (guild.get_member(user_id) for user_id in self.record.mention_ids)
+        return [member for member in members if member is not None]
+
+    @property
+    def role_mentions(self) -> List:
+        return []
+
+    @property
+    def embeds(self) -> List:
+        return []
+
+    @property
+    def attachments(self) -> List:
+        return []
+
+
+@dataclass
+class AutomodMessageCache:
+    """
+    A least-recently-used cache of compact message records, bounded by size.
+
+    This exists so that rules for raw events can see message content even when the
+    message has fallen out of (or never made it into) the client's own message cache.
+
+    Attributes
+    ----------
+    budget
+        The maximum estimated size of all records combined, in bytes.
+    """
+
+    budget: int = DEFAULT_MESSAGE_CACHE_BUDGET
+
+    _records: OrderedDict[int, CachedMessage] = field(
+        init=False, default_factory=OrderedDict
+    )
+    _size: int = field(init=False, default=0)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _evict(self):
+        while (self._size > self.budget) and self._records:
+            _, record = self._records.popitem(last=False)
+            self._size -= record.size
+
+    def put(self, message: Message):
+        """Add or replace the record for the given message."""
+        self.discard(message.id)
+        record = CachedMessage.from_message(message)
+        # Don't bother with records that could never fit.
+        if record.size > self.budget:
+            return
+        self._records[record.id] = record
+        self._size += record.size
+        self._evict()
+
+    def get(self, message_id: int) -> Optional[CachedMessage]:
+        """Return the record for the given message, if any, and mark it as used."""
+        if record := self._records.get(message_id):
+            self._records.move_to_end(message_id)
+            return record
+
+    def update_content(self, message_id: int, content: str):
+        """Update the content of an existing record, if any."""
+        if record := self._records.get(message_id):
+            self._size -= record.size
+            record.set_content(content)
+            self._size += record.size
+            self._records.move_to_end(message_id)
+            self._evict()
+
+    def discard(self, message_id: int) -> Optional[CachedMessage]:
+        """Remove and return the record for the given message, if any."""
+        if record := self._records.pop(message_id, None):
+            self._size -= record.size
+            return record
+
+    def clear(self):
+        self._records.clear()
+        self._size = 0
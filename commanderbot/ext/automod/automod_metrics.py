@@ -0,0 +1,274 @@
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from logging import Logger, getLogger
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+# Latency buckets, in seconds, from half a millisecond up to a few seconds.
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    # The exposition format spells these out, and they can't be turned into an int.
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A value per set of labels, which only ever goes up."""
+
+    __slots__ = ("name", "help", "label_names", "_values")
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = label_names
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        for labels, value in self._values.items():
+            formatted = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}{formatted} {_format_value(value)}")
+
+
+class Gauge:
+    """A value per set of labels, which is only looked up when scraped."""
+
+    __slots__ = ("name", "help", "label_names", "_collect")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Iterable[Tuple[Labels, float]]],
+        label_names: Tuple[str, ...] = (),
+    ):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = label_names
+        self._collect: Callable[[], Iterable[Tuple[Labels, float]]] = collect
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} gauge")
+        for labels, value in self._collect():
+            formatted = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}{formatted} {_format_value(value)}")
+
+
+class Histogram:
+    """
+    Counts observations per set of labels into fixed buckets.
+
+    Observations are only counted into the one bucket they fall into; buckets are made
+    cumulative when scraped instead, so that observing stays cheap.
+    """
+
+    __slots__ = ("name", "help", "label_names", "buckets", "_counts", "_sums")
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = label_names
+        self.buckets: Tuple[float, ...] = buckets
+        # One count per bucket, plus one for anything larger than the largest bucket.
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, labels: Labels = ()):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = [0] * (len(self.buckets) + 1)
+            self._counts[labels] = counts
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] = self._sums.get(labels, 0.0) + value
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                formatted = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{formatted} {cumulative}")
+            formatted = _format_labels(self.label_names, labels)
+            sum_value = _format_value(self._sums[labels])
+            lines.append(f"{self.name}_sum{formatted} {sum_value}")
+            lines.append(f"{self.name}_count{formatted} {cumulative}")
+
+
+def parse_metrics_address(address: str) -> Tuple[str, int]:
+    """Parse a `host:port` bind address, where the host may be omitted."""
+    host, _, port = address.rpartition(":")
+    return (host.strip("[]") or "127.0.0.1"), int(port)
+
+
+@dataclass
+class AutomodMetrics:
+    """
+    Counts what automod is doing, and optionally serves it to Prometheus.
+
+    Everything is recorded and read on the event loop, so there is nothing to lock.
+    Recording is a dict lookup and an addition; all formatting is left until scraped.
+
+    Attributes
+    ----------
+    address
+        The `host:port` to serve metrics on, if any.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    address: Optional[str] = None
+
+    log: Logger = field(init=False)
+
+    events_received: Counter = field(init=False)
+    events_dispatched: Counter = field(init=False)
+    rules_polled: Counter = field(init=False)
+    rules_passed: Counter = field(init=False)
+    action_failures: Counter = field(init=False)
+    evaluation_seconds: Histogram = field(init=False)
+    store_flush_seconds: Histogram = field(init=False)
+
+    _gauges: List[Gauge] = field(init=False, default_factory=list)
+    _runner: Optional[web.AppRunner] = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+        self.events_received = Counter(
+            "automod_events_received_total",
+            "Events received, by type.",
+            ("event_type",),
+        )
+        self.events_dispatched = Counter(
+            "automod_events_dispatched_total",
+            "Events dispatched to rules, by type.",
+            ("event_type",),
+        )
+        self.rules_polled = Counter(
+            "automod_rules_polled_total",
+            "Rules triggered by an event, by guild.",
+            ("guild_id",),
+        )
+        self.rules_passed = Counter(
+            "automod_rules_passed_total",
+            "Rules whose conditions passed, by guild.",
+            ("guild_id",),
+        )
+        self.action_failures = Counter(
+            "automod_action_failures_total",
+            "Actions that raised an error, by type.",
+            ("action_type",),
+        )
+        self.evaluation_seconds = Histogram(
+            "automod_evaluation_seconds",
+            "Time spent on the event loop evaluating rules for an event, by type.",
+            ("event_type",),
+        )
+        self.store_flush_seconds = Histogram(
+            "automod_store_flush_seconds",
+            "Time spent writing the store to its database.",
+        )
+
+    def add_gauge(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Iterable[Tuple[Labels, float]]],
+        label_names: Tuple[str, ...] = (),
+    ):
+        """Add a gauge, whose values are looked up whenever metrics are scraped."""
+        self._gauges.append(Gauge(name, help, collect, label_names))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (
+            self.events_received,
+            self.events_dispatched,
+            self.rules_polled,
+            self.rules_passed,
+            self.action_failures,
+            self.evaluation_seconds,
+            self.store_flush_seconds,
+            *self._gauges,
+        ):
+            metric.render(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self.render().encode("utf-8"),
+            headers={"Content-Type": METRICS_CONTENT_TYPE},
+        )
+
+    async def start(self):
+        """Start serving metrics, if an address was given."""
+        if (self.address is None) or (self._runner is not None):
+            return
+        host, port = parse_metrics_address(self.address)
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError:
+            # A bad or busy address shouldn't take the rest of the cog down with it.
+            self.log.exception(f"Failed to serve metrics on {host}:{port}")
+            await runner.cleanup()
+            return
+        self._runner = runner
+        self.log.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -1,8 +1,35 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+from commanderbot.ext.automod.automod_content_analyzer import (
+    DEFAULT_ANALYSIS_OFFLOAD_THRESHOLD,
+    DEFAULT_ANALYSIS_TIMEOUT,
+    DEFAULT_ANALYSIS_WORKERS,
+)
+from commanderbot.ext.automod.automod_content_extractor import (
+    DEFAULT_ATTACHMENT_CACHE_TTL,
+    DEFAULT_ATTACHMENT_MAX_SIZE,
+)
+from commanderbot.ext.automod.automod_evaluation_history import (
+    DEFAULT_EVALUATION_HISTORY_SIZE,
+)
+from commanderbot.ext.automod.automod_fair_scheduler import (
+    DEFAULT_EVALUATION_CONCURRENCY,
+    DEFAULT_GUILD_TIME_BUDGET,
+    DEFAULT_GUILD_TIME_WINDOW,
+)
+from commanderbot.ext.automod.automod_history_cache import (
+    DEFAULT_HISTORY_CACHE_CHANNELS,
+    DEFAULT_HISTORY_CACHE_SIZE,
+)
+from commanderbot.ext.automod.automod_join_burst_responder import (
+    DEFAULT_JOIN_BURST_WORKERS,
+)
+from commanderbot.ext.automod.automod_log_digest import DEFAULT_LOG_DIGEST_WINDOW
+from commanderbot.ext.automod.automod_message_cache import DEFAULT_MESSAGE_CACHE_BUDGET
+from commanderbot.ext.automod.automod_rule_analysis import DEFAULT_RULE_COST_BUDGET
 from commanderbot.lib import (
     DatabaseOptions,
     InMemoryDatabaseOptions,
@@ -12,9 +39,137 @@ from commanderbot.lib import (
 
 @dataclass
 class AutomodOptions:
+    """
+    Attributes
+    ----------
+    database
+        The database used to persist rules and guild configuration.
+    message_cache_budget
+        The approximate number of bytes each guild may use to remember recent messages
+        on behalf of rules that listen for raw message events.
+    history_cache_size
+        The number of recent messages to remember for each channel that rules look
+        through the history of.
+    history_cache_channels
+        The maximum number of channels to remember recent history for.
+    log_digest_window
+        The number of seconds to collect digested log messages for before sending them.
+    rule_cost_budget
+        The estimated cost per event that new or modified rules may not exceed, unless
+        forced. Roughly speaking, a request to Discord costs 10.
+    guild_time_budget
+        The number of seconds each guild may spend evaluating rules (on the event loop)
+        per window, before being throttled and skipping low-priority rules.
+    guild_time_window
+        The number of seconds to account for time spent per guild over.
+    evaluation_concurrency
+        The maximum number of evaluation steps to hand out turns to at once, across
+        all guilds. Turns are only held while a step runs on the event loop.
+    join_burst_workers
+        The number of members to act on at once when responding to a join burst.
+    evaluation_history_size
+        The number of recent rule evaluations to remember per guild, for auditing.
+    evaluation_history_spill
+        The path of a JSON Lines file to move older evaluations into, if any. The file
+        is rotated as it grows, so that it doesn't grow without bound.
+    analysis_workers
+        The number of worker processes to analyze large message content in, so that it
+        doesn't hold up the event loop. Zero (the default) analyzes everything inline.
+    analysis_offload_threshold
+        The amount of work (characters of content times number of patterns) from which
+        content is analyzed in a worker process, if enabled.
+    analysis_timeout
+        The number of seconds a worker process may take to analyze message content,
+        before the analysis fails and the worker pool is replaced.
+    attachment_max_size
+        The largest text attachment that rules may read the text of, in bytes.
+    attachment_cache_ttl
+        The number of seconds to remember the text of an attachment for.
+    metrics_address
+        The `host:port` to serve Prometheus metrics on (at `/metrics`), if any. Metrics
+        are not served unless this is given.
+    """
+
     database: DatabaseOptions = field(default_factory=InMemoryDatabaseOptions)
 
+    message_cache_budget: int = DEFAULT_MESSAGE_CACHE_BUDGET
+
+    history_cache_size: int = DEFAULT_HISTORY_CACHE_SIZE
+
+    history_cache_channels: int = DEFAULT_HISTORY_CACHE_CHANNELS
+
+    log_digest_window: float = DEFAULT_LOG_DIGEST_WINDOW
+
+    rule_cost_budget: float = DEFAULT_RULE_COST_BUDGET
+
+    guild_time_budget: float = DEFAULT_GUILD_TIME_BUDGET
+
+    guild_time_window: float = DEFAULT_GUILD_TIME_WINDOW
+
+    evaluation_concurrency: int = DEFAULT_EVALUATION_CONCURRENCY
+
+    join_burst_workers: int = DEFAULT_JOIN_BURST_WORKERS
+
+    evaluation_history_size: int = DEFAULT_EVALUATION_HISTORY_SIZE
+
+    evaluation_history_spill: Optional[str] = None
+
+    analysis_workers: int = DEFAULT_ANALYSIS_WORKERS
+
+    analysis_offload_threshold: int = DEFAULT_ANALYSIS_OFFLOAD_THRESHOLD
+
+    analysis_timeout: float = DEFAULT_ANALYSIS_TIMEOUT
+
+    attachment_max_size: int = DEFAULT_ATTACHMENT_MAX_SIZE
+
+    attachment_cache_ttl: float = DEFAULT_ATTACHMENT_CACHE_TTL
+
+    metrics_address: Optional[str] = None
+
     @staticmethod
     def from_dict(options: Dict[str, Any]) -> AutomodOptions:
         database_options = make_database_options(options.get("database"))
-        return AutomodOptions(database=database_options)
+        return AutomodOptions(
+            database=database_options,
+            message_cache_budget=options.get(
+                "message_cache_budget", DEFAULT_MESSAGE_CACHE_BUDGET
+            ),
+            history_cache_size=options.get(
+                "history_cache_size", DEFAULT_HISTORY_CACHE_SIZE
+            ),
+            history_cache_channels=options.get(
+                "history_cache_channels", DEFAULT_HISTORY_CACHE_CHANNELS
+            ),
+            log_digest_window=options.get(
+                "log_digest_window", DEFAULT_LOG_DIGEST_WINDOW
+            ),
+            rule_cost_budget=options.get("rule_cost_budget", DEFAULT_RULE_COST_BUDGET),
+            guild_time_budget=options.get(
+                "guild_time_budget", DEFAULT_GUILD_TIME_BUDGET
+            ),
+            guild_time_window=options.get(
+                "guild_time_window", DEFAULT_GUILD_TIME_WINDOW
+            ),
+            evaluation_concurrency=options.get(
+                "evaluation_concurrency", DEFAULT_EVALUATION_CONCURRENCY
+            ),
+            join_burst_workers=options.get(
+                "join_burst_workers", DEFAULT_JOIN_BURST_WORKERS
+            ),
+            evaluation_history_size=options.get(
+                "evaluation_history_size", DEFAULT_EVALUATION_HISTORY_SIZE
+            ),
+            evaluation_history_spill=options.get("evaluation_history_spill"),
+            analysis_workers=options.get("analysis_workers", DEFAULT_ANALYSIS_WORKERS),
+            analysis_offload_threshold=options.get(
+                "analysis_offload_threshold", DEFAULT_ANALYSIS_OFFLOAD_THRESHOLD
+            ),
+            analysis_timeout=options.get("analysis_timeout", DEFAULT_ANALYSIS_TIMEOUT),
+            attachment_max_size=options.get(
+                "attachment_max_size", DEFAULT_ATTACHMENT_MAX_SIZE
+            ),
+            attachment_cache_ttl=options.get(
+                "attachment_cache_ttl", DEFAULT_ATTACHMENT_CACHE_TTL
+            ),
+            metrics_address=options.get("metrics_address"),
+        )
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, List, Optional, Set, Type, TypeVar
 
 from commanderbot.ext.automod.automod_action import AutomodAction, deserialize_actions
 from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
+    check_condition,
     deserialize_conditions,
 )
+from commanderbot.ext.automod.automod_continuation import ACTIONS, CONDITIONS
+from commanderbot.ext.automod.automod_evaluation_history import EvaluationTrace
 from commanderbot.ext.automod.automod_event import AutomodEvent
 from commanderbot.ext.automod.automod_trigger import (
     AutomodTrigger,
@@ -17,6 +20,42 @@ from commanderbot.ext.automod.automod_trigger import (
 from commanderbot.lib import JsonObject, LogOptions
 from commanderbot.lib.utils import datetime_from_field_optional
 
+ET = TypeVar("ET")
+
+
+def rebuild_entities(
+    entities: List[ET],
+    old_data: List[Any],
+    new_data: List[Any],
+    deserialize: Callable[[List[Any]], List[ET]],
+) -> List[ET]:
+    """
+    Rebuild a list of entities from modified data, reusing any that didn't change.
+
+    Entities are matched up by their serialized form rather than by position, so that
+    inserting or removing an entry doesn't cause everything after it to be rebuilt.
+    """
+    unused = list(zip(old_data, entities))
+    rebuilt: List[ET] = []
+    for value in new_data:
+        for i, (old_value, entity) in enumerate(unused):
+            if old_value == value:
+                rebuilt.append(entity)
+                del unused[i]
+                break
+        else:
+            rebuilt.extend(deserialize([value]))
+    return rebuilt
+
+
+# Called to defer the rest of a rule, given the stage and index to resume from.
+DeferCallback = Callable[
+    ["AutomodRule", AutomodEvent, str, int, timedelta], Awaitable[None]
+]
+
+# Called to vet a new or modified rule before it's stored, raising to reject it.
+RuleCheck = Callable[["AutomodRule"], None]
+
 
 @dataclass
 class AutomodRule:
@@ -46,6 +85,13 @@ class AutomodRule:
         A list of conditions that must *all* pass for the actions to run.
     actions
         A list of actions that will all run if the conditions pass.
+    priority
+        How important the rule is. Rules with a negative priority are skipped while the
+        guild is over its evaluation budget. Defaults to 0.
+    shadow
+        Whether the rule is in shadow mode. Shadow rules are evaluated as usual, but
+        their actions are never applied; they are only recorded. Shadow rules run after
+        all other rules, and are the first to be skipped under load. Defaults to false.
     """
 
     name: str
@@ -61,6 +107,9 @@ class AutomodRule:
     conditions: List[AutomodCondition]
     actions: List[AutomodAction]
 
+    priority: int = 0
+    shadow: bool = False
+
     @staticmethod
     def from_data(data: JsonObject) -> AutomodRule:
         now = datetime.utcnow()
@@ -77,11 +126,57 @@ class AutomodRule:
             triggers=deserialize_triggers(data.get("triggers", [])),
             conditions=deserialize_conditions(data.get("conditions", [])),
             actions=deserialize_actions(data.get("actions", [])),
+            priority=data.get("priority", 0),
+            shadow=data.get("shadow", False),
         )
 
     def __hash__(self) -> int:
         return hash(self.name)
 
+    @property
+    def event_types(self) -> Set[Type[AutomodEvent]]:
+        """The types of events that may trigger the rule."""
+        return {
+            event_type
+            for trigger in self.triggers
+            for event_type in trigger.event_types
+        }
+
+    def rebuild_from_data(self, data: JsonObject, old_data: JsonObject) -> AutomodRule:
+        """
+        Create a new rule from modified data, sharing what didn't change with this one.
+
+        Only the triggers, conditions, and actions that differ from `old_data` are
+        deserialized again; the rest are carried over as-is, along with anything they
+        have already compiled.
+        """
+
+        def rebuild(key: str, entities: List[ET], deserialize) -> List[ET]:
+            return rebuild_entities(
+                entities, old_data.get(key, []), data.get(key, []), deserialize
+            )
+
+        now = datetime.utcnow()
+        added_on = datetime_from_field_optional(data, "added_on") or now
+        modified_on = datetime_from_field_optional(data, "modified_on") or now
+        log = self.log
+        if data.get("log") != old_data.get("log"):
+            log = LogOptions.from_field_optional(data, "log")
+        return AutomodRule(
+            name=data["name"],
+            added_on=added_on,
+            modified_on=modified_on,
+            disabled=data.get("disabled", False),
+            hits=data.get("hits", 0),
+            description=data.get("description"),
+            log=log,
+            triggers=rebuild("triggers", self.triggers, deserialize_triggers),
+            conditions=rebuild("conditions", self.conditions, deserialize_conditions),
+            actions=rebuild("actions", self.actions, deserialize_actions),
+            priority=data.get("priority", 0),
+            shadow=data.get("shadow", False),
+        )
+
     def build_title(self) -> str:
         parts = []
         if self.disabled:
@@ -98,21 +193,103 @@ class AutomodRule:
                 return True
         return False
 
-    async def check_conditions(self, event: AutomodEvent) -> bool:
-        """Check whether all conditions pass."""
-        for condition in self.conditions:
-            if not await condition.check(event):
+    async def check_conditions(
+        self,
+        event: AutomodEvent,
+        start: int = 0,
+        defer: Optional[DeferCallback] = None,
+        trace: Optional[EvaluationTrace] = None,
+    ) -> Optional[bool]:
+        """
+        Check whether all conditions pass.
+
+        If a `defer` callback is given and a deferring condition is encountered, the
+        rest of the rule is handed off to the callback and `None` is returned.
+
+        If a `trace` is given, the outcome of each condition is recorded to it.
+        """
+        for index in range(start, len(self.conditions)):
+            condition = self.conditions[index]
+            if defer and ((delay := condition.get_deferral()) is not None):
+                await defer(self, event, CONDITIONS, index + 1, delay)
+                if trace:
+                    trace.deferred = True
+                return None
+            passed = await check_condition(condition, event)
+            if trace:
+                trace.condition(condition.get_type_string(), passed)
+            if not passed:
                 return False
         return True
 
-    async def apply_actions(self, event: AutomodEvent):
-        """Apply all actions."""
-        for action in self.actions:
-            await action.apply(event)
+    async def apply_actions(
+        self,
+        event: AutomodEvent,
+        start: int = 0,
+        defer: Optional[DeferCallback] = None,
+        trace: Optional[EvaluationTrace] = None,
+    ):
+        """
+        Apply all actions.
+
+        If a `defer` callback is given and a deferring action is encountered, the rest
+        of the actions are handed off to the callback instead of being applied.
+
+        If a `trace` is given, the result of each action is recorded to it.
 
-    async def run(self, event: AutomodEvent) -> bool:
+        Shadow rules never apply their actions, but they are still recorded.
+        """
+        for index in range(start, len(self.actions)):
+            action = self.actions[index]
+            if self.shadow:
+                if trace:
+                    trace.shadow = True
+                    trace.action(action.get_type_string())
+                continue
+            if defer and ((delay := action.get_deferral()) is not None):
+                await defer(self, event, ACTIONS, index + 1, delay)
+                if trace:
+                    trace.deferred = True
+                return
+            if not trace:
+                await action.apply(event)
+                continue
+            try:
+                await action.apply(event)
+            except Exception as error:
+                trace.action(action.get_type_string(), error)
+                raise
+            trace.action(action.get_type_string())
+
+    async def run(
+        self,
+        event: AutomodEvent,
+        defer: Optional[DeferCallback] = None,
+        trace: Optional[EvaluationTrace] = None,
+    ) -> bool:
         """Apply actions if conditions pass."""
-        if (not self.disabled) and await self.check_conditions(event):
-            await self.apply_actions(event)
+        if self.disabled:
+            return False
+        return await self.resume(event, CONDITIONS, 0, defer, trace)
+
+    async def resume(
+        self,
+        event: AutomodEvent,
+        stage: str,
+        index: int,
+        defer: Optional[DeferCallback] = None,
+        trace: Optional[EvaluationTrace] = None,
+    ) -> bool:
+        """
+        Continue running the rule from the given stage and index.
+
+        Returns whether the conditions passed as a result of this call, which is never
+        the case when resuming from the actions stage.
+        """
+        if stage == ACTIONS:
+            await self.apply_actions(event, index, defer, trace)
+            return False
+        if await self.check_conditions(event, index, defer, trace):
+            await self.apply_actions(event, 0, defer, trace)
             return True
         return False
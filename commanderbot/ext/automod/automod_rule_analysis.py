@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Iterable, List
+
+from commanderbot.lib import ResponsiveException
+
+if TYPE_CHECKING:
+    from commanderbot.ext.automod.automod_rule import AutomodRule
+
+# The (rough, relative) cost of a single request to the Discord API. Everything else
+# is measured against a cheap, in-memory check costing 1.
+REQUEST_COST = 10.0
+
+# The cost of persisting and scheduling a deferred continuation.
+DEFERRAL_COST = 5.0
+
+# Deferrals at least this long are worth warning about on frequent events, since every
+# one of them is kept around until it's due.
+LONG_DEFERRAL = timedelta(minutes=10)
+
+DEFAULT_RULE_COST_BUDGET = 250.0
+
+
+@dataclass
+class RuleFinding:
+    entity: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"`{self.entity}`: {self.message}"
+
+
+@dataclass
+class AutomodRuleAnalysis:
+    """
+    The result of statically analyzing a rule, ahead of it ever running.
+
+    Entities contribute to the analysis through their `analyze` method, by adding to
+    the estimated cost and reporting anything that looks expensive.
+
+    Attributes
+    ----------
+    cost
+        The estimated cost of running the rule once, for a single event. See
+        `REQUEST_COST` for a sense of scale.
+    frequent
+        Whether the rule runs on frequent events (such as every message) without being
+        scoped down by its triggers.
+    conditional
+        Whether the rule has any conditions to narrow down when its actions apply.
+    findings
+        Potential problems found with the rule.
+    """
+
+    cost: float = 0.0
+    frequent: bool = False
+    conditional: bool = False
+    findings: List[RuleFinding] = field(default_factory=list)
+
+    def add_cost(self, cost: float):
+        self.cost += cost
+
+    def warn(self, entity: Any, message: str):
+        self.findings.append(RuleFinding(entity.get_type_string(), message))
+
+    def add_frequent_trigger(self, entity: Any, scoped: bool, what: str):
+        """Note a trigger for frequent events, which may be scoped down to fewer."""
+        if not scoped:
+            self.frequent = True
+            self.warn(
+                entity,
+                f"Runs for every {what} in every channel; consider scoping it down"
+                + " using `channels`",
+            )
+
+    def add_deferral(self, entity: Any, delay: timedelta):
+        self.add_cost(DEFERRAL_COST)
+        if self.frequent and (delay >= LONG_DEFERRAL):
+            self.warn(
+                entity,
+                f"Defers the rest of the rule by {delay} for every event, and each of"
+                + " those is kept around until it's due",
+            )
+
+    def analyze_entities(self, entities: Iterable[Any]):
+        for entity in entities:
+            entity.analyze(self)
+
+    def measure(self, entities: Iterable[Any], conditional: bool) -> float:
+        """
+        Analyze nested entities, returning their cost instead of adding to it.
+
+        Use `conditional` to say whether the nested entities have their own conditions.
+        """
+        outer_cost, outer_conditional = self.cost, self.conditional
+        self.cost, self.conditional = 0.0, conditional
+        try:
+            self.analyze_entities(entities)
+            return self.cost
+        finally:
+            self.cost, self.conditional = outer_cost, outer_conditional
+
+    def format_lines(self) -> List[str]:
+        lines = [f"Estimated cost per event: `{self.cost:g}`"]
+        lines.extend(f"- {finding}" for finding in self.findings)
+        return lines
+
+
+def analyze_rule(rule: AutomodRule) -> AutomodRuleAnalysis:
+    analysis = AutomodRuleAnalysis(conditional=bool(rule.conditions))
+    # Triggers go first, so that conditions and actions know how often they'll run.
+    analysis.analyze_entities(rule.triggers)
+    analysis.analyze_entities(rule.conditions)
+    analysis.analyze_entities(rule.actions)
+    return analysis
+
+
+class AutomodRuleOverBudget(ResponsiveException):
+    def __init__(self, rule: AutomodRule, analysis: AutomodRuleAnalysis, budget: float):
+        self.rule: AutomodRule = rule
+        self.analysis: AutomodRuleAnalysis = analysis
+        self.budget: float = budget
+        lines = [
+            f"Rule `{rule.name}` is estimated to cost more than the budget of"
+            + f" `{budget:g}` per event:",
+            *analysis.format_lines(),
+            "Use `--force` to save it anyway.",
+        ]
+        super().__init__("\n".join(lines))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Tuple, Type
+
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule import AutomodRule
+
+RulesByName = Mapping[str, AutomodRule]
+RulesByEventType = Mapping[Type[AutomodEvent], Tuple[AutomodRule, ...]]
+
+
+class AutomodRuleSet:
+    """
+    An immutable snapshot of a guild's rules, indexed for event dispatch.
+
+    Rule sets are never modified once created. Changes produce a new rule set instead,
+    which is then swapped in as a whole, so that anything still iterating over the old
+    one (such as an in-flight event) continues to see a consistent set of rules without
+    needing to hold a lock.
+
+    Attributes
+    ----------
+    rules
+        All rules, indexed by name.
+    rules_by_event_type
+        Rules grouped by the types of events that may trigger them.
+    """
+
+    __slots__ = ("rules", "rules_by_event_type", "_watched_attributes")
+
+    def __init__(
+        self,
+        rules: Dict[str, AutomodRule],
+        rules_by_event_type: Dict[Type[AutomodEvent], Tuple[AutomodRule, ...]],
+    ):
+        # NOTE Takes ownership of the given dicts, which must not be modified after.
+        self.rules: RulesByName = MappingProxyType(rules)
+        self.rules_by_event_type: RulesByEventType = MappingProxyType(
+            rules_by_event_type
+        )
+        # Built lazily, since only update events ever ask for it.
+        self._watched_attributes: Dict[
+            Type[AutomodEvent], Optional[FrozenSet[str]]
+        ] = {}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    @staticmethod
+    def empty() -> AutomodRuleSet:
+        return AutomodRuleSet({}, {})
+
+    @staticmethod
+    def build(rules: Iterable[AutomodRule]) -> AutomodRuleSet:
+        rules_by_name: Dict[str, AutomodRule] = {}
+        by_event_type: Dict[Type[AutomodEvent], Tuple[AutomodRule, ...]] = {}
+        for rule in rules:
+            rules_by_name[rule.name] = rule
+            for event_type in rule.event_types:
+                by_event_type[event_type] = by_event_type.get(event_type, ()) + (rule,)
+        return AutomodRuleSet(rules_by_name, by_event_type)
+
+    def get(self, name: str) -> Optional[AutomodRule]:
+        return self.rules.get(name)
+
+    def rules_for_event_type(
+        self, event_type: Type[AutomodEvent]
+    ) -> Tuple[AutomodRule, ...]:
+        return self.rules_by_event_type.get(event_type, ())
+
+    def watched_attributes(
+        self, event_type: Type[AutomodEvent]
+    ) -> Optional[FrozenSet[str]]:
+        """
+        Return the attributes that any rule for the event type watches for changes to.
+
+        Returns `None` if at least one of the rules cares about every attribute.
+        """
+        try:
+            return self._watched_attributes[event_type]
+        except KeyError:
+            pass
+        watched: Optional[FrozenSet[str]] = frozenset()
+        for rule in self.rules_for_event_type(event_type):
+            for trigger in rule.triggers:
+                if event_type not in trigger.event_types:
+                    continue
+                attributes = trigger.get_watched_attributes()
+                if attributes is None:
+                    watched = None
+                    break
+                watched = watched.union(attributes)
+            if watched is None:
+                break
+        self._watched_attributes[event_type] = watched
+        return watched
+
+    def replacing(
+        self, old_rule: Optional[AutomodRule], new_rule: Optional[AutomodRule]
+    ) -> AutomodRuleSet:
+        """
+        Return a new rule set with `old_rule` swapped out for `new_rule`.
+
+        Either may be omitted, to add or remove a rule respectively. Only the parts of
+        the index that the rules are actually involved in are rebuilt.
+        """
+        rules = dict(self.rules)
+        by_event_type = dict(self.rules_by_event_type)
+
+        if old_rule is not None:
+            del rules[old_rule.name]
+            for event_type in old_rule.event_types:
+                remaining = tuple(
+                    rule
+                    for rule in by_event_type.get(event_type, ())
+                    if rule is not old_rule
+                )
+                if remaining:
+                    by_event_type[event_type] = remaining
+                else:
+                    by_event_type.pop(event_type, None)
+
+        if new_rule is not None:
+            rules[new_rule.name] = new_rule
+            for event_type in new_rule.event_types:
+                by_event_type[event_type] = by_event_type.get(event_type, ()) + (
+                    new_rule,
+                )
+
+        return AutomodRuleSet(rules, by_event_type)
+
+    def adding(self, rule: AutomodRule) -> AutomodRuleSet:
+        return self.replacing(None, rule)
+
+    def removing(self, rule: AutomodRule) -> AutomodRuleSet:
+        return self.replacing(rule, None)
@@ -0,0 +1,89 @@
+import asyncio
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging import Logger, getLogger
+from typing import Awaitable, Callable, Set, Tuple
+
+from discord.ext.tasks import loop
+
+from commanderbot.ext.automod.automod_continuation import AutomodContinuation
+from commanderbot.lib import GuildID, TimerWheel
+
+# The number of seconds represented by a single tick of the timer wheel.
+TICK_SECONDS = 1.0
+
+EPOCH = datetime(1970, 1, 1)
+
+ResumeCallback = Callable[[GuildID, AutomodContinuation], Awaitable[None]]
+
+
+def datetime_to_tick(dt: datetime) -> int:
+    # Round up, so that nothing is ever resumed before it's due.
+    return math.ceil((dt - EPOCH).total_seconds() / TICK_SECONDS)
+
+
+@dataclass
+class AutomodScheduler:
+    """
+    Resumes deferred rules once they are due.
+
+    Pending continuations are kept in a hierarchical timer wheel, so that scheduling
+    and ticking remain cheap no matter how many rules are waiting. Only the data needed
+    to resume a rule is held onto; the original event and its library objects are not.
+
+    Attributes
+    ----------
+    resume
+        Called with each continuation once it is due.
+    log
+        A logger named in a uniquely identifiable way.
+    """
+
+    resume: ResumeCallback
+
+    log: Logger = field(init=False)
+
+    _wheel: TimerWheel[Tuple[GuildID, AutomodContinuation]] = field(init=False)
+    _tasks: Set[asyncio.Task] = field(init=False, default_factory=set)
+
+    def __post_init__(self):
+        self.log = getLogger(f"{self.__class__.__name__}#{id(self)}")
+        self._wheel = TimerWheel()
+        self._wheel.advance(datetime_to_tick(datetime.utcnow()))
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of continuations waiting to be resumed."""
+        return len(self._wheel)
+
+    def start(self):
+        self._tick.start()
+
+    def stop(self):
+        self._tick.cancel()
+        for task in self._tasks:
+            task.cancel()
+
+    def schedule(self, guild_id: GuildID, continuation: AutomodContinuation):
+        """Schedule a continuation to be resumed when it's due."""
+        due_tick = datetime_to_tick(continuation.due)
+        self._wheel.add(due_tick, (guild_id, continuation))
+
+    async def _resume(self, guild_id: GuildID, continuation: AutomodContinuation):
+        try:
+            await self.resume(guild_id, continuation)
+        except:
+            self.log.exception(
+                f"Failed to resume continuation {continuation.id}"
+                + f" for rule `{continuation.rule_name}` in guild {guild_id}"
+            )
+
+    @loop(seconds=TICK_SECONDS)
+    async def _tick(self):
+        now_tick = datetime_to_tick(datetime.utcnow())
+        for guild_id, continuation in self._wheel.advance(now_tick):
+            # Resume in the background, so that a slow rule can't hold up the wheel.
+            task = asyncio.create_task(self._resume(guild_id, continuation))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
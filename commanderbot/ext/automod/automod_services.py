@@ -0,0 +1,66 @@
+from dataclasses import dataclass, field
+
+from commanderbot.ext.automod.automod_content_analyzer import AutomodContentAnalyzer
+from commanderbot.ext.automod.automod_content_extractor import AutomodContentExtractor
+from commanderbot.ext.automod.automod_deletion_batcher import AutomodDeletionBatcher
+from commanderbot.ext.automod.automod_evaluation_history import AutomodEvaluationHistory
+from commanderbot.ext.automod.automod_history_cache import AutomodHistoryCache
+from commanderbot.ext.automod.automod_join_burst_responder import (
+    AutomodJoinBurstResponder,
+)
+from commanderbot.ext.automod.automod_join_tracker import AutomodJoinTracker
+from commanderbot.ext.automod.automod_log_digest import AutomodLogDigest
+from commanderbot.ext.automod.automod_metrics import AutomodMetrics
+
+
+@dataclass
+class AutomodServices:
+    """
+    Long-lived helpers that are shared by every rule, across all guilds.
+
+    These are attached to events before rules run, so that triggers, conditions and
+    actions can make use of them without reaching back into the cog.
+
+    Attributes
+    ----------
+    history
+        A cache of recent channel history, fed by live message events.
+    deletions
+        Batches message deletions per channel into bulk deletes.
+    log_digest
+        Coalesces log messages per channel into periodic digests.
+    joins
+        Remembers recent joins to each guild, fed by live member events.
+    join_bursts
+        Acts on members flagged during join bursts in batches.
+    evaluations
+        Remembers recent rule evaluations in each guild, for auditing.
+    analyzer
+        Runs CPU-heavy content analysis, offloading large payloads if enabled.
+    content
+        Extracts the text of messages, including embeds and small text attachments.
+    metrics
+        Counts what automod is doing, and optionally serves it to Prometheus.
+    """
+
+    history: AutomodHistoryCache = field(default_factory=AutomodHistoryCache)
+    deletions: AutomodDeletionBatcher = field(default_factory=AutomodDeletionBatcher)
+    log_digest: AutomodLogDigest = field(default_factory=AutomodLogDigest)
+    joins: AutomodJoinTracker = field(default_factory=AutomodJoinTracker)
+    join_bursts: AutomodJoinBurstResponder = field(
+        default_factory=AutomodJoinBurstResponder
+    )
+    evaluations: AutomodEvaluationHistory = field(
+        default_factory=AutomodEvaluationHistory
+    )
+    analyzer: AutomodContentAnalyzer = field(default_factory=AutomodContentAnalyzer)
+    content: AutomodContentExtractor = field(default_factory=AutomodContentExtractor)
+    metrics: AutomodMetrics = field(default_factory=AutomodMetrics)
+
+    def stop(self):
+        self.deletions.stop()
+        self.log_digest.stop()
+        self.join_bursts.stop()
+        self.evaluations.stop()
+        self.analyzer.stop()
+        self.content.stop()
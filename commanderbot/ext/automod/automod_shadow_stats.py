@@ -0,0 +1,95 @@
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from discord.utils import utcnow
+
+# The granularity of the recent history kept for each shadow rule.
+SHADOW_STATS_BUCKET_SECONDS = 3600.0
+
+# The number of buckets of recent history to keep for each shadow rule.
+SHADOW_STATS_BUCKETS = 24
+
+
+@dataclass
+class ShadowBucket:
+    start: float
+    evaluations: int = 0
+    fired: int = 0
+    seconds: float = 0.0
+
+    def add(self, fired: bool, seconds: float):
+        self.evaluations += 1
+        self.fired += int(fired)
+        self.seconds += seconds
+
+
+@dataclass
+class ShadowRuleStats:
+    """
+    How a shadow rule has been doing since it was first evaluated.
+
+    Attributes
+    ----------
+    since
+        When the rule was first evaluated.
+    total
+        Totals since the rule was first evaluated.
+    """
+
+    since: datetime = field(default_factory=utcnow)
+    total: ShadowBucket = field(default_factory=lambda: ShadowBucket(start=0.0))
+
+    _buckets: Deque[ShadowBucket] = field(
+        init=False, default_factory=lambda: deque(maxlen=SHADOW_STATS_BUCKETS)
+    )
+
+    def add(self, fired: bool, seconds: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        start = now - (now % SHADOW_STATS_BUCKET_SECONDS)
+        if (not self._buckets) or (self._buckets[-1].start < start):
+            self._buckets.append(ShadowBucket(start=start))
+        self._buckets[-1].add(fired, seconds)
+        self.total.add(fired, seconds)
+
+    def recent(self, within: float, now: Optional[float] = None) -> ShadowBucket:
+        """Sum up the buckets that started within the given number of seconds."""
+        now = time.monotonic() if now is None else now
+        cutoff = now - within
+        summed = ShadowBucket(start=cutoff)
+        for bucket in self._buckets:
+            if bucket.start + SHADOW_STATS_BUCKET_SECONDS > cutoff:
+                summed.evaluations += bucket.evaluations
+                summed.fired += bucket.fired
+                summed.seconds += bucket.seconds
+        return summed
+
+
+@dataclass
+class AutomodShadowStats:
+    """
+    Keeps track of how often shadow rules would have fired, and what they cost.
+
+    Shadow rules are evaluated like any other rule, except that their actions are not
+    applied. This is what makes it possible to gauge a rule before letting it act.
+    """
+
+    _rules: Dict[str, ShadowRuleStats] = field(init=False, default_factory=dict)
+
+    def add(self, rule_name: str, fired: bool, seconds: float):
+        stats = self._rules.get(rule_name)
+        if stats is None:
+            stats = ShadowRuleStats()
+            self._rules[rule_name] = stats
+        stats.add(fired, seconds)
+
+    def get(self, rule_name: str) -> Optional[ShadowRuleStats]:
+        return self._rules.get(rule_name)
+
+    def items(self) -> Iterable[Tuple[str, ShadowRuleStats]]:
+        return self._rules.items()
+
+    def discard(self, rule_name: str):
+        self._rules.pop(rule_name, None)
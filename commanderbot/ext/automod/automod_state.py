@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 
+from discord import AllowedMentions
+
+from commanderbot.ext.automod.automod_fair_scheduler import AutomodFairScheduler
 from commanderbot.ext.automod.automod_guild_state import AutomodGuildState
 from commanderbot.ext.automod.automod_store import AutomodStore
-from commanderbot.lib import GuildPartitionedCogState
+from commanderbot.lib import GuildContext, GuildPartitionedCogState
+from commanderbot.lib.utils import send_message_or_file
 
 
 @dataclass
@@ -12,3 +16,35 @@ class AutomodState(GuildPartitionedCogState[AutomodGuildState]):
     """
 
     store: AutomodStore
+    fair_scheduler: AutomodFairScheduler
+
+    async def show_usage(self, ctx: GuildContext):
+        scheduler = self.fair_scheduler
+        snapshots = scheduler.snapshot()
+        lines = [
+            f"Budget: `{scheduler.budget:g}s` per `{scheduler.window:g}s` per guild"
+            + f" (`{scheduler.running}/{scheduler.concurrency}` steps running)",
+        ]
+        if not snapshots:
+            lines.append("No rules have been evaluated yet")
+        else:
+            lines.append("```")
+            for snapshot in snapshots:
+                guild = self.bot.get_guild(snapshot.guild_id)
+                guild_name = guild.name if guild else "(Unknown guild)"
+                percent = 100 * snapshot.seconds / (scheduler.budget or 1.0)
+                status = "throttled" if snapshot.degraded else "ok"
+                lines.append(
+                    f"{snapshot.guild_id} {guild_name}: {snapshot.seconds:.3f}s"
+                    + f" ({percent:.0f}%) over {snapshot.evaluations} evaluations,"
+                    + f" {snapshot.running} running, {snapshot.waiting} waiting"
+                    + f" [{status}]"
+                )
+            lines.append("```")
+        content = "\n".join(lines)
+        await send_message_or_file(
+            ctx,
+            content,
+            file_callback=lambda: ("", content.strip("`"), "usage.txt"),
+            allowed_mentions=AllowedMentions.none(),
+        )
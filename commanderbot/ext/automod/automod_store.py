@@ -1,9 +1,19 @@
-from typing import Any, AsyncIterable, Optional, Protocol
+from typing import (
+    Any,
+    AsyncIterable,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Type,
+)
 
 from discord import Guild
 
+from commanderbot.ext.automod.automod_continuation import AutomodContinuation
 from commanderbot.ext.automod.automod_event import AutomodEvent
-from commanderbot.ext.automod.automod_rule import AutomodRule
+from commanderbot.ext.automod.automod_rule import AutomodRule, RuleCheck
 from commanderbot.lib import JsonObject, LogOptions, RoleSet
 from commanderbot.lib.utils import JsonPath, JsonPathOp
 
@@ -37,6 +47,16 @@ class AutomodStore(Protocol):
     ) -> AsyncIterable[AutomodRule]:
         ...
 
+    async def has_rules_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> bool:
+        ...
+
+    async def watched_attributes_for_event_type(
+        self, guild: Guild, event_type: Type[AutomodEvent]
+    ) -> Optional[FrozenSet[str]]:
+        ...
+
     def query_rules(self, guild: Guild, query: str) -> AsyncIterable[AutomodRule]:
         ...
 
@@ -46,7 +66,18 @@ class AutomodStore(Protocol):
     async def require_rule(self, guild: Guild, name: str) -> AutomodRule:
         ...
 
-    async def add_rule(self, guild: Guild, data: JsonObject) -> AutomodRule:
+    async def add_rule(
+        self, guild: Guild, data: JsonObject, check: Optional[RuleCheck] = None
+    ) -> AutomodRule:
+        ...
+
+    async def import_rules(
+        self,
+        guild: Guild,
+        data: Iterable[Any],
+        replace: bool = False,
+        check: Optional[RuleCheck] = None,
+    ) -> List[AutomodRule]:
         ...
 
     async def remove_rule(self, guild: Guild, name: str) -> AutomodRule:
@@ -59,6 +90,7 @@ class AutomodStore(Protocol):
         path: JsonPath,
         op: JsonPathOp,
         data: Any,
+        check: Optional[RuleCheck] = None,
     ) -> AutomodRule:
         ...
 
@@ -70,3 +102,17 @@ class AutomodStore(Protocol):
 
     async def increment_rule_hits(self, guild: Guild, name: str) -> AutomodRule:
         ...
+
+    def all_continuations(self, guild: Guild) -> AsyncIterable[AutomodContinuation]:
+        ...
+
+    async def add_continuation(self, guild: Guild, continuation: AutomodContinuation):
+        ...
+
+    async def remove_continuation(
+        self, guild: Guild, id: str
+    ) -> Optional[AutomodContinuation]:
+        ...
+
+    async def flush(self):
+        ...
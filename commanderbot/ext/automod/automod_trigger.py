@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import (
     Any,
     ClassVar,
+    FrozenSet,
     Iterable,
     List,
     Optional,
@@ -31,6 +32,9 @@ class AutomodTrigger(AutomodEntity, Protocol):
     def poll(self, event: AutomodEvent) -> Optional[bool]:
         """Check whether an event activates the trigger."""
 
+    def get_watched_attributes(self) -> Optional[FrozenSet[str]]:
+        """Return the attributes whose changes the trigger cares about, if limited."""
+
 
 # @implements AutomodTrigger
 @dataclass
@@ -49,6 +53,9 @@ class AutomodTriggerBase(AutomodEntityBase):
 
     event_types: ClassVar[Tuple[Type[AutomodEvent], ...]] = tuple()
 
+    # Polling a trigger is cheap enough to not be worth counting.
+    cost = 0.0
+
     description: Optional[str]
 
     @classmethod
@@ -72,6 +79,10 @@ class AutomodTriggerBase(AutomodEntityBase):
         """Override this if more than just the event type needs to be checked."""
         return False
 
+    def get_watched_attributes(self) -> Optional[FrozenSet[str]]:
+        """Override this if the trigger only cares about changes to some attributes."""
+        return None
+
 
 def deserialize_triggers(data: Iterable[Any]) -> List[AutomodTrigger]:
     return deserialize_entities(
@@ -0,0 +1,81 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from commanderbot.ext.automod.automod_condition import (
+    AutomodCondition,
+    AutomodConditionBase,
+    check_condition,
+)
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_fair_scheduler import create_metered_task
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
+
+
+@dataclass
+class ConditionGroupBase(AutomodConditionBase):
+    """
+    Base for conditions that combine the results of a group of sub-conditions.
+
+    Attributes
+    ----------
+    conditions
+        The sub-conditions to check.
+    parallel
+        Whether to check sub-conditions concurrently instead of one after another. Any
+        sub-conditions still running are cancelled as soon as the outcome is known.
+    max_concurrency
+        The maximum number of sub-conditions to check at once, when checking them in
+        parallel. Unlimited by default.
+    """
+
+    conditions: Tuple[AutomodCondition]
+    parallel: Optional[bool] = None
+    max_concurrency: Optional[int] = None
+
+    # @overrides AutomodConditionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_cost(self.cost)
+        analysis.analyze_entities(self.conditions)
+
+    async def find_results(
+        self, event: AutomodEvent, result: bool, count: int = 1
+    ) -> bool:
+        """Return whether at least `count` sub-conditions evaluate to `result`."""
+        if self.parallel:
+            return await self._find_results_parallel(event, result, count)
+        found = 0
+        for condition in self.conditions:
+            if await check_condition(condition, event) == result:
+                found += 1
+                if found >= count:
+                    return True
+        return False
+
+    async def _find_results_parallel(
+        self, event: AutomodEvent, result: bool, count: int
+    ) -> bool:
+        semaphore = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+
+        async def check(condition: AutomodCondition) -> bool:
+            if semaphore is None:
+                return await check_condition(condition, event)
+            async with semaphore:
+                return await check_condition(condition, event)
+
+        tasks = [create_metered_task(check(condition)) for condition in self.conditions]
+        try:
+            found = 0
+            for next_done in asyncio.as_completed(tasks):
+                if await next_done == result:
+                    found += 1
+                    if found >= count:
+                        return True
+            return False
+        finally:
+            # Short-circuit: nobody cares about the rest anymore.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -11,6 +11,8 @@ ST = TypeVar("ST")
 
 @dataclass
 class TargetIsBotBase(AutomodConditionBase):
+    pure = True
+
     def get_target(self, event: AutomodEvent) -> Optional[Member]:
         raise NotImplementedError()
 
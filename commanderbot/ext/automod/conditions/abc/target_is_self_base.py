@@ -11,6 +11,8 @@ ST = TypeVar("ST")
 
 @dataclass
 class TargetIsSelfBase(AutomodConditionBase):
+    pure = True
+
     def get_target(self, event: AutomodEvent) -> Optional[Member]:
         raise NotImplementedError()
 
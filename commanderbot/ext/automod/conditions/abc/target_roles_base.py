@@ -13,6 +13,8 @@ ST = TypeVar("ST")
 
 @dataclass
 class TargetRolesBase(AutomodConditionBase):
+    pure = True
+
     roles: RolesGuard
 
     @classmethod
@@ -1,19 +1,21 @@
 from dataclasses import dataclass
-from typing import Optional, Tuple, Type, TypeVar
+from typing import Optional, Type, TypeVar
 
 from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
-    AutomodConditionBase,
     deserialize_conditions,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.conditions.abc.condition_group_base import (
+    ConditionGroupBase,
+)
 from commanderbot.lib import JsonObject
 
 ST = TypeVar("ST")
 
 
 @dataclass
-class AnyOf(AutomodConditionBase):
+class AnyOf(ConditionGroupBase):
     """
     Check if a number of sub-conditions pass (logical OR).
 
@@ -21,12 +23,16 @@ class AnyOf(AutomodConditionBase):
     ----------
     conditions
         The sub-conditions to check.
+    parallel
+        Whether to check sub-conditions concurrently, stopping early once the outcome
+        is known.
+    max_concurrency
+        The maximum number of sub-conditions to check at once, when in parallel.
     count
         The number of sub-conditions that must pass. If unspecified, only a single
         sub-condition is required to pass.
     """
 
-    conditions: Tuple[AutomodCondition]
     count: Optional[int] = None
 
     @classmethod
@@ -36,17 +42,13 @@ class AnyOf(AutomodConditionBase):
         return cls(
             description=data.get("description"),
             conditions=conditions,
+            parallel=data.get("parallel"),
+            max_concurrency=data.get("max_concurrency"),
             count=data.get("count"),
         )
 
     async def check(self, event: AutomodEvent) -> bool:
-        remainder = self.count or 1
-        for condition in self.conditions:
-            if await condition.check(event):
-                remainder -= 1
-                if remainder <= 0:
-                    return True
-        return False
+        return await self.find_results(event, True, self.count or 1)
 
 
 def create_condition(data: JsonObject) -> AutomodCondition:
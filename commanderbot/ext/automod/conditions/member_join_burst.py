@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Type, TypeVar
+
+from discord import Guild
+
+from commanderbot.ext.automod.automod_condition import (
+    AutomodCondition,
+    AutomodConditionBase,
+)
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.lib import JsonObject
+from commanderbot.lib.utils import timedelta_from_field, timedelta_from_field_optional
+
+ST = TypeVar("ST")
+
+
+@dataclass
+class MemberJoinBurst(AutomodConditionBase):
+    """
+    Check if the guild in context is seeing a burst of joins.
+
+    The joins that make up the burst are attached to the event as `join_burst_joins`,
+    along with a breakdown of their account ages as `join_burst_account_ages`.
+
+    Attributes
+    ----------
+    joins
+        The number of joins that make up a burst.
+    within
+        The window of time to count joins within.
+    account_age
+        If specified, only accounts younger than this are counted towards a burst.
+    """
+
+    joins: int
+    within: timedelta
+    account_age: Optional[timedelta] = None
+
+    @classmethod
+    def from_data(cls: Type[ST], data: JsonObject) -> ST:
+        within = timedelta_from_field(data, "within")
+        account_age = timedelta_from_field_optional(data, "account_age")
+        return cls(
+            description=data.get("description"),
+            joins=data["joins"],
+            within=within,
+            account_age=account_age,
+        )
+
+    def get_guild(self, event: AutomodEvent) -> Optional[Guild]:
+        if member := (event.member or event.author or event.actor):
+            return member.guild
+        if channel := event.channel:
+            return channel.guild
+        return None
+
+    async def check(self, event: AutomodEvent) -> bool:
+        guild = self.get_guild(event)
+        if (guild is None) or (event.services is None):
+            return False
+        burst = event.services.joins.find_burst(
+            guild, self.joins, self.within, self.account_age
+        )
+        if burst is None:
+            return False
+        burst.attach_to(event)
+        return True
+
+
+def create_condition(data: JsonObject) -> AutomodCondition:
+    return MemberJoinBurst.from_data(data)
@@ -6,6 +6,7 @@ from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
     AutomodConditionBase,
 )
+from commanderbot.ext.automod.automod_content_extractor import extract_message_content
 from commanderbot.ext.automod.automod_event import AutomodEvent
 from commanderbot.lib import JsonObject
 
@@ -35,13 +36,21 @@ class MessageContentContains(AutomodConditionBase):
         Whether to use unicode normalization or process the string as-is.
     normalization_form
         If enabled, the type of normalization to apply. Defaults to NFKD.
+    include_embeds
+        Whether to also look at the text of the message's embeds.
+    include_attachments
+        Whether to also look at the text of the message's (small) text attachments.
     """
 
+    pure = True
+
     contains: Tuple[str]
     count: Optional[int] = None
     ignore_case: Optional[bool] = None
     use_normalization: Optional[bool] = None
     normalization_form: Optional[str] = None
+    include_embeds: Optional[bool] = None
+    include_attachments: Optional[bool] = None
 
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
@@ -60,15 +69,20 @@ class MessageContentContains(AutomodConditionBase):
             ignore_case=ignore_case,
             use_normalization=data.get("use_normalization"),
             normalization_form=data.get("normalization_form"),
+            include_embeds=data.get("include_embeds"),
+            include_attachments=data.get("include_attachments"),
         )
 
     async def check(self, event: AutomodEvent) -> bool:
-        message = event.message
+        # Grab the message content (and anything else that was asked for).
+        content = await extract_message_content(
+            event,
+            embeds=bool(self.include_embeds),
+            attachments=bool(self.include_attachments),
+        )
         # Short-circuit if there's no message or the message is empty.
-        if not (message and message.content):
+        if not content:
             return False
-        # Grab the message content.
-        content = str(message.content)
         # Normalize the message content, if enabled.
         if self.use_normalization:
             normalization_form = self.normalization_form or DEFAULT_NORMALIZATION_FORM
@@ -1,4 +1,3 @@
-import unicodedata
 from dataclasses import dataclass
 from typing import Optional, Tuple, Type, TypeVar
 
@@ -6,7 +5,10 @@ from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
     AutomodConditionBase,
 )
+from commanderbot.ext.automod.automod_content_analyzer import count_pattern_matches
+from commanderbot.ext.automod.automod_content_extractor import extract_message_content
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.lib import JsonObject, PatternWrapper
 
 ST = TypeVar("ST")
@@ -35,13 +37,24 @@ class MessageContentMatches(AutomodConditionBase):
         Whether to use unicode normalization or process the string as-is.
     normalization_form
         If enabled, the type of normalization to apply. Defaults to NFKD.
+    include_embeds
+        Whether to also look at the text of the message's embeds.
+    include_attachments
+        Whether to also look at the text of the message's (small) text attachments.
     """
 
+    pure = True
+
+    # Per pattern.
+    cost = 2.0
+
     matches: Tuple[PatternWrapper]
     count: Optional[int] = None
     use_search: Optional[bool] = None
     use_normalization: Optional[bool] = None
     normalization_form: Optional[str] = None
+    include_embeds: Optional[bool] = None
+    include_attachments: Optional[bool] = None
 
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
@@ -57,36 +70,52 @@ class MessageContentMatches(AutomodConditionBase):
             use_search=data.get("use_search"),
             use_normalization=data.get("use_normalization"),
             normalization_form=data.get("normalization_form"),
+            include_embeds=data.get("include_embeds"),
+            include_attachments=data.get("include_attachments"),
         )
 
-    def is_match(self, pattern: PatternWrapper, content: str) -> bool:
-        if self.use_search:
-            match = pattern.search(content)
-            return bool(match)
-        match = pattern.match(content)
-        return bool(match)
+    # @overrides AutomodConditionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_cost(self.cost * len(self.matches))
+        for match in self.matches:
+            if match.pattern.has_backtracking_risk():
+                analysis.warn(
+                    self,
+                    f"Pattern `{match.pattern.pattern}` nests unbounded quantifiers,"
+                    + " which risks catastrophic backtracking",
+                )
 
     async def check(self, event: AutomodEvent) -> bool:
-        message = event.message
+        # Grab the message content (and anything else that was asked for).
+        content = await extract_message_content(
+            event,
+            embeds=bool(self.include_embeds),
+            attachments=bool(self.include_attachments),
+        )
         # Short-circuit if there's no message or the message is empty.
-        if not (message and message.content):
+        if not content:
             return False
-        # Grab the message content.
-        content = str(message.content)
-        # Normalize the message content, if enabled.
+        normalization_form = None
         if self.use_normalization:
             normalization_form = self.normalization_form or DEFAULT_NORMALIZATION_FORM
-            content = unicodedata.normalize(normalization_form, content)
+        patterns = [match.pattern for match in self.matches]
+        # Large messages may be analyzed elsewhere, so as not to hold up the event loop.
+        if event.services is not None:
+            return await event.services.analyzer.count_matches(
+                content,
+                patterns,
+                search=bool(self.use_search),
+                normalization_form=normalization_form,
+                count=self.count,
+            )
         # Check for a sufficient number of matches.
-        remainder = self.count or len(self.matches)
-        for pattern in self.matches:
-            # If there's a match, adjust the counter and check if we're done.
-            if self.is_match(pattern, content):
-                remainder -= 1
-                if remainder <= 0:
-                    return True
-        # If we got this far, there weren't enough matches.
-        return False
+        return count_pattern_matches(
+            content,
+            patterns,
+            bool(self.use_search),
+            normalization_form,
+            self.count or len(patterns),
+        )
 
 
 def create_condition(data: JsonObject) -> AutomodCondition:
@@ -23,6 +23,8 @@ class MessageHasAttachments(AutomodConditionBase):
         The number of attachments to check for, if bounded.
     """
 
+    pure = True
+
     count: Optional[IntegerRange] = None
 
     @classmethod
@@ -23,6 +23,8 @@ class MessageHasEmbeds(AutomodConditionBase):
         The number of embeds to check for, if bounded.
     """
 
+    pure = True
+
     count: Optional[IntegerRange] = None
 
     @classmethod
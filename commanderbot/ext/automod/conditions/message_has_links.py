@@ -1,12 +1,13 @@
-from dataclasses import dataclass
-from typing import Optional, Type, TypeVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Type, TypeVar
 
 from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
     AutomodConditionBase,
 )
+from commanderbot.ext.automod.automod_content_extractor import extract_message_content
 from commanderbot.ext.automod.automod_event import AutomodEvent
-from commanderbot.lib import JsonObject
+from commanderbot.lib import DomainSet, JsonObject, Link, extract_links
 from commanderbot.lib.integer_range import IntegerRange
 
 ST = TypeVar("ST")
@@ -17,16 +18,44 @@ class MessageHasLinks(AutomodConditionBase):
     """
     Check if the message has links.
 
+    The domains of the matching links are attached to the event as `link_domains`.
+
     Attributes
     ----------
     count
         The number of links to check for, if bounded.
+    allowed_domains
+        Domains to ignore links to, including their subdomains.
+    denied_domains
+        Domains to look for links to, including their subdomains. If specified, links to
+        any other domain are ignored. If a domain is covered by both allowed and denied
+        domains, the more specific of the two wins.
+    lenient
+        Whether to also look for bare domains (such as `example.com`) and defanged links
+        (such as `hxxps://example[.]com`).
+    include_embeds
+        Whether to also look at the text of the message's embeds.
+    include_attachments
+        Whether to also look at the text of the message's (small) text attachments.
     """
 
-    # TODO Implement a configurable set of allowed domains? #enhance
-    # TODO Implement configurable unicode normalization? #enhance
+    pure = True
 
     count: Optional[IntegerRange] = None
+    allowed_domains: Optional[List[str]] = None
+    denied_domains: Optional[List[str]] = None
+    lenient: Optional[bool] = None
+    include_embeds: Optional[bool] = None
+    include_attachments: Optional[bool] = None
+
+    _allowed: Optional[DomainSet] = field(init=False, default=None, compare=False)
+    _denied: Optional[DomainSet] = field(init=False, default=None, compare=False)
+
+    def __post_init__(self):
+        if self.allowed_domains:
+            self._allowed = DomainSet.compile(self.allowed_domains)
+        if self.denied_domains:
+            self._denied = DomainSet.compile(self.denied_domains)
 
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
@@ -34,19 +63,45 @@ class MessageHasLinks(AutomodConditionBase):
         return cls(
             description=data.get("description"),
             count=count,
+            allowed_domains=data.get("allowed_domains"),
+            denied_domains=data.get("denied_domains"),
+            lenient=data.get("lenient"),
+            include_embeds=data.get("include_embeds"),
+            include_attachments=data.get("include_attachments"),
         )
 
+    def link_matches(self, link: Link) -> bool:
+        allowed = self._allowed.match(link.domain) if self._allowed else None
+        if self._denied is None:
+            return allowed is None
+        denied = self._denied.match(link.domain)
+        if denied is None:
+            return False
+        # Whichever entry is more specific (i.e. longer) takes precedence.
+        return (allowed is None) or (len(denied) > len(allowed))
+
     async def check(self, event: AutomodEvent) -> bool:
-        message = event.message
-        if (message is None) or not message.content:
+        content = await extract_message_content(
+            event,
+            embeds=bool(self.include_embeds),
+            attachments=bool(self.include_attachments),
+        )
+        if not content:
             return False
-        content = str(message.content)
-        count_http = content.count("http://")
-        count_https = content.count("https://")
-        count_links = count_http + count_https
+        links = [
+            link
+            for link in extract_links(content, lenient=bool(self.lenient))
+            if self.link_matches(link)
+        ]
+        count_links = len(links)
         if self.count is not None:
-            return self.count.includes(count_links)
-        return count_links > 0
+            passed = self.count.includes(count_links)
+        else:
+            passed = count_links > 0
+        if passed and links:
+            domains = dict.fromkeys(link.domain for link in links)
+            event.set_metadata("link_domains", " ".join(f"`{d}`" for d in domains))
+        return passed
 
 
 def create_condition(data: JsonObject) -> AutomodCondition:
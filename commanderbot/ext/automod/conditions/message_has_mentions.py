@@ -23,6 +23,8 @@ class MessageHasMentions(AutomodConditionBase):
         The number of mentions to check for, if bounded.
     """
 
+    pure = True
+
     # TODO Implement a configurable set of allowed domains? #enhance
     # TODO Implement configurable unicode normalization? #enhance
 
@@ -22,6 +22,8 @@ class MessageMentionsRoles(AutomodConditionBase):
         The roles to match against. If empty, all roles will match.
     """
 
+    pure = True
+
     roles: Optional[RolesGuard] = None
 
     @classmethod
@@ -12,6 +12,8 @@ from commanderbot.lib import JsonObject
 class MessageMentionsUsers(AutomodConditionBase):
     """Check if the message contains user mentions."""
 
+    pure = True
+
     async def check(self, event: AutomodEvent) -> bool:
         message = event.message
         # Short-circuit if there's no message or the message is empty.
@@ -1,19 +1,21 @@
 from dataclasses import dataclass
-from typing import Tuple, Type, TypeVar
+from typing import Type, TypeVar
 
 from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
-    AutomodConditionBase,
     deserialize_conditions,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.conditions.abc.condition_group_base import (
+    ConditionGroupBase,
+)
 from commanderbot.lib import JsonObject
 
 ST = TypeVar("ST")
 
 
 @dataclass
-class Not(AutomodConditionBase):
+class Not(ConditionGroupBase):
     """
     Passes if any of the sub-conditions fail.
 
@@ -21,10 +23,13 @@ class Not(AutomodConditionBase):
     ----------
     conditions
         The sub-conditions to check.
+    parallel
+        Whether to check sub-conditions concurrently, stopping early once the outcome
+        is known.
+    max_concurrency
+        The maximum number of sub-conditions to check at once, when in parallel.
     """
 
-    conditions: Tuple[AutomodCondition]
-
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
         raw_conditions = data["conditions"]
@@ -32,13 +37,12 @@ class Not(AutomodConditionBase):
         return cls(
             description=data.get("description"),
             conditions=conditions,
+            parallel=data.get("parallel"),
+            max_concurrency=data.get("max_concurrency"),
         )
 
     async def check(self, event: AutomodEvent) -> bool:
-        for condition in self.conditions:
-            if not await condition.check(event):
-                return True
-        return False
+        return await self.find_results(event, False)
 
 
 def create_condition(data: JsonObject) -> AutomodCondition:
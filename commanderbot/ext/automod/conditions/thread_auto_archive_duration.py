@@ -23,6 +23,8 @@ class ThreadAutoArchiveDuration(AutomodConditionBase):
         The range of the auto archive duration to check.
     """
 
+    pure = True
+
     auto_archive_duration: IntegerRange
 
     @classmethod
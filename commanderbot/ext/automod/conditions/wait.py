@@ -1,13 +1,14 @@
 import asyncio
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Type, TypeVar
+from typing import Optional, Type, TypeVar
 
 from commanderbot.ext.automod.automod_condition import (
     AutomodCondition,
     AutomodConditionBase,
 )
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.lib import JsonObject
 from commanderbot.lib.utils import timedelta_from_field_optional
 
@@ -19,6 +20,10 @@ class Wait(AutomodConditionBase):
     """
     Wait a certain amount of time before continuing.
 
+    When used directly within a rule, the rest of the rule is deferred and resumed
+    later by the scheduler, without holding onto the event in the meantime. Otherwise
+    (e.g. when nested within another condition) this simply sleeps.
+
     Attributes
     ----------
     delay
@@ -35,6 +40,13 @@ class Wait(AutomodConditionBase):
             delay=delay,
         )
 
+    def get_deferral(self) -> Optional[timedelta]:
+        return self.delay
+
+    # @overrides AutomodConditionBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_deferral(self, self.delay)
+
     async def check(self, event: AutomodEvent) -> bool:
         await asyncio.sleep(self.delay.total_seconds())
         return True
@@ -1,7 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Tuple
 
 from discord import Member
 
+from commanderbot.ext.automod.automod_changes import (
+    AttributeChanges,
+    yield_change_fields,
+)
 from commanderbot.ext.automod.automod_event import AutomodEventBase
 
 __all__ = ("MemberUpdated",)
@@ -11,6 +16,7 @@ __all__ = ("MemberUpdated",)
 class MemberUpdated(AutomodEventBase):
     _before: Member
     _after: Member
+    _changes: AttributeChanges = field(default_factory=dict)
 
     @property
     def actor(self) -> Member:
@@ -19,3 +25,10 @@ class MemberUpdated(AutomodEventBase):
     @property
     def member(self) -> Member:
         return self._after
+
+    @property
+    def changes(self) -> AttributeChanges:
+        return self._changes
+
+    def _yield_extra_fields(self) -> Iterable[Tuple[str, Any]]:
+        yield from yield_change_fields(self._changes)
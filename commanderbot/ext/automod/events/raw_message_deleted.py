@@ -1,8 +1,14 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, Tuple, cast
 
-from discord import RawMessageDeleteEvent
+from discord import Member, RawMessageDeleteEvent, TextChannel, Thread
 
 from commanderbot.ext.automod.automod_event import AutomodEventBase
+from commanderbot.ext.automod.automod_message_cache import (
+    CachedMessage,
+    CachedMessageView,
+)
+from commanderbot.lib.types import TextMessage
 
 __all__ = ("RawMessageDeleted",)
 
@@ -10,3 +16,32 @@ __all__ = ("RawMessageDeleted",)
 @dataclass
 class RawMessageDeleted(AutomodEventBase):
     payload: RawMessageDeleteEvent
+    cached: Optional[CachedMessage] = None
+
+    _view: Optional[CachedMessageView] = field(init=False, default=None)
+
+    @property
+    def channel(self) -> Optional[TextChannel | Thread]:
+        channel = self.bot.get_channel(self.payload.channel_id)
+        if isinstance(channel, TextChannel | Thread):
+            return channel
+
+    @property
+    def message(self) -> Optional[TextMessage]:
+        if message := self.payload.cached_message:
+            return message  # type: ignore
+        # Fall back to automod's own cache, so that content can still be checked.
+        if (self._view is None) and (self.cached is not None):
+            if channel := self.channel:
+                self._view = self.cached.to_message(channel)
+        return cast(Optional[TextMessage], self._view)
+
+    @property
+    def author(self) -> Optional[Member]:
+        if message := self.message:
+            return message.author  # type: ignore
+
+    def _yield_extra_fields(self) -> Iterable[Tuple[str, Any]]:
+        yield "message_id", self.payload.message_id
+        if (self.payload.cached_message is None) and (self.cached is not None):
+            yield "author_id", self.cached.author_id
@@ -1,7 +1,12 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Tuple
 
 from discord import Member, User
 
+from commanderbot.ext.automod.automod_changes import (
+    AttributeChanges,
+    yield_change_fields,
+)
 from commanderbot.ext.automod.automod_event import AutomodEventBase
 
 __all__ = ("UserUpdated",)
@@ -12,7 +17,15 @@ class UserUpdated(AutomodEventBase):
     _before: User
     _after: User
     _member: Member
+    _changes: AttributeChanges = field(default_factory=dict)
 
     @property
     def member(self) -> Member:
         return self._member
+
+    @property
+    def changes(self) -> AttributeChanges:
+        return self._changes
+
+    def _yield_extra_fields(self) -> Iterable[Tuple[str, Any]]:
+        yield from yield_change_fields(self._changes)
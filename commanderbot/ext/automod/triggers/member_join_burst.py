@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional, Type, TypeVar
+
+from commanderbot.ext.automod import events
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_trigger import AutomodTrigger, AutomodTriggerBase
+from commanderbot.lib import JsonObject
+from commanderbot.lib.utils import timedelta_from_field, timedelta_from_field_optional
+
+ST = TypeVar("ST")
+
+
+@dataclass
+class MemberJoinBurst(AutomodTriggerBase):
+    """
+    Fires when a member joins as part of a burst of joins.
+
+    The joins that make up the burst are attached to the event as `join_burst_joins`,
+    along with a breakdown of their account ages as `join_burst_account_ages`.
+
+    Attributes
+    ----------
+    joins
+        The number of joins that make up a burst.
+    within
+        The window of time to count joins within.
+    account_age
+        If specified, only accounts younger than this are counted towards a burst, and
+        only their joins will fire the trigger.
+    """
+
+    event_types = (events.MemberJoined,)
+
+    joins: int
+    within: timedelta
+    account_age: Optional[timedelta] = None
+
+    @classmethod
+    def from_data(cls: Type[ST], data: JsonObject) -> ST:
+        within = timedelta_from_field(data, "within")
+        account_age = timedelta_from_field_optional(data, "account_age")
+        return cls(
+            description=data.get("description"),
+            joins=data["joins"],
+            within=within,
+            account_age=account_age,
+        )
+
+    def ignore(self, event: AutomodEvent) -> bool:
+        member = event.member
+        if (member is None) or (event.services is None):
+            return True
+        if self.account_age is not None:
+            if event.services.joins.account_age(member) >= self.account_age:
+                return True
+        burst = event.services.joins.find_burst(
+            member.guild, self.joins, self.within, self.account_age
+        )
+        if burst is None:
+            return True
+        burst.attach_to(event)
+        return False
+
+
+def create_trigger(data: JsonObject) -> AutomodTrigger:
+    return MemberJoinBurst.from_data(data)
@@ -3,6 +3,7 @@ from typing import Optional, Type, TypeVar
 
 from commanderbot.ext.automod import events
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.ext.automod.automod_trigger import AutomodTrigger, AutomodTriggerBase
 from commanderbot.lib import ChannelsGuard, ChannelTypesGuard, JsonObject, RolesGuard
 
@@ -59,6 +60,12 @@ class MemberTyping(AutomodTriggerBase):
             return False
         return self.roles.ignore(event.member)
 
+    # @overrides AutomodTriggerBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_frequent_trigger(
+            self, scoped=self.channels is not None, what="typing member"
+        )
+
     def ignore(self, event: AutomodEvent) -> bool:
         return (
             self.ignore_by_channel_type(event)
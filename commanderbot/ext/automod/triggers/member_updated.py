@@ -1,7 +1,11 @@
 from dataclasses import dataclass
-from typing import Optional, Type, TypeVar
+from typing import FrozenSet, Optional, Type, TypeVar
 
 from commanderbot.ext.automod import events
+from commanderbot.ext.automod.automod_changes import (
+    MEMBER_ATTRIBUTES,
+    parse_attributes,
+)
 from commanderbot.ext.automod.automod_event import AutomodEvent
 from commanderbot.ext.automod.automod_trigger import (
     AutomodTrigger,
@@ -15,33 +19,41 @@ ST = TypeVar("ST")
 @dataclass
 class MemberUpdated(AutomodTriggerBase):
     """
-    Fires when an `on_typing` event is received.
+    Fires when an `on_member_update` event is received.
 
     This occurs when one or more of the following things change:
-    - status
-    - activity
-    - nickname
+    - nick
     - roles
+    - avatar
+    - timeout
     - pending
+    - premium_since
 
-    See: https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_typing
+    See: https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_member_update
 
     Attributes
     ----------
     roles
         The roles to match against. If empty, all roles will match.
+    attributes
+        The attributes to watch for changes to. If empty, all changes will match.
     """
 
     event_types = (events.MemberUpdated,)
 
     roles: Optional[RolesGuard] = None
+    attributes: Optional[FrozenSet[str]] = None
 
     @classmethod
     def from_data(cls: Type[ST], data: JsonObject) -> ST:
         roles = RolesGuard.from_field_optional(data, "roles")
+        attributes = None
+        if raw_attributes := data.get("attributes"):
+            attributes = parse_attributes(raw_attributes, MEMBER_ATTRIBUTES)
         return cls(
             description=data.get("description"),
             roles=roles,
+            attributes=attributes,
         )
 
     def ignore_by_role(self, event: AutomodEvent) -> bool:
@@ -49,8 +61,17 @@ class MemberUpdated(AutomodTriggerBase):
             return False
         return self.roles.ignore(event.member)
 
+    def ignore_by_attributes(self, event: AutomodEvent) -> bool:
+        if self.attributes is None:
+            return False
+        return self.attributes.isdisjoint(event.changes)
+
     def ignore(self, event: AutomodEvent) -> bool:
-        return self.ignore_by_role(event)
+        return self.ignore_by_attributes(event) or self.ignore_by_role(event)
+
+    # @overrides AutomodTriggerBase
+    def get_watched_attributes(self) -> Optional[FrozenSet[str]]:
+        return self.attributes
 
 
 def create_trigger(data: JsonObject) -> AutomodTrigger:
@@ -3,6 +3,7 @@ from typing import List, Optional, Type, TypeVar
 
 from commanderbot.ext.automod import events
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.ext.automod.automod_trigger import AutomodTrigger, AutomodTriggerBase
 from commanderbot.lib import ChannelsGuard, ChannelTypesGuard, JsonObject, RolesGuard
 
@@ -75,6 +76,14 @@ class Message(AutomodTriggerBase):
             return False
         return self.author_roles.ignore(event.author)
 
+    # @overrides AutomodTriggerBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_frequent_trigger(
+            self,
+            scoped=(self.channels is not None) or (self.content is not None),
+            what="message",
+        )
+
     def ignore(self, event: AutomodEvent) -> bool:
         return (
             self.ignore_by_content(event)
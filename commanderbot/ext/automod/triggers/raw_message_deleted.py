@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+from commanderbot.ext.automod import events
+from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_trigger import AutomodTrigger
+from commanderbot.ext.automod.triggers.message import Message
+from commanderbot.lib import JsonObject
+
+
+@dataclass
+class RawMessageDeleted(Message):
+    """
+    Fires when an `on_raw_message_delete` event is received.
+
+    Unlike `message_deleted`, this fires regardless of whether the message is in the
+    client's message cache. If it isn't, automod's own message cache is used to provide
+    content and author information where possible. If neither has the message, then it
+    doesn't match a `content` filter, since its content is unknown.
+
+    See: https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_raw_message_delete
+    """
+
+    event_types = (events.RawMessageDeleted,)
+
+    # @overrides Message
+    def ignore_by_content(self, event: AutomodEvent) -> bool:
+        if (self.content is not None) and (event.message is None):
+            return True
+        return super().ignore_by_content(event)
+
+
+def create_trigger(data: JsonObject) -> AutomodTrigger:
+    return RawMessageDeleted.from_data(data)
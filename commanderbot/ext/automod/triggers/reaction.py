@@ -3,6 +3,7 @@ from typing import Optional, Type, TypeVar
 
 from commanderbot.ext.automod import events
 from commanderbot.ext.automod.automod_event import AutomodEvent
+from commanderbot.ext.automod.automod_rule_analysis import AutomodRuleAnalysis
 from commanderbot.ext.automod.automod_trigger import AutomodTrigger, AutomodTriggerBase
 from commanderbot.lib import (
     ChannelsGuard,
@@ -87,6 +88,14 @@ class Reaction(AutomodTriggerBase):
             return False
         return self.actor_roles.ignore(event.actor)
 
+    # @overrides AutomodTriggerBase
+    def analyze(self, analysis: AutomodRuleAnalysis):
+        analysis.add_frequent_trigger(
+            self,
+            scoped=(self.channels is not None) or (self.reactions is not None),
+            what="reaction",
+        )
+
     def ignore(self, event: AutomodEvent) -> bool:
         return (
             self.ignore_by_reaction(event)
@@ -1,12 +1,17 @@
 from dataclasses import dataclass
+from typing import FrozenSet, Optional, Type, TypeVar
 
 from commanderbot.ext.automod import events
+from commanderbot.ext.automod.automod_changes import USER_ATTRIBUTES, parse_attributes
+from commanderbot.ext.automod.automod_event import AutomodEvent
 from commanderbot.ext.automod.automod_trigger import (
     AutomodTrigger,
     AutomodTriggerBase,
 )
 from commanderbot.lib import JsonObject
 
+ST = TypeVar("ST")
+
 
 @dataclass
 class UserUpdated(AutomodTriggerBase):
@@ -14,15 +19,41 @@ class UserUpdated(AutomodTriggerBase):
     Fires when an `on_user_update` event is received.
 
     This occurs when one or more of the following things change:
-    - avatar
-    - username
+    - name
     - discriminator
+    - avatar
 
     See: https://discordpy.readthedocs.io/en/stable/api.html?highlight=events#discord.on_user_update
+
+    Attributes
+    ----------
+    attributes
+        The attributes to watch for changes to. If empty, all changes will match.
     """
 
     event_types = (events.UserUpdated,)
 
+    attributes: Optional[FrozenSet[str]] = None
+
+    @classmethod
+    def from_data(cls: Type[ST], data: JsonObject) -> ST:
+        attributes = None
+        if raw_attributes := data.get("attributes"):
+            attributes = parse_attributes(raw_attributes, USER_ATTRIBUTES)
+        return cls(
+            description=data.get("description"),
+            attributes=attributes,
+        )
+
+    def ignore(self, event: AutomodEvent) -> bool:
+        if self.attributes is None:
+            return False
+        return self.attributes.isdisjoint(event.changes)
+
+    # @overrides AutomodTriggerBase
+    def get_watched_attributes(self) -> Optional[FrozenSet[str]]:
+        return self.attributes
+
 
 def create_trigger(data: JsonObject) -> AutomodTrigger:
     return UserUpdated.from_data(data)
@@ -1,23 +1,61 @@
-from collections import defaultdict
+import pkgutil
 from importlib import import_module
-from typing import Any, DefaultDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
 from commanderbot.lib import JsonObject, ResponsiveException
 
-module_function_cache: DefaultDict[str, DefaultDict[str, Any]] = defaultdict(
-    lambda: defaultdict(lambda: None)
-)
+ModuleFunction = Callable[[JsonObject], Any]
 
 
-def resolve_module_function(module_name: str, function_name: str) -> Any:
-    # check if it's already in our cache
-    if func := module_function_cache[module_name][function_name]:
+class ModuleFunctionRegistry:
+    """
+    Maps module names to module functions, eagerly loaded a package at a time.
+
+    Loading a package imports every (non-package) module within it up front, so that
+    resolving one of them later on is a plain dictionary lookup rather than an import.
+    """
+
+    def __init__(self):
+        # function name -> module name -> function
+        self._functions: Dict[str, Dict[str, ModuleFunction]] = {}
+        self._loaded_packages: Set[Tuple[str, str]] = set()
+
+    def is_package_loaded(self, package_name: str, function_name: str) -> bool:
+        return (package_name, function_name) in self._loaded_packages
+
+    def load_package(self, package_name: str, function_name: str):
+        """Import every module in the package that provides the function."""
+        if self.is_package_loaded(package_name, function_name):
+            return
+        package = import_module(package_name)
+        for module_info in pkgutil.iter_modules(
+            package.__path__, prefix=f"{package_name}."
+        ):
+            if module_info.ispkg:
+                continue
+            module = import_module(module_info.name)
+            if func := getattr(module, function_name, None):
+                self.register(module_info.name, function_name, func)
+        self._loaded_packages.add((package_name, function_name))
+
+    def register(self, module_name: str, function_name: str, func: ModuleFunction):
+        self._functions.setdefault(function_name, {})[module_name] = func
+
+    def get(self, module_name: str, function_name: str) -> Optional[ModuleFunction]:
+        if functions := self._functions.get(function_name):
+            return functions.get(module_name)
+
+    def resolve(self, module_name: str, function_name: str) -> ModuleFunction:
+        """Return the function, dynamically importing it if it isn't registered."""
+        if func := self.get(module_name, function_name):
+            return func
+        module = import_module(module_name)
+        func = getattr(module, function_name)
+        self.register(module_name, function_name, func)
         return func
-    # if not, attempt to resolve it dynamically
-    module = import_module(module_name)
-    func = getattr(module, function_name)
-    module_function_cache[module_name][function_name] = func
-    return func
+
+
+module_function_registry = ModuleFunctionRegistry()
 
 
 class MissingTypeField(ResponsiveException):
@@ -25,6 +63,12 @@ class MissingTypeField(ResponsiveException):
         super().__init__(f"Missing `type` field")
 
 
+class UnknownType(ResponsiveException):
+    def __init__(self, type_name: str):
+        self.type_name: str = type_name
+        super().__init__(f"Unknown type `{type_name}`")
+
+
 class InvalidModule(Exception):
     def __init__(self, module_name: str, function_name: str):
         super().__init__(
@@ -46,21 +90,29 @@ def deserialize_module_object(
     function_name: str,
 ) -> Any:
     # get the type name
-    type_name = str(data.pop("type"))
+    type_name = str(data.pop("type", None) or "")
     if not type_name:
         raise MissingTypeField()
-    # determine the module name
-    module_name = type_name
+    # short type names refer to built-in modules, which are all known ahead of time
     if "." not in type_name:
+        module_function_registry.load_package(default_module_prefix, function_name)
         module_name = f"{default_module_prefix}.{type_name}"
-    # attempt to resolve the module function
-    try:
-        func = resolve_module_function(module_name, function_name)
-    except Exception as ex:
-        raise InvalidModule(module_name, function_name) from ex
+        func = module_function_registry.get(module_name, function_name)
+        if func is None:
+            raise UnknownType(type_name)
+    # anything else is resolved dynamically (once), to allow for external modules
+    else:
+        module_name = type_name
+        try:
+            func = module_function_registry.resolve(module_name, function_name)
+        except Exception as ex:
+            raise InvalidModule(module_name, function_name) from ex
     # attempt to call the function to create the object
     try:
         obj = func(data)
+    except ResponsiveException:
+        # These are meant for the user, so let them through as-is.
+        raise
     except Exception as ex:
         raise InvalidModuleFunction(module_name, function_name) from ex
     return obj
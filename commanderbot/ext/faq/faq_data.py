@@ -13,7 +13,7 @@ from commanderbot.ext.faq.faq_store import (
     FaqKeyAlreadyExists,
     NoSuchFaq,
 )
-from commanderbot.lib import GuildID, JsonObject
+from commanderbot.lib import GuildID, JsonObject, SafePattern
 from commanderbot.lib.utils import dict_without_falsies
 
 TERM_SPLIT_PATTERN = re.compile(r"\W+")
@@ -100,8 +100,8 @@ class FaqDataFaqEntry:
 @dataclass
 class FaqDataGuild:
     faq_entries: Dict[str, FaqDataFaqEntry] = field(default_factory=dict)
-    prefix: Optional[re.Pattern] = None
-    match: Optional[re.Pattern] = None
+    prefix: Optional[SafePattern] = None
+    match: Optional[SafePattern] = None
 
     faq_entries_by_alias: Dict[str, FaqDataFaqEntry] = field(
         init=False, default_factory=dict
@@ -117,8 +117,8 @@ class FaqDataGuild:
                 key: FaqDataFaqEntry.deserialize(raw_entry, key)
                 for key, raw_entry in data.get("faq_entries", {}).items()
             },
-            prefix=re.compile(raw_prefix) if raw_prefix else None,
-            match=re.compile(raw_match) if raw_match else None,
+            prefix=SafePattern.compile(raw_prefix) if raw_prefix else None,
+            match=SafePattern.compile(raw_match) if raw_match else None,
         )
 
     def __post_init__(self):
@@ -143,18 +143,18 @@ class FaqDataGuild:
             },
         )
 
-    def get_prefix(self) -> Optional[re.Pattern]:
+    def get_prefix(self) -> Optional[SafePattern]:
         return self.prefix
 
-    def set_prefix(self, prefix: Optional[str]) -> Optional[re.Pattern]:
-        self.prefix = re.compile(prefix) if prefix else None
+    def set_prefix(self, prefix: Optional[str]) -> Optional[SafePattern]:
+        self.prefix = SafePattern.compile(prefix) if prefix else None
         return self.prefix
 
-    def get_match(self) -> Optional[re.Pattern]:
+    def get_match(self) -> Optional[SafePattern]:
         return self.match
 
-    def set_match(self, match: Optional[str]) -> Optional[re.Pattern]:
-        self.match = re.compile(match) if match else None
+    def set_match(self, match: Optional[str]) -> Optional[SafePattern]:
+        self.match = SafePattern.compile(match) if match else None
         return self.match
 
     def get_faq(self, name: str) -> Optional[FaqDataFaqEntry]:
@@ -312,23 +312,23 @@ class FaqData:
         )
 
     # @implements FaqStore
-    async def get_prefix_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_prefix_pattern(self, guild: Guild) -> Optional[SafePattern]:
         return self.guilds[guild.id].get_prefix()
 
     # @implements FaqStore
     async def set_prefix_pattern(
         self, guild: Guild, prefix: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         return self.guilds[guild.id].set_prefix(prefix)
 
     # @implements FaqStore
-    async def get_match_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_match_pattern(self, guild: Guild) -> Optional[SafePattern]:
         return self.guilds[guild.id].get_match()
 
     # @implements FaqStore
     async def set_match_pattern(
         self, guild: Guild, match: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         return self.guilds[guild.id].set_match(match)
 
     # @implements FaqStore
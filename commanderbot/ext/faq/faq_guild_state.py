@@ -9,7 +9,13 @@ from discord.ext.commands import MessageConverter
 
 from commanderbot.ext.faq.faq_options import FaqOptions
 from commanderbot.ext.faq.faq_store import FaqEntry, FaqStore
-from commanderbot.lib import CogGuildState, GuildContext, TextMessage
+from commanderbot.lib import (
+    CogGuildState,
+    GuildContext,
+    PatternBudgetExceeded,
+    SafePattern,
+    TextMessage,
+)
 from commanderbot.lib.dialogs import ConfirmationResult, confirm_with_reaction
 from commanderbot.lib.utils import send_message_or_file
 
@@ -30,15 +36,15 @@ class FaqGuildState(CogGuildState):
     store: FaqStore
     options: FaqOptions
 
-    _prefix_pattern: Optional[re.Pattern] = field(init=False, default=LAZY)
-    _match_pattern: Optional[re.Pattern] = field(init=False, default=LAZY)
+    _prefix_pattern: Optional[SafePattern] = field(init=False, default=LAZY)
+    _match_pattern: Optional[SafePattern] = field(init=False, default=LAZY)
 
-    async def get_prefix_pattern(self) -> Optional[re.Pattern]:
+    async def get_prefix_pattern(self) -> Optional[SafePattern]:
         if self._prefix_pattern is LAZY:
             self._prefix_pattern = await self.store.get_prefix_pattern(self.guild)
         return self._prefix_pattern
 
-    async def get_match_pattern(self) -> Optional[re.Pattern]:
+    async def get_match_pattern(self) -> Optional[SafePattern]:
         if self._match_pattern is LAZY:
             self._match_pattern = await self.store.get_match_pattern(self.guild)
         return self._match_pattern
@@ -67,6 +73,25 @@ class FaqGuildState(CogGuildState):
             await destination.send(f"No FAQ named `{name}`")
 
     async def on_message(self, message: TextMessage):
+        try:
+            await self._on_message(message)
+        except PatternBudgetExceeded as ex:
+            # Message content is attacker-controlled, so a slow pattern is a liability.
+            await self._disable_pattern(ex)
+
+    async def _disable_pattern(self, ex: PatternBudgetExceeded):
+        prefix_pattern = await self.get_prefix_pattern()
+        if prefix_pattern and (prefix_pattern.pattern == ex.pattern):
+            await self.store.set_prefix_pattern(self.guild, None)
+            self._prefix_pattern = None
+            self.log.warning(f"Disabled FAQ prefix pattern: {ex}")
+        match_pattern = await self.get_match_pattern()
+        if match_pattern and (match_pattern.pattern == ex.pattern):
+            await self.store.set_match_pattern(self.guild, None)
+            self._match_pattern = None
+            self.log.warning(f"Disabled FAQ match pattern: {ex}")
+
+    async def _on_message(self, message: TextMessage):
         content = message.content
 
         prefix_pattern = await self.get_prefix_pattern()
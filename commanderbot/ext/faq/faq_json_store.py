@@ -1,4 +1,3 @@
-import re
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
@@ -6,7 +5,7 @@ from discord import Guild
 
 from commanderbot.ext.faq.faq_data import FaqData
 from commanderbot.ext.faq.faq_store import FaqEntry
-from commanderbot.lib import CogStore, JsonFileDatabaseAdapter
+from commanderbot.lib import CogStore, JsonFileDatabaseAdapter, SafePattern
 
 
 # @implements FaqStore
@@ -19,28 +18,28 @@ class FaqJsonStore(CogStore):
     db: JsonFileDatabaseAdapter[FaqData]
 
     # @implements FaqStore
-    async def get_prefix_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_prefix_pattern(self, guild: Guild) -> Optional[SafePattern]:
         cache = await self.db.get_cache()
         return await cache.get_prefix_pattern(guild)
 
     # @implements FaqStore
     async def set_prefix_pattern(
         self, guild: Guild, prefix: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         cache = await self.db.get_cache()
         result = await cache.set_prefix_pattern(guild, prefix)
         await self.db.dirty()
         return result
 
     # @implements FaqStore
-    async def get_match_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_match_pattern(self, guild: Guild) -> Optional[SafePattern]:
         cache = await self.db.get_cache()
         return await cache.get_match_pattern(guild)
 
     # @implements FaqStore
     async def set_match_pattern(
         self, guild: Guild, match: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         cache = await self.db.get_cache()
         result = await cache.set_match_pattern(guild, match)
         await self.db.dirty()
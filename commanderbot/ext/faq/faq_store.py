@@ -1,10 +1,9 @@
-import re
 from datetime import datetime
 from typing import List, Optional, Protocol, Set, Tuple
 
 from discord import Guild
 
-from commanderbot.lib import ResponsiveException
+from commanderbot.lib import ResponsiveException, SafePattern
 
 
 class FaqException(ResponsiveException):
@@ -53,20 +52,20 @@ class FaqStore(Protocol):
     Abstracts the data storage and persistence of the FAQ cog.
     """
 
-    async def get_prefix_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_prefix_pattern(self, guild: Guild) -> Optional[SafePattern]:
         """Get the configured prefix pattern, if any."""
 
     async def set_prefix_pattern(
         self, guild: Guild, prefix: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         """Set the prefix pattern, if any."""
 
-    async def get_match_pattern(self, guild: Guild) -> Optional[re.Pattern]:
+    async def get_match_pattern(self, guild: Guild) -> Optional[SafePattern]:
         """Get the configured match pattern, if any."""
 
     async def set_match_pattern(
         self, guild: Guild, match: Optional[str]
-    ) -> Optional[re.Pattern]:
+    ) -> Optional[SafePattern]:
         """Set the match pattern, if any."""
 
     async def get_faq_by_name(self, guild: Guild, name: str) -> Optional[FaqEntry]:
@@ -11,15 +11,19 @@ from .guards import *
 from .guild_partitioned_cog_state import *
 from .integer_range import *
 from .intents import *
+from .intern_pool import *
 from .json_file_database_adapter import *
 from .json_serializable import *
 from .lenient_role_converter import *
+from .links import *
 from .log_options import *
 from .pattern_wrapper import *
 from .responsive_exception import *
 from .role_set import *
+from .safe_pattern import *
 from .shallow_formatter import *
 from .sql_database_adapter import *
 from .sqlite_database_adapter import *
+from .timer_wheel import *
 from .types import *
 from .value_formatter import *
@@ -1,7 +1,7 @@
 import dataclasses
 import json
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Set
+from typing import AbstractSet, Any, Dict, List
 
 from discord import Color
 
@@ -15,7 +15,7 @@ class ExtendedJsonEncoder(json.JSONEncoder):
 
     Converts the following additional objects, in order of precedence:
     1. A subclass of `JsonSerializable` is converted using `.to_data()`
-    2. A `set` is converted into a list
+    2. A `set` or `frozenset` is converted into a list
     3. A `datatime.datetime` is converted into a string using `.isoformat()`
     4. A `dataclasses.dataclass` is converted using `dataclasses.asdict()`
     5. A `discord.Color` is converted into hex format `#FFFFFF`
@@ -24,7 +24,7 @@ class ExtendedJsonEncoder(json.JSONEncoder):
     def default(self, obj: Any) -> Any:
         if isinstance(obj, JsonSerializable):
             return obj.to_json()
-        if isinstance(obj, set):
+        if isinstance(obj, (set, frozenset)):
             return self.convert_set(obj)
         if isinstance(obj, datetime):
             return self.convert_datetime(obj)
@@ -36,7 +36,7 @@ class ExtendedJsonEncoder(json.JSONEncoder):
             return self.convert_color(obj)
         return super().default(obj)
 
-    def convert_set(self, obj: Set[Any]) -> List[Any]:
+    def convert_set(self, obj: AbstractSet[Any]) -> List[Any]:
         return list(obj)
 
     def convert_datetime(self, obj: datetime) -> str:
@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
-from typing import Optional, Set
+from typing import FrozenSet, Optional
 
 from discord import TextChannel, Thread
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
+from commanderbot.lib.guards.guard_pool import guard_pool
 
 __all__ = ("ChannelTypesGuard",)
 
@@ -14,7 +15,7 @@ THREAD_TYPES = {
 }
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChannelTypesGuard(FromDataMixin):
     """
     Check whether a channel is of a certain type.
@@ -28,18 +29,30 @@ class ChannelTypesGuard(FromDataMixin):
         types.
     """
 
-    include: Set[str] = field(default_factory=set)
-    exclude: Set[str] = field(default_factory=set)
+    include: FrozenSet[str] = field(default_factory=frozenset)
+    exclude: FrozenSet[str] = field(default_factory=frozenset)
 
     @classmethod
     def try_from_data(cls, data):
         if isinstance(data, dict):
-            return cls(
-                include=set(data.get("include", [])),
-                exclude=set(data.get("exclude", [])),
+            return cls.interned(
+                include=frozenset(data.get("include", [])),
+                exclude=frozenset(data.get("exclude", [])),
             )
         elif isinstance(data, list):
-            return cls(include=set(data))
+            return cls.interned(include=frozenset(data))
+
+    @classmethod
+    def interned(
+        cls,
+        include: FrozenSet[str] = frozenset(),
+        exclude: FrozenSet[str] = frozenset(),
+    ) -> "ChannelTypesGuard":
+        """Return a guard shared with anything else that checks the same channel types."""
+        return guard_pool.intern(
+            (cls, include, exclude),
+            lambda: cls(include=include, exclude=exclude),
+        )
 
     def ignore_by_includes(self, type_name: str) -> bool:
         if not self.include:
@@ -1,15 +1,16 @@
 from dataclasses import dataclass, field
-from typing import Optional, Set
+from typing import FrozenSet, Optional
 
 from discord import TextChannel, Thread
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
+from commanderbot.lib.guards.guard_pool import guard_pool
 from commanderbot.lib.types import ChannelID
 
 __all__ = ("ChannelsGuard",)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ChannelsGuard(FromDataMixin):
     """
     Check whether a channel matches a set of channels.
@@ -22,18 +23,30 @@ class ChannelsGuard(FromDataMixin):
         The channels to exclude. A channel will match if it is not in this set.
     """
 
-    include: Set[ChannelID] = field(default_factory=set)
-    exclude: Set[ChannelID] = field(default_factory=set)
+    include: FrozenSet[ChannelID] = field(default_factory=frozenset)
+    exclude: FrozenSet[ChannelID] = field(default_factory=frozenset)
 
     @classmethod
     def try_from_data(cls, data):
         if isinstance(data, dict):
-            return cls(
-                include=set(data.get("include", [])),
-                exclude=set(data.get("exclude", [])),
+            return cls.interned(
+                include=frozenset(data.get("include", [])),
+                exclude=frozenset(data.get("exclude", [])),
             )
         elif isinstance(data, list):
-            return cls(include=set(data))
+            return cls.interned(include=frozenset(data))
+
+    @classmethod
+    def interned(
+        cls,
+        include: FrozenSet[ChannelID] = frozenset(),
+        exclude: FrozenSet[ChannelID] = frozenset(),
+    ) -> "ChannelsGuard":
+        """Return a guard shared with anything else that checks the same channels."""
+        return guard_pool.intern(
+            (cls, include, exclude),
+            lambda: cls(include=include, exclude=exclude),
+        )
 
     def ignore_by_includes(self, channel: TextChannel | Thread) -> bool:
         # If includes are not defined, nothing is ignored.
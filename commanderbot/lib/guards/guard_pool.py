@@ -0,0 +1,9 @@
+from typing import Any
+
+from commanderbot.lib.intern_pool import InternPool
+
+__all__ = ("guard_pool",)
+
+
+# Guards are immutable, so the same guard can be shared by every rule that uses it.
+guard_pool: InternPool[Any] = InternPool()
@@ -1,15 +1,16 @@
 from dataclasses import dataclass, field
-from typing import Optional, Set
+from typing import FrozenSet, Optional
 
 from discord import Reaction
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
+from commanderbot.lib.guards.guard_pool import guard_pool
 from commanderbot.lib.integer_range import IntegerRange
 
 __all__ = ("ReactionsGuard",)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ReactionsGuard(FromDataMixin):
     """
     Check whether a reaction matches a set of reactions.
@@ -24,21 +25,35 @@ class ReactionsGuard(FromDataMixin):
         The number of reactions to check for.
     """
 
-    include: Set[str] = field(default_factory=set)
-    exclude: Set[str] = field(default_factory=set)
+    include: FrozenSet[str] = field(default_factory=frozenset)
+    exclude: FrozenSet[str] = field(default_factory=frozenset)
 
     count: Optional[IntegerRange] = None
 
     @classmethod
     def try_from_data(cls, data):
         if isinstance(data, dict):
-            return cls(
-                include=set(data.get("include", [])),
-                exclude=set(data.get("exclude", [])),
+            return cls.interned(
+                include=frozenset(data.get("include", [])),
+                exclude=frozenset(data.get("exclude", [])),
                 count=IntegerRange.from_field_optional(data, "count"),
             )
         elif isinstance(data, list):
-            return cls(include=set(data))
+            return cls.interned(include=frozenset(data))
+
+    @classmethod
+    def interned(
+        cls,
+        include: FrozenSet[str] = frozenset(),
+        exclude: FrozenSet[str] = frozenset(),
+        count: Optional[IntegerRange] = None,
+    ) -> "ReactionsGuard":
+        """Return a guard shared with anything else that checks the same reactions."""
+        count_key = (count.min, count.max) if count else None
+        return guard_pool.intern(
+            (cls, include, exclude, count_key),
+            lambda: cls(include=include, exclude=exclude, count=count),
+        )
 
     def ignore_by_includes(self, reaction: Reaction) -> bool:
         # Ignore reactions with emoji that are not included, if any.
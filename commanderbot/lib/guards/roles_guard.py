@@ -1,16 +1,17 @@
 from dataclasses import dataclass, field
-from typing import Iterable, List, Optional, Set
+from typing import FrozenSet, Iterable, List, Optional
 
 from discord import Member, Role, User
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
+from commanderbot.lib.guards.guard_pool import guard_pool
 from commanderbot.lib.types import RoleID
-from commanderbot.lib.utils import member_roles_from
+from commanderbot.lib.utils import member_role_ids
 
 __all__ = ("RolesGuard",)
 
 
-@dataclass
+@dataclass(frozen=True)
 class RolesGuard(FromDataMixin):
     """
     Check whether a member matches a set of roles.
@@ -23,32 +24,42 @@ class RolesGuard(FromDataMixin):
         The roles to exclude. A member will match if they have none of these.
     """
 
-    include: Set[RoleID] = field(default_factory=set)
-    exclude: Set[RoleID] = field(default_factory=set)
+    include: FrozenSet[RoleID] = field(default_factory=frozenset)
+    exclude: FrozenSet[RoleID] = field(default_factory=frozenset)
 
     @classmethod
     def try_from_data(cls, data):
         if isinstance(data, dict):
-            return cls(
-                include=set(data.get("include", [])),
-                exclude=set(data.get("exclude", [])),
+            return cls.interned(
+                include=frozenset(data.get("include", [])),
+                exclude=frozenset(data.get("exclude", [])),
             )
         elif isinstance(data, list):
-            return cls(include=set(data))
+            return cls.interned(include=frozenset(data))
+
+    @classmethod
+    def interned(
+        cls,
+        include: FrozenSet[RoleID] = frozenset(),
+        exclude: FrozenSet[RoleID] = frozenset(),
+    ) -> "RolesGuard":
+        """Return a guard shared with anything else that checks the same roles."""
+        return guard_pool.intern(
+            (cls, include, exclude),
+            lambda: cls(include=include, exclude=exclude),
+        )
 
     def ignore_by_includes(self, member: Member) -> bool:
         # Ignore roles that are not included, if any.
         if not self.include:
             return False
-        matching_roles = member_roles_from(member, self.include)
-        return len(matching_roles) == 0
+        return member_role_ids(member).isdisjoint(self.include)
 
     def ignore_by_excludes(self, member: Member) -> bool:
         # Ignore roles that are excluded, if any.
         if not self.exclude:
             return False
-        matching_roles = member_roles_from(member, self.exclude)
-        return len(matching_roles) > 0
+        return not member_role_ids(member).isdisjoint(self.exclude)
 
     def ignore(self, member: Optional[Member]) -> bool:
         """Determine whether to ignore the member based on their roles."""
@@ -60,13 +71,11 @@ class RolesGuard(FromDataMixin):
         # If `include` roles are defined, check if the member has *any* of them.
         # Note that `include` takes precedence over `exclude`.
         if self.include:
-            included_roles = member_roles_from(member, self.include)
-            return len(included_roles) > 0
+            return not member_role_ids(member).isdisjoint(self.include)
 
         # If `exclude` roles are defined, check if the member has *none* of them.
         if self.exclude:
-            excluded_roles = member_roles_from(member, self.exclude)
-            return len(excluded_roles) == 0
+            return member_role_ids(member).isdisjoint(self.exclude)
 
         # If neither `include` nor `exclude` roles are defined, it's always a match.
         return True
@@ -0,0 +1,36 @@
+from typing import Callable, Generic, Hashable, TypeVar
+from weakref import WeakValueDictionary
+
+__all__ = ("InternPool",)
+
+
+VT = TypeVar("VT")
+
+
+class InternPool(Generic[VT]):
+    """
+    A process-wide pool of shared, immutable values, keyed by their normalized source.
+
+    Values are only held onto for as long as something else refers to them, so that
+    values no longer in use (e.g. those of removed rules) are freed automatically.
+    Values must therefore support weak references, and must never be modified.
+    """
+
+    def __init__(self):
+        self._values: WeakValueDictionary[Hashable, VT] = WeakValueDictionary()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def intern(self, key: Hashable, factory: Callable[[], VT]) -> VT:
+        """Return the value for the key, creating it with `factory` if needed."""
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            value = factory()
+            self._values[key] = value
+        else:
+            self.hits += 1
+        return value
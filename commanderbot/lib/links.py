@@ -0,0 +1,173 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+from commanderbot.lib.intern_pool import InternPool
+
+__all__ = (
+    "Link",
+    "extract_links",
+    "normalize_domain",
+    "DomainSet",
+)
+
+
+# Invisible characters that are commonly used to break up links, so that they aren't
+# caught by simple substring checks.
+ZERO_WIDTH_CHARS = dict.fromkeys(
+    map(ord, "\u00ad\u180e\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\ufeff")
+)
+
+# Common ways of "defanging" links, such as `hxxps://example[.]com`.
+DEFANGED_SCHEME_PATTERN = re.compile(r"\bh(?:xx|tt)p(s?)\[?(:)\]?//", re.IGNORECASE)
+DEFANGED_DOT_PATTERN = re.compile(
+    r"\s?[\[\(\{]\s?(?:\.|dot)\s?[\]\)\}]\s?", re.IGNORECASE
+)
+
+# Hosts are made up of labels separated by dots, and end with a top-level domain. This
+# is deliberately lenient, since the point is to find links and not to validate them.
+HOST = r"(?:[\w-]+\.)+[^\W\d_]{2,63}\.?|\d{1,3}(?:\.\d{1,3}){3}"
+
+# The rest of a link runs until whitespace, or until another link starts. Otherwise a
+# link could hide another one behind it, such as `a.com/https://b.com`.
+TAIL = r"(?:(?!https?://)[^\s<>])*"
+
+SCHEME_LINK = (
+    r"https?://(?:[^\s/@<>]*@)?"
+    + r"(?P<host>(?:(?!https?://)[^\s/:?#<>()\[\]{}'\"`|*,])+)"
+    + TAIL
+)
+BARE_LINK = rf"(?<![\w.@/-])(?P<bare>{HOST})(?![\w@-])(?!://)(?:[/:?#]{TAIL})?"
+
+LINK_PATTERN = re.compile(SCHEME_LINK, re.IGNORECASE)
+LENIENT_LINK_PATTERN = re.compile(rf"{SCHEME_LINK}|{BARE_LINK}", re.IGNORECASE)
+
+
+def normalize_domain(domain: str) -> str:
+    """
+    Normalize a domain name (or host) so that it can be compared with others.
+
+    Domains are lower-cased, stripped of any surrounding dots (including wildcards like
+    `*.example.com`), and converted to their ASCII form, so that lookalike unicode
+    domains are compared the same way browsers would.
+    """
+    domain = domain.strip().lower().lstrip("*").strip(".")
+    try:
+        return domain.encode("idna").decode("ascii")
+    except UnicodeError:
+        return domain
+
+
+class Link:
+    """
+    A link found in some text.
+
+    Attributes
+    ----------
+    url
+        The link, as found after normalization.
+    domain
+        The normalized domain (or host) the link points to.
+    bare
+        Whether the link was just a domain, without a scheme.
+    """
+
+    __slots__ = ("url", "domain", "bare")
+
+    def __init__(self, url: str, domain: str, bare: bool):
+        self.url: str = url
+        self.domain: str = domain
+        self.bare: bool = bare
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.url!r}>"
+
+
+def extract_links(content: str, lenient: bool = False) -> List[Link]:
+    """
+    Find all of the links in some text, in a single pass.
+
+    Text is normalized first: compatibility characters (such as full-width letters) are
+    folded into their plain equivalents, and invisible characters are removed.
+
+    If `lenient` is set, bare domains without a scheme (such as `example.com`) and
+    defanged links (such as `hxxps://example[.]com`) are also found. These aren't made
+    clickable by Discord, but are still commonly used to get around filters.
+    """
+    content = unicodedata.normalize("NFKC", content).translate(ZERO_WIDTH_CHARS)
+    if lenient:
+        content = DEFANGED_SCHEME_PATTERN.sub(r"http\1\2//", content)
+        content = DEFANGED_DOT_PATTERN.sub(".", content)
+    links: List[Link] = []
+    pattern = LENIENT_LINK_PATTERN if lenient else LINK_PATTERN
+    for match in pattern.finditer(content):
+        if host := match.group("host"):
+            links.append(Link(match.group(0), normalize_domain(host), bare=False))
+        else:
+            bare = match.group("bare")
+            links.append(Link(match.group(0), normalize_domain(bare), bare=True))
+    return links
+
+
+class DomainSet:
+    """
+    A set of domains, each of which also covers all of its subdomains.
+
+    Domains are stored in a trie of their labels in reverse (`com` -> `example` -> `www`)
+    so that looking up a domain takes time proportional to its number of labels,
+    regardless of how many domains are in the set.
+    """
+
+    __slots__ = ("_root", "_size", "__weakref__")
+
+    # Marks the end of a domain within the trie. Labels can never be empty.
+    _END = ""
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        self._size: int = 0
+        for domain in domains:
+            self.add(domain)
+
+    @classmethod
+    def compile(cls, domains: Iterable[str]) -> "DomainSet":
+        """Return a domain set shared with anything else that uses the same domains."""
+        key = frozenset(filter(None, map(normalize_domain, domains)))
+        return domain_set_pool.intern(key, lambda: cls(key))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, domain: str):
+        domain = normalize_domain(domain)
+        if not domain:
+            return
+        node = self._root
+        for label in reversed(domain.split(".")):
+            if not label:
+                return
+            node = node.setdefault(label, {})
+        if self._END not in node:
+            node[self._END] = domain
+            self._size += 1
+
+    def match(self, domain: str) -> Optional[str]:
+        """
+        Return the most specific entry covering the (normalized) domain, if any.
+
+        For example: if the set contains `example.com`, then both `example.com` and
+        `www.example.com` will match it.
+        """
+        matched: Optional[str] = None
+        node = self._root
+        for label in reversed(domain.split(".")):
+            if not label or (node := node.get(label)) is None:
+                break
+            matched = node.get(self._END, matched)
+        return matched
+
+    def __contains__(self, domain: str) -> bool:
+        return self.match(domain) is not None
+
+
+domain_set_pool: InternPool[DomainSet] = InternPool()
@@ -34,6 +34,9 @@ class LogOptions(FromDataMixin):
     allowed_mentions
         The types of mentions allowed in log messages. Unless otherwise specified, all
         mentions will be suppressed.
+    digest
+        Whether to coalesce log messages sent around the same time into a single digest,
+        where supported.
     """
 
     channel: ChannelID
@@ -44,6 +47,8 @@ class LogOptions(FromDataMixin):
 
     allowed_mentions: Optional[AllowedMentions] = None
 
+    digest: Optional[bool] = None
+
     @classmethod
     def try_from_data(cls, data):
         if isinstance(data, int):
@@ -59,6 +64,7 @@ class LogOptions(FromDataMixin):
                 emoji=data.get("emoji"),
                 color=color,
                 allowed_mentions=allowed_mentions,
+                digest=data.get("digest"),
             )
 
     async def send(
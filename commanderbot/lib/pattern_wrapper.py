@@ -1,25 +1,30 @@
 import re
 from dataclasses import dataclass
-from typing import Any, AnyStr, Match, Optional
+from typing import Any, Optional
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
 from commanderbot.lib.json_serializable import JsonSerializable
+from commanderbot.lib.safe_pattern import SafePattern
 
 __all__ = ("PatternWrapper",)
 
 
 @dataclass
 class PatternWrapper(JsonSerializable, FromDataMixin):
-    """Wraps `re.Pattern` to simplify de/serialization."""
+    """
+    Wraps `SafePattern` to simplify de/serialization.
 
-    pattern: re.Pattern
+    Matching raises `PatternBudgetExceeded` if the pattern takes too long.
+    """
+
+    pattern: SafePattern
 
     # TODO Other regex flags? #enhance
     ignore_case: Optional[bool] = None
 
     @classmethod
     def try_from_str(cls, data: str):
-        pattern = re.compile(data)
+        pattern = SafePattern.compile(data)
         return cls(pattern)
 
     @classmethod
@@ -29,7 +34,7 @@ class PatternWrapper(JsonSerializable, FromDataMixin):
         flags = 0
         if ignore_case:
             flags |= re.IGNORECASE
-        pattern = re.compile(raw_pattern, flags=flags)
+        pattern = SafePattern.compile(raw_pattern, flags=flags)
         return cls(
             pattern=pattern,
             ignore_case=ignore_case,
@@ -51,8 +56,8 @@ class PatternWrapper(JsonSerializable, FromDataMixin):
             )
         return self.pattern.pattern
 
-    def search(self, string: AnyStr) -> Optional[Match[AnyStr]]:
+    def search(self, string: str) -> Optional[Any]:
         return self.pattern.search(string)
 
-    def match(self, string: AnyStr) -> Optional[Match[AnyStr]]:
+    def match(self, string: str) -> Optional[Any]:
         return self.pattern.match(string)
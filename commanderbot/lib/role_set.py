@@ -1,11 +1,12 @@
 from dataclasses import dataclass, field
-from typing import Any, Iterable, Iterator, Optional, Set, Tuple, Union
+from typing import Any, FrozenSet, Iterable, Iterator, Optional, Set, Tuple, Union
 
 from discord import Guild, Member, Role
 
 from commanderbot.lib.from_data_mixin import FromDataMixin
 from commanderbot.lib.json_serializable import JsonSerializable
 from commanderbot.lib.types import RoleID
+from commanderbot.lib.utils import member_role_ids
 
 __all__ = ("RoleSet",)
 
@@ -47,8 +48,8 @@ class RoleSet(JsonSerializable, FromDataMixin):
             return role
         return role.id
 
-    def _get_member_role_ids(self, member: Member) -> Set[RoleID]:
-        return {role.id for role in member.roles}
+    def _get_member_role_ids(self, member: Member) -> FrozenSet[RoleID]:
+        return member_role_ids(member)
 
     def iter_roles(self, guild: Guild) -> Iterable[Tuple[RoleID, Optional[Role]]]:
         for role_id in self._values:
@@ -77,7 +78,9 @@ class RoleSet(JsonSerializable, FromDataMixin):
 
     def member_has_some(self, member: Member, count: int = 1) -> bool:
         member_role_ids = self._get_member_role_ids(member)
-        matching_role_ids = self._values.intersection(member_role_ids)
+        if count == 1:
+            return not member_role_ids.isdisjoint(self._values)
+        matching_role_ids = member_role_ids.intersection(self._values)
         has_some = len(matching_role_ids) >= count
         return has_some
 
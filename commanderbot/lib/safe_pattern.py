@@ -0,0 +1,250 @@
+import importlib
+import re
+import sys
+from logging import getLogger
+from typing import Any, Iterator, Optional
+
+import regex
+
+from commanderbot.lib.intern_pool import InternPool
+from commanderbot.lib.responsive_exception import ResponsiveException
+
+# The parser behind `re` is private, and moved into the `re` package in Python 3.11.
+if sys.version_info >= (3, 11):
+    sre_constants: Any = importlib.import_module("re._constants")
+    sre_parse: Any = importlib.import_module("re._parser")
+else:
+    import sre_constants
+    import sre_parse
+
+# This is optional: if installed, it's used for patterns that it runs identically.
+try:
+    import re2  # type: ignore
+except ImportError:
+    re2 = None
+
+__all__ = (
+    "DEFAULT_PATTERN_BUDGET",
+    "PatternBudgetExceeded",
+    "SafePattern",
+)
+
+
+DEFAULT_PATTERN_BUDGET = 0.05
+
+ENGINE_RE2 = "re2"
+ENGINE_REGEX = "regex"
+
+log = getLogger(__name__)
+
+
+class PatternBudgetExceeded(ResponsiveException):
+    def __init__(self, pattern: str, budget: float):
+        self.pattern: str = pattern
+        self.budget: float = budget
+        super().__init__(
+            f"Pattern `{pattern}` took longer than its budget of {budget:g} seconds"
+        )
+
+    def __reduce__(self):
+        # So that it survives being raised in (and sent back from) another process.
+        return (self.__class__, (self.pattern, self.budget))
+
+
+def _has_nested_repeat(items: Any, in_repeat: bool) -> bool:
+    for op, av in items:
+        if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            _, high, sub = av
+            unbounded = high is sre_constants.MAXREPEAT
+            if unbounded and in_repeat:
+                return True
+            if _has_nested_repeat(sub, in_repeat or unbounded):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _has_nested_repeat(av[-1], in_repeat):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_has_nested_repeat(sub, in_repeat) for sub in av[1]):
+                return True
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            if _has_nested_repeat(av[1], in_repeat):
+                return True
+    return False
+
+
+def _runs_identically_in_re2(items: Any, ascii_only: bool) -> bool:
+    # Only allow constructs that RE2 is known to treat exactly the same way as `re`.
+    # Notably, this excludes `\d`, `\w`, `\s` and `\b` (which are Unicode-aware in
+    # `re` but not in RE2), `$` (which also matches before a trailing newline in `re`),
+    # backreferences, lookarounds, and inline flags.
+    def literal_ok(code: int) -> bool:
+        return (not ascii_only) or (code < 128)
+
+    for op, av in items:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL):
+            if not literal_ok(av):
+                return False
+        elif op is sre_constants.ANY:
+            continue
+        elif op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.NEGATE:
+                    continue
+                if item_op is sre_constants.LITERAL:
+                    if not literal_ok(item_av):
+                        return False
+                elif item_op is sre_constants.RANGE:
+                    if not (literal_ok(item_av[0]) and literal_ok(item_av[1])):
+                        return False
+                else:
+                    return False
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            if not _runs_identically_in_re2(av[2], ascii_only):
+                return False
+        elif op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                return False
+            if not _runs_identically_in_re2(sub, ascii_only):
+                return False
+        elif op is sre_constants.BRANCH:
+            if not all(_runs_identically_in_re2(sub, ascii_only) for sub in av[1]):
+                return False
+        elif op is sre_constants.AT:
+            if av not in (
+                sre_constants.AT_BEGINNING,
+                sre_constants.AT_BEGINNING_STRING,
+                sre_constants.AT_END_STRING,
+            ):
+                return False
+        else:
+            return False
+    return True
+
+
+def _compile_re2(pattern: str, flags: int) -> Optional[Any]:
+    # Case-folding only agrees between the two for ASCII, and other flags not at all.
+    if (re2 is None) or (flags & ~re.IGNORECASE):
+        return None
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+        if not _runs_identically_in_re2(parsed, bool(flags & re.IGNORECASE)):
+            return None
+        source = f"(?i){pattern}" if flags & re.IGNORECASE else pattern
+        return re2.compile(source)
+    except Exception:
+        # Either RE2 itself or the (private) parser behind `re` disagreed.
+        return None
+
+
+class SafePattern:
+    """
+    Runs a user-supplied regular expression with a time budget per match.
+
+    Patterns are always validated with `re` first, so that they behave (and fail) the
+    same regardless of which engine ends up running them. The engine is then picked as
+    follows, from most to least preferred:
+
+    1. `re2`, if installed and the pattern only uses constructs that RE2 matches
+       exactly like `re` does. RE2 runs in linear time, so there is nothing to budget
+       for.
+    2. `regex` otherwise, in its `re`-compatible mode, using its `timeout` to interrupt
+       the match as soon as it exceeds the budget.
+
+    Going over budget raises `PatternBudgetExceeded`, and it is up to the owner of the
+    pattern to report and disable it.
+
+    Attributes
+    ----------
+    pattern
+        The source of the pattern.
+    flags
+        The `re` flags the pattern was compiled with.
+    budget
+        The maximum number of seconds a single match may take.
+    engine
+        The name of the engine used to run the pattern.
+    """
+
+    __slots__ = ("pattern", "flags", "budget", "engine", "_compiled", "__weakref__")
+
+    def __init__(
+        self,
+        pattern: str,
+        flags: int = 0,
+        budget: float = DEFAULT_PATTERN_BUDGET,
+    ):
+        # Let `re.error` propagate for invalid patterns, as callers already expect.
+        re.compile(pattern, flags)
+        compiled: Any = _compile_re2(pattern, flags)
+        engine = ENGINE_RE2
+        if compiled is None:
+            compiled = regex.compile(pattern, flags | regex.VERSION0)
+            engine = ENGINE_REGEX
+        log.debug(f"Compiled pattern {pattern!r} with {engine}")
+        self.pattern: str = pattern
+        self.flags: int = flags
+        self.budget: float = budget
+        self.engine: str = engine
+        self._compiled: Any = compiled
+
+    @classmethod
+    def compile(
+        cls,
+        pattern: str,
+        flags: int = 0,
+        budget: float = DEFAULT_PATTERN_BUDGET,
+    ) -> "SafePattern":
+        """Return a compiled pattern, shared with anything else that compiled it."""
+        return safe_pattern_pool.intern(
+            (pattern, flags, budget), lambda: cls(pattern, flags, budget)
+        )
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.pattern!r} ({self.engine})>"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SafePattern):
+            return (self.pattern, self.flags) == (other.pattern, other.flags)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.pattern, self.flags))
+
+    def has_backtracking_risk(self) -> bool:
+        """
+        Check whether the pattern nests unbounded quantifiers, such as `(a+)+`.
+
+        This is a heuristic for catastrophic backtracking, which doesn't apply to RE2.
+        """
+        if self.engine == ENGINE_RE2:
+            return False
+        try:
+            return _has_nested_repeat(sre_parse.parse(self.pattern, self.flags), False)
+        except Exception:
+            # The parser behind `re` is private, so err on the side of caution.
+            return True
+
+    def _run(self, method: str, string: str, collect: bool = False) -> Any:
+        func = getattr(self._compiled, method)
+        kwargs = {"timeout": self.budget} if self.engine == ENGINE_REGEX else {}
+        try:
+            result = func(string, **kwargs)
+            # Iterators are collected here, so that the budget covers every match.
+            if collect:
+                result = list(result)
+        except TimeoutError:
+            raise PatternBudgetExceeded(self.pattern, self.budget)
+        return result
+
+    def search(self, string: str) -> Optional[Any]:
+        return self._run("search", string)
+
+    def match(self, string: str) -> Optional[Any]:
+        return self._run("match", string)
+
+    def finditer(self, string: str) -> Iterator[Any]:
+        return iter(self._run("finditer", string, collect=True))
+
+
+safe_pattern_pool: InternPool[SafePattern] = InternPool()
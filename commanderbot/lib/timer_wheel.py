@@ -0,0 +1,131 @@
+from typing import Callable, Generic, List, Tuple, TypeVar
+
+__all__ = ("TimerWheel",)
+
+
+T = TypeVar("T")
+
+
+class TimerWheel(Generic[T]):
+    """
+    A hierarchical timer wheel, for scheduling lots of items cheaply.
+
+    Time is measured in abstract integer ticks. Each level of the wheel has a fixed
+    number of slots, and a slot at level `n` spans `slots ** n` ticks. Items are placed
+    on the coarsest level that can hold them, and cascade down to finer levels as time
+    advances, so that adding an item and advancing by a tick are both (amortized)
+    constant-time operations regardless of how many items are pending.
+
+    Items due beyond the horizon of the top level are kept in an overflow list and
+    re-placed whenever the top level wraps around.
+
+    Attributes
+    ----------
+    slots
+        The number of slots per level.
+    levels
+        The number of levels.
+    """
+
+    def __init__(self, slots: int = 64, levels: int = 4):
+        self.slots: int = slots
+        self.levels: int = levels
+        self._spans: List[int] = [slots**level for level in range(levels + 1)]
+        self._wheels: List[List[List[Tuple[int, T]]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self._overflow: List[Tuple[int, T]] = []
+        self._overdue: List[Tuple[int, T]] = []
+        self._tick: int = 0
+        self._count: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def tick(self) -> int:
+        """The current tick."""
+        return self._tick
+
+    def _place(self, due: int, item: T):
+        delta = due - self._tick
+        if delta <= 0:
+            self._overdue.append((due, item))
+            return
+        for level in range(self.levels):
+            if delta < self._spans[level + 1]:
+                slot = (due // self._spans[level]) % self.slots
+                self._wheels[level][slot].append((due, item))
+                return
+        self._overflow.append((due, item))
+
+    def _cascade(self, level: int):
+        slot = (self._tick // self._spans[level]) % self.slots
+        entries = self._wheels[level][slot]
+        self._wheels[level][slot] = []
+        for due, item in entries:
+            self._place(due, item)
+
+    def _step(self, fired: List[T]):
+        self._tick += 1
+        # Re-place anything from the overflow whenever the top level wraps around.
+        if self._overflow and (self._tick % self._spans[self.levels - 1] == 0):
+            overflow = self._overflow
+            self._overflow = []
+            for due, item in overflow:
+                self._place(due, item)
+        # Cascade coarser levels first, so that items can fall all the way down.
+        for level in range(self.levels - 1, 0, -1):
+            if self._tick % self._spans[level] == 0:
+                self._cascade(level)
+        # Everything in the current slot of the finest level is now due.
+        slot = self._tick % self.slots
+        entries = self._wheels[0][slot]
+        if entries:
+            self._wheels[0][slot] = []
+            fired.extend(item for _, item in entries)
+        if self._overdue:
+            fired.extend(item for _, item in self._overdue)
+            self._overdue = []
+
+    def add(self, due: int, item: T):
+        """Schedule an item for the given tick. Past ticks fire on the next advance."""
+        self._place(due, item)
+        self._count += 1
+
+    def advance(self, to_tick: int) -> List[T]:
+        """Advance the wheel up to and including the given tick, returning due items."""
+        fired: List[T] = []
+        if self._overdue:
+            fired.extend(item for _, item in self._overdue)
+            self._overdue = []
+        while self._tick < to_tick:
+            # If there's nothing left to wait for, jump straight to the target.
+            if self._count == len(fired):
+                self._tick = to_tick
+                break
+            self._step(fired)
+        self._count -= len(fired)
+        return fired
+
+    def remove_if(self, predicate: Callable[[T], bool]) -> List[T]:
+        """Remove and return all pending items that satisfy the predicate."""
+        removed: List[T] = []
+
+        def keep(entries: List[Tuple[int, T]]) -> List[Tuple[int, T]]:
+            kept = []
+            for due, item in entries:
+                if predicate(item):
+                    removed.append(item)
+                else:
+                    kept.append((due, item))
+            return kept
+
+        for wheel in self._wheels:
+            for slot in range(self.slots):
+                if wheel[slot]:
+                    wheel[slot] = keep(wheel[slot])
+        self._overflow = keep(self._overflow)
+        self._overdue = keep(self._overdue)
+        self._count -= len(removed)
+        return removed
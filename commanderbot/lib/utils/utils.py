@@ -3,11 +3,14 @@ import json
 import os
 import re
 import traceback
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import (
+    AbstractSet,
     Any,
     AsyncIterable,
     Callable,
+    FrozenSet,
     List,
     Mapping,
     Optional,
@@ -33,17 +36,59 @@ def is_bot(bot: Bot, user: Any) -> bool:
     return user == bot.user or getattr(user, "bot")
 
 
-def member_roles_from(member: User | Member, role_ids: Set[RoleID]) -> Set[RoleID]:
+# The number of members whose role IDs are kept around by `member_role_ids`.
+MEMBER_ROLE_IDS_CACHE_SIZE = 4096
+
+# Maps (guild ID, member ID) to the member's role IDs, along with the internal list of
+# role IDs that they were built from. discord.py replaces that list whenever the member
+# is updated (including their roles), and never changes it in-place, which is enough to
+# tell whether the cached IDs are still current. The IDs are built from that same list
+# (rather than from `Member.roles`, which also depends on the guild's role cache) so
+# that they're always exactly as current as the list they're keyed on.
+_MemberRoleIDsEntry = Tuple[Any, FrozenSet[RoleID]]
+_member_role_ids_cache: "OrderedDict[Tuple[int, int], _MemberRoleIDsEntry]" = (
+    OrderedDict()
+)
+
+
+def member_role_ids(member: User | Member) -> FrozenSet[RoleID]:
+    """
+    Return the IDs of all of the member's roles, including the default role.
+
+    The result is cached until the member's roles change, so that checking the same
+    member against many sets of roles doesn't have to resolve their roles every time.
+
+    A plain [User] may be passed, however an empty set will always be returned.
+    """
+    if not isinstance(member, Member):
+        return frozenset()
+    raw_roles = getattr(member, "_roles", None)
+    if raw_roles is None:
+        # Not what we expected from discord.py, so don't try to cache anything.
+        return frozenset(role.id for role in member.roles)
+    key = (member.guild.id, member.id)
+    cached = _member_role_ids_cache.get(key)
+    if cached and (cached[0] is raw_roles):
+        _member_role_ids_cache.move_to_end(key)
+        return cached[1]
+    # The default role shares its ID with the guild, and every member has it.
+    role_ids = frozenset((member.guild.id, *raw_roles))
+    _member_role_ids_cache[key] = (raw_roles, role_ids)
+    _member_role_ids_cache.move_to_end(key)
+    if len(_member_role_ids_cache) > MEMBER_ROLE_IDS_CACHE_SIZE:
+        _member_role_ids_cache.popitem(last=False)
+    return role_ids
+
+
+def member_roles_from(
+    member: User | Member, role_ids: AbstractSet[RoleID]
+) -> Set[RoleID]:
     """
     Return the set of matching member roles.
 
     A plain [User] may be passed, however an empty set will always be returned.
     """
-    if isinstance(member, User):
-        return set()
-    member_role_ids = {role.id for role in member.roles}
-    matching_role_ids = role_ids.intersection(member_role_ids)
-    return matching_role_ids
+    return set(member_role_ids(member).intersection(role_ids))
 
 
 def dict_without_nones(d: Optional[Mapping[str, Any]] = None, **kwargs):
@@ -107,6 +152,13 @@ def utcnow_aware() -> datetime:
 
 def message_to_file(message: Message, filename: Optional[str] = None) -> File:
     filename = filename or "message.md"
+    file_content = message_to_markdown(message)
+    fp = cast(Any, io.StringIO(file_content))
+    file = File(fp=fp, filename=filename)
+    return file
+
+
+def message_to_markdown(message: Message) -> str:
     file_lines = []
     if message.content:
         file_lines.append(message.content)
@@ -120,10 +172,7 @@ def message_to_file(message: Message, filename: Optional[str] = None) -> File:
         for embed in message.embeds:
             embed_json = json.dumps(embed.to_dict(), indent=2)
             file_lines.append(f"\n```json\n{embed_json}\n```")
-    file_content = "\n".join(file_lines)
-    fp = cast(Any, io.StringIO(file_content))
-    file = File(fp=fp, filename=filename)
-    return file
+    return "\n".join(file_lines)
 
 
 def str_to_file(contents: str, filename: str) -> File:
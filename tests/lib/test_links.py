@@ -0,0 +1,44 @@
+from commanderbot.lib.links import extract_links
+
+
+def domains(content: str, lenient: bool = False):
+    return [link.domain for link in extract_links(content, lenient=lenient)]
+
+
+def test_scheme_links_are_found():
+    assert domains("see https://example.com/a?b=c and http://www.test.org") == [
+        "example.com",
+        "www.test.org",
+    ]
+
+
+def test_bare_domains_are_only_found_when_lenient():
+    assert domains("see example.com/path") == []
+    assert domains("see example.com/path", lenient=True) == ["example.com"]
+
+
+def test_bare_domain_does_not_swallow_a_following_scheme_link():
+    content = "see docs.python.org/https://evil.com"
+    assert domains(content) == ["evil.com"]
+    assert domains(content, lenient=True) == ["docs.python.org", "evil.com"]
+
+
+def test_query_does_not_swallow_a_following_scheme_link():
+    content = "x.com?https://evil.com"
+    assert domains(content) == ["evil.com"]
+    assert domains(content, lenient=True) == ["x.com", "evil.com"]
+
+
+def test_adjacent_scheme_links_are_split():
+    assert domains("https://a.com,https://b.com") == ["a.com", "b.com"]
+    assert domains("https://a.comhttps://b.com") == ["a.com", "b.com"]
+    assert domains("https://a.com/https://b.com") == ["a.com", "b.com"]
+
+
+def test_defanged_links_are_only_found_when_lenient():
+    assert domains("hxxps://evil[.]com") == []
+    assert domains("hxxps://evil[.]com", lenient=True) == ["evil.com"]
+
+
+def test_email_addresses_are_not_links():
+    assert domains("user@mail.com", lenient=True) == []
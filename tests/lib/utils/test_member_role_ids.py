@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+
+from discord import Member, User
+
+from commanderbot.lib.utils import member_role_ids
+
+GUILD_ID = 1000
+
+
+class FakeState:
+    def store_user(self, data, *, cache=True):
+        return User(state=self, data=data)  # type: ignore
+
+
+USER_DATA = {"id": 42, "username": "someone", "discriminator": "0", "avatar": None}
+
+
+def member_data(role_ids):
+    return {
+        "user": USER_DATA,
+        "roles": [str(role_id) for role_id in role_ids],
+        "joined_at": None,
+        "flags": 0,
+    }
+
+
+def make_member(role_ids):
+    # None of the roles are known to the guild, like with a partial role cache.
+    guild = SimpleNamespace(id=GUILD_ID, get_role=lambda role_id: None)
+    return Member(
+        data=member_data(role_ids), guild=guild, state=FakeState()  # type: ignore
+    )
+
+
+def update_roles(member, role_ids):
+    member._update(member_data(role_ids))
+
+
+def test_includes_the_default_role_and_roles_unknown_to_the_guild():
+    member = make_member([1, 2])
+    assert member_role_ids(member) == {GUILD_ID, 1, 2}
+
+
+def test_is_cached_while_the_roles_stay_the_same():
+    member = make_member([1, 2])
+    assert member_role_ids(member) is member_role_ids(member)
+
+
+def test_follows_role_updates():
+    # This relies on discord.py replacing (rather than mutating) the member's internal
+    # list of role IDs whenever the member is updated.
+    member = make_member([1, 2])
+    before = member_role_ids(member)
+    update_roles(member, [2, 3])
+    assert member_role_ids(member) == {GUILD_ID, 2, 3}
+    assert before == {GUILD_ID, 1, 2}
+
+
+def test_plain_users_have_no_roles():
+    user = User(state=FakeState(), data=USER_DATA)  # type: ignore
+    assert member_role_ids(user) == frozenset()